@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Замер подсказок «похожее имя» (fuzzy.NameIndex) на синтетических данных.
+
+Оставшиеся без пары имена похожи на настоящие шифры документации: общий
+префикс, номер, раздел. Индекс триграмм сравнивается с полным перебором
+пар; результаты должны совпадать.
+
+    py benchmarks/bench_fuzzy.py --names 1000
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from pkg.fuzzy import MAX_DISTANCE, NameIndex, levenshtein, normalize_name  # noqa: E402
+
+SECTIONS = ("АР", "КР", "ОВ", "ВК", "ЭОМ", "СС", "ТХ", "ГП")
+
+
+def make_data(n: int, seed: int = 1):
+    rnd = random.Random(seed)
+    entries, files = [], []
+    for i in range(n):
+        name = f"ПД-{rnd.randint(1, 9999):04d}-{rnd.choice(SECTIONS)}-{i:05d}.ifc"
+        entries.append(name)
+        r = rnd.random()
+        if r < 0.5:
+            files.append(name.replace("-", "_"))  # другие разделители
+        elif r < 0.8:
+            pos = rnd.randrange(3, len(name) - 4)
+            files.append(name[:pos] + rnd.choice("0123456789") + name[pos + 1:])  # опечатка
+        else:
+            files.append(f"model_{rnd.getrandbits(40):010x}.ifc")  # без пары
+    return entries, files
+
+
+def _brute(entries, files):
+    keys = [normalize_name(e) for e in entries]
+    out = []
+    for f in files:
+        key = normalize_name(f)
+        limit = min(MAX_DISTANCE, max(1, len(key) // 5))
+        best = None
+        for e, k in zip(entries, keys):
+            d = levenshtein(key, k)
+            if d <= limit and (best is None or d < best[1]):
+                best = (e, d)
+        out.append(best)
+    return out
+
+
+def _indexed(entries, files):
+    index = NameIndex(entries)
+    return [index.closest(f) for f in files]
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--names", type=int, default=1000)
+    args = ap.parse_args()
+
+    entries, files = make_data(args.names)
+    results = {}
+    for label, fn in (("brute", _brute), ("index", _indexed)):
+        t0 = time.perf_counter()
+        results[label] = fn(entries, files)
+        dt = time.perf_counter() - t0
+        print(f"{label:>6}: {dt * 1000:8.1f} ms  ({len(files) / dt:,.0f} запросов/с)")
+    assert results["brute"] == results["index"]
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
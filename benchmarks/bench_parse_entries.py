@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Замер разбора текста ИУЛ (_parse_entries) на синтетическом тексте.
+
+Сравнивает текущий однопроходный разбор с прежней реализацией (пять
+регулярных выражений на строку) и проверяет, что результаты совпадают.
+
+    py benchmarks/bench_parse_entries.py --lines 100000
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from pkg.iul_reader import CRC_RE, DT_RE, IFC_RE, SIZE_RE, _parse_entries  # noqa: E402
+
+
+def _legacy_parse(text: str, pdf_name: str):
+    """Прежний построчный разбор — эталон для сравнения."""
+    lines = [ln for ln in text.splitlines() if ln]
+    out = []
+    last_crc = None
+    for ln in lines:
+        m_crc = CRC_RE.search(ln)
+        if m_crc:
+            last_crc = m_crc.group(1).upper()
+        if ".ifc" in ln or ".IFC" in ln:
+            m_ifc = IFC_RE.search(ln)
+            if not m_ifc:
+                continue
+            fname = Path(m_ifc.group(1)).name
+            m_dt = DT_RE.search(ln)
+            size = None
+            m_size = SIZE_RE.search(ln)
+            if m_size:
+                size = int(m_size.group(1))
+            else:
+                ints = [int(x) for x in re.findall(r"\d+", ln[m_ifc.end():])]
+                if ints:
+                    size = ints[-1]
+            out.append((fname, last_crc or None, m_dt.group(1) if m_dt else None, size))
+    return out
+
+
+def make_text(n_lines: int, seed: int = 1) -> str:
+    rnd = random.Random(seed)
+    filler = [
+        "Информационно-удостоверяющий лист",
+        "Обозначение документа 1-2024-60-П-ТКР",
+        "Наименование файла Дата и время последнего изменения файла",
+        "Разработал Иванов И.И. Проверил Петров П.П.",
+        "",
+    ]
+    out = []
+    for i in range(n_lines):
+        kind = i % 10
+        if kind == 0:
+            out.append(f"CRC-32 {rnd.getrandbits(32):08X}")
+        elif kind in (1, 5):
+            name = f"1-2024-{i}_П_ТКР_ОХ.П_Пролетное строение {i % 7}.ifc"
+            out.append(f"{name} {rnd.randint(1, 28):02d}.0{rnd.randint(1, 9)}.2024 12:{i % 60:02d} {rnd.randint(1, 10**9)}")
+        elif kind == 7:
+            out.append(f"Размер файла, байт: {rnd.randint(1, 10**9)} model_{i}.IFC")
+        else:
+            out.append(rnd.choice(filler))
+    return "\n".join(out)
+
+
+def _timeit(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--lines", type=int, default=100_000)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args(argv)
+
+    text = make_text(args.lines)
+    new = [(e.basename, e.crc_hex, e.dt_str, e.size_bytes) for e in _parse_entries(text, "bench.pdf")]
+    old = _legacy_parse(text, "bench.pdf")
+    if new != old:
+        print("[ОШИБКА] результаты разбора различаются")
+        return 1
+
+    t_old = _timeit(lambda: _legacy_parse(text, "bench.pdf"), args.repeat)
+    t_new = _timeit(lambda: _parse_entries(text, "bench.pdf"), args.repeat)
+    print(f"строк: {args.lines}, записей: {len(new)}")
+    print(f"прежний разбор:     {t_old * 1000:8.1f} мс")
+    print(f"однопроходный:      {t_new * 1000:8.1f} мс  (x{t_old / t_new:.2f})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
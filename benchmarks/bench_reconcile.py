@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Замер сопоставления перечня с файлами (Reconciler) на синтетических данных.
+
+Сравнивает общее ядро с прежним циклом построителей (словарь имён, индекс
+CRC и набор использованных записей) и, если установлен numpy, с пакетным
+соединением ``reconcile_np.join``; проверяет, что результаты совпадают.
+
+    py benchmarks/bench_reconcile.py --files 200000
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from pkg import reconcile_np  # noqa: E402
+from pkg.reconcile import Reconciler  # noqa: E402
+
+
+def _legacy(xml_map, files, case_sensitive):
+    """Прежний цикл ``build_report`` без формирования строк — эталон."""
+    out = []
+    used = set()
+    index = {}
+    for name, meta in xml_map.items():
+        crc = (meta.get("crc_hex") or "").upper()
+        if crc:
+            index.setdefault(crc, []).append(name)
+    for base, crc in files:
+        key = base if case_sensitive else base.lower()
+        meta = xml_map.get(key)
+        if meta is None:
+            hits = index.get(crc, [])
+            if len(hits) == 1:
+                used.add(hits[0] if case_sensitive else hits[0].lower())
+                out.append(hits[0])
+            else:
+                out.append(None)
+        else:
+            used.add(key)
+            out.append(key)
+    extras = [n for n in xml_map if (n if case_sensitive else n.lower()) not in used]
+    return out, extras
+
+
+def _reconciler(xml_map, files, case_sensitive):
+    rec = Reconciler(xml_map, lambda n, m: (m.get("crc_hex") or "").upper() or None, case_sensitive)
+    out = [rec.match(base, crc).key for base, crc in files]
+    return out, [k for k, _ in rec.extras()]
+
+
+def _vectorized(xml_map, files, case_sensitive):
+    names = list(xml_map)
+    m_crcs = [int(m["crc_hex"], 16) for m in xml_map.values()]
+    index, _, _, used = reconcile_np.join(
+        names, m_crcs, [b for b, _ in files], [int(c, 16) for _, c in files], case_sensitive
+    )
+    out = [names[i] if i >= 0 else None for i in index.tolist()]
+    return out, [names[i] for i in (~used).nonzero()[0].tolist()]
+
+
+def make_data(n: int, seed: int = 1):
+    rnd = random.Random(seed)
+    xml_map = {}
+    files = []
+    for i in range(n):
+        name = f"model_{i:07d}.ifc"
+        crc = f"{rnd.getrandbits(32):08X}"
+        xml_map[name] = {"crc_hex": crc}
+        r = rnd.random()
+        if r < 0.90:
+            files.append((name, crc))
+        elif r < 0.95:
+            files.append((f"renamed_{i:07d}.ifc", crc))  # совпадение по CRC
+        elif r < 0.98:
+            files.append((f"extra_{i:07d}.ifc", f"{rnd.getrandbits(32):08X}"))
+        # остальные записи XML остаются без файла
+    return xml_map, files
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--files", type=int, default=200_000)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    xml_map, files = make_data(args.files)
+    expected = _legacy(xml_map, files, True)
+    variants = [("legacy", _legacy), ("reconciler", _reconciler)]
+    if reconcile_np.available():
+        variants.append(("numpy", _vectorized))
+    for label, fn in variants:
+        assert fn(xml_map, files, True) == expected, label
+    for label, fn in variants:
+        best = min(_time(fn, xml_map, files) for _ in range(args.repeat))
+        print(f"{label:>10}: {best * 1000:8.1f} ms  ({len(files) / best:,.0f} файлов/с)")
+    return 0
+
+
+def _time(fn, *a) -> float:
+    t0 = time.perf_counter()
+    fn(*a, True)
+    return time.perf_counter() - t0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Замер времени запуска CLI (``python -X importtime``).
+
+Тяжёлые зависимости (openpyxl, PyPDF2, PyMuPDF, pytesseract, Pillow)
+должны импортироваться только этапами, которым они нужны: ``--help`` и
+планирование запуска их не загружают. Показывает время импорта
+``main_cli`` и самые долгие модули, время ``--help`` и короткой проверки
+XML↔IFC на синтетических данных (с отчётом CSV и XLSX).
+
+    py benchmarks/bench_startup.py --runs 5
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+from pathlib import Path
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+MAIN = os.path.join(ROOT, "main_cli.py")
+
+HEAVY = ("openpyxl", "PyPDF2", "fitz", "pymupdf", "pytesseract", "PIL", "numpy")
+
+
+def import_times(runs: int):
+    """Лучший из ``runs`` замеров: ``(всего мкс, {модуль: (собственное, с зависимостями)})``."""
+    best = None
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import main_cli"],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        )
+        modules = {}
+        total = 0
+        for line in proc.stderr.splitlines():
+            if not line.startswith("import time:") or "self [us]" in line:
+                continue
+            self_us, cumulative, name = line[len("import time:"):].split("|")
+            depth = len(name) - len(name.lstrip())
+            modules[name.strip()] = (int(self_us), int(cumulative))
+            if depth == 1:
+                total += int(cumulative)
+        if best is None or total < best[0]:
+            best = (total, modules)
+    return best
+
+
+def wall_time(argv, runs: int, cwd: str) -> float:
+    """Лучшее время запуска ``main_cli.py argv``, секунд."""
+    best = float("inf")
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, MAIN, *argv], cwd=cwd, capture_output=True, check=False)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def make_project(root: Path, files: int) -> None:
+    ifc = root / "ifc"
+    ifc.mkdir()
+    entries = []
+    for i in range(files):
+        data = f"ISO-10303-21; model {i}".encode()
+        (ifc / f"model_{i:03d}.ifc").write_bytes(data)
+        entries.append(
+            f"<ModelFile><FileName>model_{i:03d}.ifc</FileName>"
+            f"<FileChecksum>{zlib.crc32(data):08X}</FileChecksum><FileFormat>IFC</FileFormat></ModelFile>"
+        )
+    (root / "list.xml").write_text('<?xml version="1.0"?>\n<Root>' + "".join(entries) + "</Root>", encoding="utf-8")
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--top", type=int, default=15, help="Сколько самых долгих модулей показать")
+    ap.add_argument("--files", type=int, default=20, help="Файлов IFC в проверке XML↔IFC")
+    args = ap.parse_args()
+
+    total, modules = import_times(args.runs)
+    print(f"import main_cli: {total / 1000:8.1f} ms")
+    for name, (self_us, cumulative) in sorted(modules.items(), key=lambda m: -m[1][1])[: args.top]:
+        print(f"  {cumulative / 1000:8.1f} ms  (своё {self_us / 1000:6.1f})  {name}")
+    heavy = sorted(m for m in modules if m.split(".")[0] in HEAVY)
+    print("тяжёлые модули при импорте:", ", ".join(heavy) if heavy else "нет")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        make_project(root, args.files)
+        base = ["--xml", "list.xml", "--ifc-dir", "ifc", "--check-xml", "--force"]
+        for label, argv in (
+            ("--help", ["--help"]),
+            ("XML↔IFC, CSV", base + ["--format", "csv"]),
+            ("XML↔IFC, XLSX", base),
+        ):
+            print(f"{label:>14}: {wall_time(argv, args.runs, tmp) * 1000:8.1f} ms")
+    t0 = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"], check=True)
+    print(f"{'python -c pass':>14}: {(time.perf_counter() - t0) * 1000:8.1f} ms")
+    return 1 if heavy else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Замер записи отчёта XML↔IFC (xlsx_writer.write_xlsx) на синтетических строках.
+
+Печатает время записи и пиковый объём памяти процесса.
+
+    py benchmarks/bench_xlsx_writer.py --rows 50000
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from pkg.xlsx_writer import write_xlsx  # noqa: E402
+
+
+def make_rows(n: int):
+    for i in range(n):
+        ok = i % 10 != 0
+        yield {
+            "Имя файла IFC": f"ПД-{i:05d}-АР.ifc",
+            "Имя файла IFC из XML": f"ПД-{i:05d}-АР.ifc",
+            "CRC-32 XML": "5A69A7C6",
+            "CRC-32 IFC": "5A69A7C6" if ok else "74DC6A9D",
+            "Имя совпадает": "Да",
+            "CRC совпадает": "Да" if ok else "Нет",
+            "Статус": "OK" if ok else "CRC_MISMATCH",
+            "Подробности": None if ok else "CRC-32 не совпадает: XML=5A69A7C6, IFC=74DC6A9D",
+            "recommendation": None if ok else "Проверьте корректность файлов и пересоздайте CRC",
+        }
+
+
+def _peak_rss_mb() -> float:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return float("nan")
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--rows", type=int, default=50000)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp) / "report.xlsx"
+        t0 = time.perf_counter()
+        _, stats = write_xlsx(make_rows(args.rows), out)
+        dt = time.perf_counter() - t0
+        size = out.stat().st_size
+    print(f"{args.rows} строк: {dt:.1f} с ({args.rows / dt:,.0f} строк/с), "
+          f"файл {size / 1e6:.1f} МБ, пик памяти {_peak_rss_mb():.0f} МБ, итоги {stats}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -8,122 +8,217 @@ if CURRENT_DIR not in sys.path:
 from pathlib import Path
 import argparse
 import logging
+import multiprocessing
+import signal
+from datetime import datetime
+
+from pkg.cancel import CancelToken
+from pkg.run_state import DEFAULT_STATE_NAME
+from pkg.journal import DEFAULT_JOURNAL_NAME
+from pkg.pipeline import Pipeline
+from pkg.history import DEFAULT_HISTORY_NAME, HistoryStore
+from pkg.scheduler import Scheduler
+from pkg.batch import load_batch, project_file, write_batch_index
+from pkg.runner import (
+    EXIT_CANCELLED, InputError, ProjectResult, SharedCaches, add_resource_options, build_parser,
+    default_state_path, make_scheduler, plan_project, project_name, run_pipeline,
+)
+
+def _install_sigint(cancel: CancelToken) -> None:
+    """Первый Ctrl+C просит остановиться и сохранить готовое, второй прерывает сразу."""
+    def handler(signum, frame):
+        if cancel.cancelled:
+            raise KeyboardInterrupt
+        logging.warning("Прерывание: завершаем текущий этап и сохраняем частичный отчёт (повторный Ctrl+C — выход)")
+        cancel.cancel()
+    signal.signal(signal.SIGINT, handler)
+
+
+def _without_options(argv, names):
+    """``argv`` без параметров ``names`` и их значений."""
+    out = []
+    skip = False
+    for a in argv:
+        if skip:
+            skip = False
+        elif a in names:
+            skip = True
+        elif not any(a.startswith(n + "=") for n in names):
+            out.append(a)
+    return out
+
+
+def _fmt_time(ts: float) -> str:
+    return datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def history_main(argv) -> int:
+    """``main_cli.py history …`` — запросы к истории запусков (без открытия отчётов)."""
+    ap = argparse.ArgumentParser(prog="main_cli.py history", description="Запросы к истории запусков (--history)")
+    ap.add_argument("--db", type=Path, default=Path.cwd() / DEFAULT_HISTORY_NAME, help=f"База истории (по умолчанию {DEFAULT_HISTORY_NAME} в текущей папке)")
+    ap.add_argument("--project", help="Проект (обязателен, если в базе их несколько)")
+    sub = ap.add_subparsers(dest="query", required=True)
+    p = sub.add_parser("changes", help="Что изменилось с запуска N")
+    p.add_argument("--since", type=int, required=True, help="Номер запуска, с которым сравнивать")
+    p.add_argument("--until", type=int, help="Номер запуска для сравнения (по умолчанию последний)")
+    p = sub.add_parser("failing", help="Файлы, не проходящие проверку N дней подряд")
+    p.add_argument("--days", type=float, default=7, help="Сколько дней подряд (по умолчанию 7)")
+    p = sub.add_parser("throughput", help="Длительность и скорость последних запусков")
+    p.add_argument("--limit", type=int, default=20, help="Сколько запусков показать (по умолчанию 20)")
+    args = ap.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+
+    if not args.db.exists():
+        logging.error("База истории не найдена: %s", args.db); return 2
+    with HistoryStore(args.db) as store:
+        project = args.project
+        if project is None:
+            projects = store.projects()
+            if len(projects) != 1:
+                logging.error("Укажите --project: %s", ", ".join(projects) or "в базе нет запусков"); return 2
+            project = projects[0]
+        out = sys.stdout
+        if args.query == "changes":
+            for kind, report, key, old, new in store.changes(project, args.since, args.until):
+                print(kind, report, key or "", old or "", new or "", sep="\t", file=out)
+        elif args.query == "failing":
+            for report, key, status, since, runs in store.failing(project, args.days):
+                print(report, key, status or "", f"с {_fmt_time(since)}", f"запусков: {runs}", sep="\t", file=out)
+        else:
+            for run_id, started, duration, files, rows, errors in store.throughput(project, args.limit):
+                rate = files / duration if duration > 0 else 0.0
+                print(run_id, _fmt_time(started), f"{duration:.1f} с", f"файлов: {files}", f"строк: {rows}",
+                      f"ошибок: {errors}", f"{rate:.1f} файл/с", sep="\t", file=out)
+    return 0
 
-from pkg.xml_reader import read_rules, extract_from_xml
-from pkg.scanner import collect_ifc_files, collect_pdf_files
-from pkg.report_builder import build_report
-from pkg.xlsx_writer import write_xlsx
-
-from pkg.report_builder_pdf_xml import build_report_pdf_xml
-from pkg.xlsx_writer_pdf_xml import write_xlsx_pdf_xml
 
-from pkg.iul_reader import extract_iul_entries, PdfReader  # type: ignore
-from pkg.report_builder_iul import build_report_iul
-from pkg.xlsx_writer_iul import write_xlsx_iul
+def serve_main(argv) -> int:
+    """``main_cli.py serve`` — служба проверок с тёплыми кэшами (см. ``pkg/service.py``)."""
+    from pkg.service import DEFAULT_PORT, CheckService, make_server
 
-def main():
-    ap = argparse.ArgumentParser(description="IFC CRC Checker (CLI) — сверка XML↔IFC, PDF↔XML и/или ИУЛ(PDF)↔IFC с отчётами XLSX")
-    ap.add_argument("--ifc-dir", type=Path, help="Папка с IFC-файлами")
-    ap.add_argument("--recursive-ifc", action="store_true", help="Рекурсивно сканировать подпапки (IFC)")
-    ap.add_argument("--out", type=Path, help="Куда сохранить .xlsx (XML), по умолчанию рядом с XML или в CWD")
-
-    # XML↔IFC
-    ap.add_argument("--check-xml", action="store_true", help="Выполнить проверку XML↔IFC")
-    ap.add_argument("--xml", type=Path, help="Путь к XML с перечнем IFC/PDF")
-
-    # PDF↔XML
-    ap.add_argument("--check-pdf-xml", action="store_true", help="Выполнить проверку PDF↔XML")
-
-    # IUL
-    ap.add_argument("--check-iul", action="store_true", help="Выполнить проверку ИУЛ(PDF)↔IFC")
-    ap.add_argument("--iul", type=Path, nargs="*", help="Пути к PDF. Можно несколько")
-    ap.add_argument("--iul-dir", type=Path, help="Папка с PDF")
-    ap.add_argument("--recursive-pdf", action="store_true", help="Рекурсивно сканировать подпапки (PDF)")
-    ap.add_argument("--pdf-name-strict", action="store_true", help="Строгое правило имени PDF (…_УЛ.pdf)")
-
-    ap.add_argument("--force", action="store_true", help="Перезаписать отчёты, если файлы уже существуют")
+    ap = argparse.ArgumentParser(prog="main_cli.py serve", description="Служба проверок: задания JSON по HTTP, события NDJSON")
+    ap.add_argument("--host", default="127.0.0.1", help="Адрес (по умолчанию 127.0.0.1 — только локальные клиенты)")
+    ap.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Порт HTTP (по умолчанию {DEFAULT_PORT})")
+    ap.add_argument("--socket", type=Path, help="Слушать Unix-сокет вместо порта")
+    add_resource_options(ap)
     ap.add_argument("-v", "--verbose", action="store_true", help="Подробные логи")
+    args = ap.parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO, format="%(levelname)s: %(message)s")
+
+    try:
+        service = CheckService(make_scheduler(args))
+    except ValueError as e:
+        logging.error("Неверные параметры ресурсов: %s", e); return 2
+    try:
+        server = make_server(service, args.host, args.port, args.socket)
+    except OSError as e:
+        service.close()
+        logging.error("Не удалось открыть %s: %s", args.socket or f"{args.host}:{args.port}", e); return 2
+    logging.info("Служба проверок: %s (Ctrl+C — остановить)", args.socket or f"http://{args.host}:{args.port}")
+
+    def stop(signum, frame):
+        raise KeyboardInterrupt
+    # Службу останавливают и Ctrl+C, и SIGTERM (systemd, kill)
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+        if args.socket is not None and args.socket.exists():
+            args.socket.unlink()
+    return 0
+
+
+def run_batch(ap, args, sched: Scheduler, cancel: CancelToken) -> int:
+    """``--batch``: все проекты файла заданий в одном конвейере; итог — книга-оглавление."""
+    try:
+        projects = load_batch(args.batch)
+    except InputError as e:
+        logging.error("%s", e); return 2
+    # Параметры командной строки (кроме самого --batch) — общие для всех проектов
+    common = _without_options(sys.argv[1:], ("--batch", "--batch-report"))
+    shared = SharedCaches(sched)
+    pipe = Pipeline(sched.stage_workers(), cancel=cancel)
+    planned = []
+    for name, argv in projects:
+        result = ProjectResult(name)
+        planned.append((result, None))
+        try:
+            p_args = ap.parse_args(common + argv)
+        except SystemExit:
+            logging.error("Проект %s: неверные параметры в файле заданий", name)
+            result.code, result.note = 2, "Неверные параметры в файле заданий"
+            continue
+        # Журналы и состояния проектов с общей папкой отчётов не должны совпадать
+        base = default_state_path(p_args)
+        p_args.journal = p_args.journal or project_file(base.with_name(DEFAULT_JOURNAL_NAME), name)
+        p_args.state = p_args.state or project_file(base.with_name(DEFAULT_STATE_NAME), name)
+        try:
+            finish = plan_project(p_args, pipe, sched, cancel, shared, result, prefix=f"{name}:", isolate=True)
+        except InputError as e:
+            logging.error("Проект %s: %s", name, e)
+            result.code, result.note = 2, str(e)
+            continue
+        planned[-1] = (result, finish)
+    logging.info("Пакет %s: проектов %s", args.batch, len(projects))
+
+    completed = run_pipeline(pipe, cancel)
+    results = []
+    for result, finish in planned:
+        if finish is not None:
+            finish(completed)
+        results.append(result)
+    index = args.batch_report or args.batch.with_name(args.batch.stem + "_index.xlsx")
+    write_batch_index(results, index)
+    logging.info("Оглавление пакета: %s", index)
+    if not completed:
+        return EXIT_CANCELLED
+    return 2 if any(r.code for r in results) else 0
 
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "history":
+        return history_main(sys.argv[2:])
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        return serve_main(sys.argv[2:])
+    ap = build_parser()
     args = ap.parse_args()
     logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO, format="%(levelname)s: %(message)s")
 
-    if not (args.check_xml or args.check_iul or args.check_pdf_xml):
-        args.check_xml = True
-        args.check_iul = True
-        args.check_pdf_xml = True
-
-    if args.check_xml or args.check_iul:
-        if not args.ifc_dir or not args.ifc_dir.exists() or not args.ifc_dir.is_dir():
-            logging.error("Папка с IFC не найдена/не является папкой: %s", args.ifc_dir); return 2
-        ifc_files = collect_ifc_files(args.ifc_dir, recursive=args.recursive_ifc)
-        if not ifc_files:
-            logging.error("В папке не найдено файлов *.ifc"); return 2
-    else:
-        ifc_files = []
-
-    # XML↔IFC
-    if args.check_xml:
-        if not args.xml or not args.xml.exists():
-            logging.error("Указана проверка XML, но путь к XML не задан или файл не найден."); return 2
-        out_xml = args.out or args.xml.with_name("ifc_crc_report.xlsx")
-        if out_xml.exists() and not args.force:
-            logging.error("Файл отчёта (XML) уже существует: %s. Запустите с --force для перезаписи.", out_xml); return 2
-        rules = read_rules(Path(__file__).with_name("rules.yaml"))
-        xml_map, xml_pdf = extract_from_xml(
-            args.xml, rules, case_sensitive=True, include_sign_files=True
-        )
-        rows_xml = build_report(xml_map, ifc_files, case_sensitive=True)
-        exit_xml, stats_xml = write_xlsx(rows_xml, out_xml)
-        logging.info("Готово (XML). Отчёт: %s | Итоги: %s | Подписей PDF: %s", out_xml, stats_xml, len(xml_pdf))
-
-    pdfs: list[Path] = []
-    if args.check_iul or args.check_pdf_xml:
-        if args.iul:
-            pdfs.extend(args.iul)
-        if args.iul_dir and args.iul_dir.exists():
-            pdfs.extend(collect_pdf_files(args.iul_dir, recursive=args.recursive_pdf))
-        pdfs = sorted({p.resolve() for p in pdfs})
-
-    # PDF↔XML
-    if args.check_pdf_xml:
-        if not args.xml or not args.xml.exists():
-            logging.error("Указана проверка PDF↔XML, но путь к XML не задан или файл не найден."); return 2
-        if not pdfs:
-            logging.error("Указана проверка PDF↔XML, но PDF не заданы/не найдены."); return 2
-        out_pdf = (args.out or args.xml.with_name("pdf_xml_report.xlsx")).with_name("pdf_xml_report.xlsx")
-        if out_pdf.exists() and not args.force:
-            logging.error("Файл отчёта (PDF↔XML) уже существует: %s. Запустите с --force для перезаписи.", out_pdf); return 2
-        rules_pdf = read_rules(Path(__file__).with_name("rules.yaml"))
-        rules_pdf["filter_format"] = "PDF"
-        xml_pdf_map = extract_from_xml(args.xml, rules_pdf, case_sensitive=True)
-        rows_pdf = build_report_pdf_xml(xml_pdf_map, pdfs, case_sensitive=True)
-        exit_pdf, stats_pdf = write_xlsx_pdf_xml(rows_pdf, out_pdf)
-        logging.info("Готово (PDF↔XML). Отчёт: %s | Итоги: %s", out_pdf, stats_pdf)
-
-    # IUL↔IFC
-    if args.check_iul:
-        if not pdfs:
-            logging.error("Указана проверка ИУЛ, но PDF не заданы/не найдены."); return 2
-        if PdfReader is None:
-            logging.error("Для чтения ИУЛ (PDF) требуется PyPDF2. Установите зависимости."); return 2
-        if args.xml:
-            out_iul = (args.out or args.xml.with_name("ifc_crc_report.xlsx"))
-            out_iul = out_iul.with_name(out_iul.stem.replace('.xlsx','') + "_iul.xlsx")
-        else:
-            out_iul = Path.cwd() / "ifc_crc_report_iul.xlsx"
-        if out_iul.exists() and not args.force:
-            logging.error("Файл отчёта (IUL) уже существует: %s. Запустите с --force для перезаписи.", out_iul); return 2
-        iul_map = extract_iul_entries(pdfs)
-        rows_iul = build_report_iul(
-            iul_map,
-            ifc_files,
-            pdfs,
-            strict_pdf_name=bool(args.pdf_name_strict),
-        )
-        exit_iul, stats_iul = write_xlsx_iul(rows_iul, out_iul)
-        logging.info("Готово (IUL). Отчёт: %s | Итоги: %s", out_iul, stats_iul)
+    try:
+        sched = make_scheduler(args)
+    except ValueError as e:
+        logging.error("Неверные параметры ресурсов: %s", e); return 2
 
-    return 0
+    cancel = CancelToken()
+    _install_sigint(cancel)
+
+    if args.fail_fast:
+        if args.batch:
+            logging.error("--fail-fast проверяет один проект и с --batch не используется"); return 2
+        from pkg.gate import run_gate
+
+        verdict = run_gate(args, sched, cancel)
+        print(verdict.to_json(), flush=True)
+        return verdict.code
+
+    if args.batch:
+        return run_batch(ap, args, sched, cancel)
+
+    pipe = Pipeline(sched.stage_workers(), cancel=cancel)
+    result = ProjectResult(project_name(args))
+    try:
+        finish = plan_project(args, pipe, sched, cancel, SharedCaches(sched), result)
+    except InputError as e:
+        logging.error("%s", e); return 2
+    if finish is None:
+        return result.code
+    return finish(run_pipeline(pipe, cancel))
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     raise SystemExit(main())
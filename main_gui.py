@@ -6,6 +6,7 @@ if CURRENT_DIR not in sys.path:
     sys.path.insert(0, CURRENT_DIR)
 
 from pathlib import Path
+import multiprocessing
 import subprocess
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
@@ -14,9 +15,12 @@ from pkg.xml_reader import read_rules, extract_from_xml
 from pkg.scanner import collect_ifc_files, collect_pdf_files
 from pkg.report_builder import build_report
 from pkg.report_builder_pdf_xml import build_report_pdf_xml
-from pkg.iul_reader import extract_iul_entries, PdfReader  # type: ignore
+from pkg import iul_reader
+from pkg.iul_reader import extract_iul_entries
+from pkg.pdf_loader import PdfCache
 from pkg.report_builder_iul import build_report_iul
 from pkg.xlsx_writer_combined import write_combined_xlsx
+from pkg.report_writer import BackgroundWriter, ReportLocked, RowSet
 import socket
 import threading
 
@@ -442,6 +446,8 @@ class App(tk.Tk):
         return messagebox.askyesno("Файл существует", f"Файл:\n{path}\nуже существует.\nЗаменить?")
 
     def _run(self):
+        rowsets: dict = {}
+        writer = None
         try:
             self.log.delete("1.0", "end")
             self.error_messages = []
@@ -495,10 +501,27 @@ class App(tk.Tk):
             rows_xml: list[dict] = []
             rows_iul: list[dict] = []
             rows_pdf: list[dict] = []
+            pdf_cache = PdfCache()
 
             self.progress.start(12)
             self.update()
 
+            # Отчёт пишется в фоне: лист XML — пока идут проверки PDF↔XML и ИУЛ
+            rowsets = {"xml": RowSet(), "iul": RowSet(), "pdf_xml": RowSet()}
+            include_pdf_name_col = bool(self.var_pdf_name_strict.get())
+
+            def save(path: Path):
+                return write_combined_xlsx(
+                    rowsets["xml"] if check_xml else None,
+                    rowsets["iul"] if check_iul else None,
+                    rowsets["pdf_xml"] if check_pdf_xml else None,
+                    path,
+                    include_pdf_name_col=include_pdf_name_col,
+                )
+
+            writer = BackgroundWriter()
+            report = writer.submit(out_path, save)
+
             if check_xml:
                 if not xml or not xml.exists():
                     self._log(f"{EMOJI['err']} [ОШИБКА] XML не указан или не найден.", "err")
@@ -518,6 +541,7 @@ class App(tk.Tk):
                             self._log(f"{EMOJI['ok']} OK(XML) — {name}", "ok")
                         else:
                             self._log(f"{EMOJI['err']} {status}(XML) — {name} | {r.get('Подробности','')}", "err")
+            rowsets["xml"].put(rows_xml)
 
             if check_pdf_xml:
                 if not xml or not xml.exists():
@@ -531,7 +555,9 @@ class App(tk.Tk):
                     xml_pdf_map = extract_from_xml(xml, rules_pdf, case_sensitive=True)
                     self._log(f"    Записей PDF в XML: {len(xml_pdf_map)}")
                     self._log(f"{EMOJI['search']} Сверка PDF↔XML...")
-                    rows_pdf = build_report_pdf_xml(xml_pdf_map, pdfs, case_sensitive=True)
+                    rows_pdf = build_report_pdf_xml(
+                        xml_pdf_map, pdfs, case_sensitive=True, hasher=pdf_cache.crc32
+                    )
                     for r in rows_pdf:
                         status = r.get("Статус","")
                         name = r.get("Имя файла IFC")
@@ -539,18 +565,20 @@ class App(tk.Tk):
                             self._log(f"{EMOJI['ok']} OK(PDF/XML) — {name}", "ok")
                         else:
                             self._log(f"{EMOJI['err']} {status}(PDF/XML) — {name} | {r.get('Подробности','')}", "err")
+            rowsets["pdf_xml"].put(rows_pdf)
 
             if check_iul:
                 if not iul_pdfs:
                     self._log(f"{EMOJI['warn']} ИУЛ-проверка включена, но PDF не выбраны/не найдены.", "warn")
                 else:
-                    if PdfReader is None:
+                    if iul_reader.PdfReader is None:
                         self._log(f"{EMOJI['err']} [ОШИБКА] Для чтения ИУЛ (PDF) требуется PyPDF2. Установите зависимости.", "err")
                     else:
                         self._log(f"{EMOJI['iul']} Чтение ИУЛ (PDF)...")
                         iul_map = extract_iul_entries(
                             iul_pdfs,
                             progress=lambda e: self._log(f"    {e.basename} ← {e.source_pdf}"),
+                            pdf_cache=pdf_cache,
                         )
                         self._log(f"    Извлечено записей из ИУЛ: {len(iul_map)}")
                         self._log(
@@ -571,29 +599,35 @@ class App(tk.Tk):
                             else:
                                 self._log(f"{EMOJI['err']} {status}(IUL) — {name} | {r.get('Подробности','')}", "err")
 
+            rowsets["iul"].put(rows_iul)
+
+            self._log(f"{EMOJI['xlsx']} Запись отчёта...")
+            pending = None
             while True:
                 try:
-                    stats = write_combined_xlsx(
-                        rows_xml if check_xml else None,
-                        rows_iul if check_iul else None,
-                        rows_pdf if check_pdf_xml else None,
-                        out_path,
-                        include_pdf_name_col=bool(self.var_pdf_name_strict.get()),
-                    )
+                    stats = report.result() if pending is None else pending.retry()
                     break
-                except PermissionError:
+                except PermissionError as e:
                     msg = f"Не удалось записать отчёт (возможно открыт): {out_path}"
                     self._log(f"{EMOJI['err']} [ОШИБКА] {msg}", "err", critical=True)
                     if not messagebox.askretrycancel(
                         "Файл занят",
                         f"Не удалось записать файл:\n{out_path}\nЗакройте файл и повторите.",
                     ):
+                        if isinstance(e, ReportLocked):
+                            e.discard()
                         self._log(
                             f"{EMOJI['report']} [ОТМЕНЕНО] Запись отчёта отменена.",
                             "warn",
                         )
                         self._error_dialog(msg)
                         return
+                    if isinstance(e, ReportLocked):
+                        # Отчёт уже готов — повторяется только замена файла
+                        pending = e
+                    else:
+                        pending = None
+                        report = writer.submit(out_path, save)
 
             if check_xml and stats.get("xml"):
                 s = stats["xml"]
@@ -611,10 +645,15 @@ class App(tk.Tk):
             self._log(f"{EMOJI['done']} Готово.", "ok")
 
         except Exception as e:
+            # Фоновый писатель не должен ждать строк, которых уже не будет
+            for rs in rowsets.values():
+                rs.fail(e)
             msg = f"[КРИТИЧЕСКАЯ ОШИБКА] {e}"
             self._log(f"{EMOJI['err']} {msg}", "err", critical=True)
             self._error_dialog(str(e))
         finally:
+            if writer is not None:
+                writer.close(wait=False)
             self.progress.stop()
 
 PORT = 65432
@@ -644,6 +683,7 @@ def _acquire_instance(app: App) -> bool:
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     app = App()
     if _acquire_instance(app):
         app.mainloop()
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""Асинхронный API: проверки из программ на asyncio без запуска CLI.
+
+::
+
+    from pkg.api import CheckService, iter_checks, run_checks
+
+    result = await run_checks({"xml": "list.xml", "ifc-dir": "ifc", "check-xml": True})
+    if result.code == 0:
+        print(result.reports["xml"])
+
+    async for event in iter_checks(config):  # события, как у службы (pkg/service.py)
+        ...
+
+Задание — словарь с теми же ключами, что у проекта в ``--batch``.
+Конвейер проверки выполняется в пуле потоков цикла событий: этапы, как и в
+CLI, идут в своих потоках, а разбор ИУЛ — в процессах, так что цикл событий
+не блокируется. Отмена задачи asyncio (``task.cancel()``, выход из ``async for``)
+останавливает проверку так же, как Ctrl+C в CLI: новые этапы не запускаются.
+
+Без ``service`` каждое задание создаёт свои кэши и процессы. Чтобы задания
+делили кэши CRC-32, PDF, записей ИУЛ и разобранных XML, передайте общий
+``CheckService``; с одним ``CheckService`` можно выполнять несколько
+заданий одновременно (``asyncio.gather``). События ``log`` передаёт только
+служба: сообщения журнала одновременных заданий не различить.
+"""
+from __future__ import annotations
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, Mapping, Optional, Tuple
+import asyncio
+
+from .cancel import CancelToken
+from .service import CheckService, Event
+
+__all__ = ["CheckResult", "CheckService", "iter_checks", "run_checks"]
+
+
+@dataclass
+class CheckResult:
+    """Итог задания: код выхода (как у CLI), причина и отчёты ``{проверка: (путь, итоги)}``."""
+
+    code: int
+    note: Optional[str] = None
+    reports: Dict[str, Tuple[Path, Dict[str, int]]] = field(default_factory=dict)
+
+
+async def iter_checks(
+    config: Mapping[str, Any],
+    service: Optional[CheckService] = None,
+    base: Optional[Path] = None,
+) -> AsyncIterator[Event]:
+    """Выполняет задание ``config``, отдавая события по мере выполнения; последнее — ``done``.
+
+    ``base`` — от какой папки считать относительные пути (по умолчанию текущая).
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    cancel = CancelToken()
+    owned = service is None
+    if owned:
+        service = await loop.run_in_executor(None, CheckService)
+
+    def emit(event: Event) -> None:
+        loop.call_soon_threadsafe(queue.put_nowait, event)
+
+    job = loop.run_in_executor(None, service.execute, config, emit, cancel, base)
+    try:
+        while True:
+            event = await queue.get()
+            yield event
+            if event["event"] == "done":
+                break
+    finally:
+        if not job.done():
+            cancel.cancel()
+        # Проверка завершает текущий этап и сохраняет готовое — дожидаемся её
+        try:
+            await asyncio.shield(job)
+        finally:
+            if owned:
+                await loop.run_in_executor(None, service.close)
+
+
+async def run_checks(
+    config: Mapping[str, Any],
+    service: Optional[CheckService] = None,
+    base: Optional[Path] = None,
+    on_event: Optional[Callable[[Event], None]] = None,
+) -> CheckResult:
+    """Выполняет задание ``config`` и возвращает итог; ``on_event`` получает события."""
+    result = CheckResult(2)
+    events = iter_checks(config, service, base)
+    try:
+        async for event in events:
+            if on_event is not None:
+                on_event(event)
+            if event["event"] == "report":
+                result.reports[event["report"]] = (Path(event["path"]), event["stats"])
+            elif event["event"] == "done":
+                result.code, result.note = event["code"], event["note"]
+    finally:
+        await events.aclose()
+    return result
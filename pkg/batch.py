@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""Пакетный режим: много проектов за один запуск CLI (``--batch jobs.yaml``).
+
+Файл заданий — YAML::
+
+    defaults:            # необязательно: параметры для всех проектов
+      check-iul: true
+      pdf-name-strict: true
+    projects:
+      - name: Корпус 1
+        xml: k1/list.xml
+        ifc-dir: k1/ifc
+        iul-dir: k1/pdf
+        out: reports/k1.xlsx
+
+Ключи — длинные параметры CLI (``ifc-dir`` или ``ifc_dir``), относительные
+пути считаются от папки файла заданий. Параметры проекта дополняют
+параметры командной строки; ресурсы (``--jobs`` и т.п.) общие для всего
+пакета и задаются только в командной строке.
+
+Все проекты выполняются в одном процессе и одном конвейере: этапы разных
+проектов делят потоки и процессы, а CRC-32 файлов, PDF в памяти и записи ИУЛ
+общие (``runner.SharedCaches``) — файл, входящий в несколько проектов, читается один
+раз. Итог всех проектов — книга-оглавление (``write_batch_index``).
+"""
+from __future__ import annotations
+from pathlib import Path
+from typing import Any, List, Mapping, Set, Tuple
+import os
+import re
+
+from .runner import InputError, ProjectResult
+from .xlsx_utils import ReportSheet, new_workbook
+
+try:
+    import yaml  # type: ignore
+except Exception:  # pragma: no cover
+    yaml = None  # type: ignore
+
+# Параметры-пути: относительные считаются от папки файла заданий
+PATH_OPTIONS = {"xml", "ifc_dir", "iul", "iul_dir", "out", "state", "journal", "history"}
+
+# Названия проверок в оглавлении
+REPORT_TITLES = {
+    "xml": "XML↔IFC",
+    "pdf_xml": "PDF↔XML",
+    "iul": "ИУЛ↔IFC",
+    "consolidated": "XML↔ИУЛ↔IFC",
+}
+
+INDEX_HEADERS = ["Проект", "Проверка", "Отчёт", "Статус", "Всего строк", "OK", "Ошибки", "Подробности"]
+
+
+def project_file(path: Path, name: str) -> Path:
+    """Служебный файл проекта пакета: ``.ifc_crc_journal.jsonl`` → ``.ifc_crc_journal_<проект>.jsonl``."""
+    return path.with_name(f"{path.stem}_{_safe_name(name)}{path.suffix}")
+
+
+def _safe_name(name: str) -> str:
+    return re.sub(r"[^\w.-]+", "_", name).strip("_") or "project"
+
+
+def options_argv(options: Mapping[str, Any], base: Path) -> List[str]:
+    argv: List[str] = []
+    for key, value in options.items():
+        dest = str(key).replace("-", "_")
+        flag = "--" + dest.replace("_", "-")
+        if value is None or value is False:
+            continue
+        if value is True:
+            argv.append(flag)
+            continue
+        values = value if isinstance(value, (list, tuple)) else [value]
+        if dest in PATH_OPTIONS:
+            values = [base / Path(str(v)).expanduser() for v in values]
+        argv.append(flag)
+        argv.extend(str(v) for v in values)
+    return argv
+
+
+def load_batch(path: Path) -> List[Tuple[str, List[str]]]:
+    """Читает файл заданий: ``(имя проекта, параметры CLI)`` для каждого проекта.
+
+    Бросает ``InputError``, если файл не читается или в нём нет проектов.
+    """
+    if yaml is None:
+        raise InputError("Для --batch требуется PyYAML. Установите зависимости.")
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            data = yaml.safe_load(f)
+    except (OSError, yaml.YAMLError) as e:
+        raise InputError(f"Не удалось прочитать файл заданий {path}: {e}") from e
+    if isinstance(data, list):
+        data = {"projects": data}
+    if not isinstance(data, dict) or not isinstance(data.get("projects"), list) or not data["projects"]:
+        raise InputError(f"В файле заданий {path} нет списка projects")
+    defaults = data.get("defaults") or {}
+    base = path.resolve().parent
+    out: List[Tuple[str, List[str]]] = []
+    taken: Set[str] = set()
+    for n, project in enumerate(data["projects"], start=1):
+        if not isinstance(project, dict):
+            raise InputError(f"Проект №{n} в {path} задан не словарём")
+        options = {**defaults, **project}
+        name = str(options.pop("name", None) or (Path(str(options["xml"])).stem if options.get("xml") else f"project{n}"))
+        # Имена этапов конвейера и служебных файлов строятся по имени проекта —
+        # оно должно быть уникальным, в том числе среди имён вида «X (2)» из файла
+        unique, k = name, 1
+        while unique in taken or _safe_name(unique) in taken:
+            k += 1
+            unique = f"{name} ({k})"
+        name = unique
+        taken.update((name, _safe_name(name)))
+        out.append((name, options_argv(options, base)))
+    return out
+
+
+def write_batch_index(results: List[ProjectResult], out_path: Path) -> None:
+    """Книга-оглавление пакета: строка на каждый отчёт каждого проекта."""
+    wb = new_workbook()
+    sheet = ReportSheet(wb, "Проекты", INDEX_HEADERS, left_cols=(1, 3, 8), status_col="D")
+    for res in results:
+        if not res.reports:
+            # Не проверен: ошибка входных данных или отчёты и так актуальны (--since-last)
+            sheet.append([res.name, None, None, "OK" if res.code == 0 else "Не выполнен", None, None, None, res.note])
+            continue
+        for report, (path, stats) in res.reports.items():
+            if res.code:
+                status = "Не завершён"
+            else:
+                status = "OK" if stats["errors"] == 0 else "Есть ошибки"
+            link = os.path.relpath(path, out_path.parent)
+            sheet.append(
+                [res.name, REPORT_TITLES.get(report, report), path.name, status,
+                 stats["total"], stats["ok"], stats["errors"], res.note],
+                links={3: link},
+            )
+    sheet.close()
+    wb.save(out_path)
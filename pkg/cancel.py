@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""Кооперативная отмена и лимиты времени для длительных операций."""
+from __future__ import annotations
+from typing import Optional
+import threading
+import time
+
+
+class OperationCancelled(Exception):
+    """Операция прервана пользователем (Ctrl+C, кнопка «Отмена»)."""
+
+
+class TimeBudgetExceeded(OperationCancelled):
+    """Операция не уложилась в отведённое время."""
+
+
+class CancelToken:
+    """Флаг отмены, который проверяют циклы чтения, OCR и сборки отчётов.
+
+    ``timeout`` задаёт собственный лимит времени токена; ``child`` создаёт
+    токен с отдельным лимитом (например, на один документ), который также
+    срабатывает при отмене родителя.
+    """
+
+    def __init__(self, timeout: Optional[float] = None, parent: Optional["CancelToken"] = None):
+        self._event = threading.Event()
+        self._parent = parent
+        self.deadline = (time.monotonic() + timeout) if timeout else None
+
+    def cancel(self) -> None:
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set() or (self._parent is not None and self._parent.cancelled)
+
+    @property
+    def expired(self) -> bool:
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            return True
+        return self._parent is not None and self._parent.expired
+
+    def check(self) -> None:
+        """Бросает исключение, если операцию пора прекратить."""
+        if self.cancelled:
+            raise OperationCancelled()
+        if self.expired:
+            raise TimeBudgetExceeded()
+
+    def child(self, timeout: Optional[float] = None) -> "CancelToken":
+        return CancelToken(timeout, parent=self)
+
+
+def check(token: Optional[CancelToken]) -> None:
+    if token is not None:
+        token.check()
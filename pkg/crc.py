@@ -1,18 +1,90 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
 from pathlib import Path
+from contextlib import nullcontext
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, Optional, Tuple
 import zlib
 
-def compute_crc32(path: Path, chunk_size: int = 1024 * 1024) -> int:
+from .cancel import CancelToken, check
+
+if TYPE_CHECKING:
+    from .scheduler import Scheduler
+
+def compute_crc32(
+    path: Path,
+    chunk_size: int = 1024 * 1024,
+    scheduler: Optional["Scheduler"] = None,
+    cancel: Optional[CancelToken] = None,
+) -> int:
     """
     Вычисляет CRC-32 файла (unsigned), совпадает со значением, которое ждём в XML/ИУЛ.
     Возвращает int (0..2^32-1). Представление в hex: f"{crc:08X}".
+    ``scheduler`` ограничивает одновременное чтение и полосу (``--max-inflight-mb``, ``--read-mbps``).
+    ``cancel`` прерывает чтение между блоками (``OperationCancelled``).
     """
     crc = 0
-    with path.open("rb") as f:
+    with path.open("rb") as f, (scheduler.reserve(chunk_size) if scheduler else nullcontext()):
         while True:
+            check(cancel)
             buf = f.read(chunk_size)
             if not buf:
                 break
+            if scheduler is not None:
+                scheduler.throttle(len(buf))
             crc = zlib.crc32(buf, crc)
     return crc & 0xFFFFFFFF
+
+
+class CrcCache:
+    """CRC-32 файлов, уже посчитанные за запуск.
+
+    Передаётся построителям отчётов как ``hasher``: если одни и те же IFC
+    проверяются по XML, по ИУЛ и в сводной проверке, каждый файл читается
+    один раз. Запись сверяется с размером и mtime, изменённый файл
+    хэшируется заново.
+
+    ``known`` — CRC из прошлого запуска (``run_state``) в том же виде, что
+    отдаёт ``items()``; ``compute`` — чем считать CRC-32 нового файла
+    (например, ``PdfCache.crc32``); ``record`` вызывается для каждого
+    заново посчитанного CRC (например, ``Journal.recorder``).
+    """
+
+    def __init__(
+        self,
+        known: Optional[Dict[str, Tuple[Tuple[int, int], int]]] = None,
+        compute: Optional[Callable[[Path], int]] = None,
+        record: Optional[Callable[[str, Tuple[int, int], int], None]] = None,
+    ):
+        self._crc: Dict[str, Tuple[Tuple[int, int], int]] = dict(known or {})
+        self._compute = compute if compute is not None else compute_crc32
+        self._record = record
+
+    def __call__(self, path: Path) -> int:
+        st = path.stat()
+        ident = (st.st_size, st.st_mtime_ns)
+        cached = self._crc.get(str(path))
+        if cached is not None and cached[0] == ident:
+            return cached[1]
+        crc = self._compute(path)
+        self._crc[str(path)] = (ident, crc)
+        if self._record is not None:
+            self._record(str(path), ident, crc)
+        return crc
+
+    def __contains__(self, path: object) -> bool:
+        """Посчитан ли уже CRC-32 файла ``path`` (и не изменился ли файл с тех пор)."""
+        cached = self._crc.get(str(path))
+        if cached is None or not isinstance(path, Path):
+            return False
+        try:
+            st = path.stat()
+        except OSError:
+            return False
+        return cached[0] == (st.st_size, st.st_mtime_ns)
+
+    def __len__(self) -> int:
+        return len(self._crc)
+
+    def items(self) -> Iterator[Tuple[str, Tuple[Tuple[int, int], int]]]:
+        """Пары ``(путь, ((размер, mtime_ns), crc))``."""
+        return iter(self._crc.items())
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""Индекс фактических CRC-32 с поправкой на типичные ошибки OCR."""
+from __future__ import annotations
+from typing import Dict, Iterable, List, Optional
+
+# Группы символов, которые OCR путает в шестнадцатеричных CRC (0↔O↔D, 8↔B, 1↔I...).
+# Первый символ группы — канонический представитель.
+CONFUSABLE_GROUPS = ("0DOQ", "8B", "1IL", "5S", "2Z", "6G")
+
+_CANON = {ch: grp[0] for grp in CONFUSABLE_GROUPS for ch in grp}
+_HEX = set("0123456789ABCDEF")
+
+
+def canonical_crc(value: str) -> str:
+    """Приводит CRC к ключу, в котором все путаемые символы совпадают."""
+    return "".join(_CANON.get(ch, ch) for ch in value.upper())
+
+
+def _confusions(a: str, b: str) -> int:
+    return sum(1 for x, y in zip(a, b) if x != y)
+
+
+class CrcIndex:
+    """Набор фактических CRC-32 с поиском «соседей» по ошибкам OCR.
+
+    Значение из ИУЛ сопоставляется с фактическим CRC, если они различаются
+    не более чем в ``max_confusions`` позициях, каждая из которых — замена
+    внутри одной группы ``CONFUSABLE_GROUPS``, и такой CRC ровно один.
+    """
+
+    def __init__(self, crcs: Iterable[str], max_confusions: int = 1):
+        self.max_confusions = max_confusions
+        self._exact = set()
+        self._by_canon: Dict[str, List[str]] = {}
+        for crc in crcs:
+            crc = crc.upper()
+            if crc in self._exact:
+                continue
+            self._exact.add(crc)
+            self._by_canon.setdefault(canonical_crc(crc), []).append(crc)
+
+    def __contains__(self, crc: str) -> bool:
+        return crc.upper() in self._exact
+
+    def correct(self, ocr_value: Optional[str]) -> Optional[str]:
+        """Возвращает единственный фактический CRC, соседний с ``ocr_value``."""
+        if not ocr_value:
+            return None
+        raw = ocr_value.strip().upper()
+        if len(raw) != 8:
+            return None
+        if raw in self._exact:
+            return raw
+        hits = [
+            crc for crc in self._by_canon.get(canonical_crc(raw), [])
+            if _confusions(raw, crc) <= self.max_confusions
+        ]
+        if len(hits) == 1 and set(hits[0]) <= _HEX:
+            return hits[0]
+        return None
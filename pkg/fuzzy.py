@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""Подсказки «похожее имя» для несопоставленных файлов и записей.
+
+Если файл не найден в перечне ни по имени, ни по CRC-32, построители
+отчётов предлагают ближайшее по написанию имя из оставшихся записей (и
+наоборот). Имена сначала нормализуются: регистр, кириллические буквы,
+совпадающие по начертанию с латинскими (``А``/``A``, ``С``/``C`` …), и
+разделители (пробелы, ``_``, ``-``, ``.``) не учитываются. Затем ближайшее
+имя ищется по расстоянию Левенштейна через индекс триграмм: одна правка
+меняет не больше трёх триграмм, поэтому имя в пределах ``k`` правок обязано
+содержать хотя бы одну из ``3k + 1`` самых редких триграмм запроса. Точное
+расстояние считается только для таких кандидатов, так что поиск не
+перебирает все пары даже при тысячах оставшихся имён.
+"""
+from __future__ import annotations
+from typing import Dict, Iterable, List, Optional, Tuple
+import re
+
+# Кириллица → латиница для букв с одинаковым начертанием (после casefold)
+_HOMOGLYPHS = str.maketrans({
+    "а": "a", "в": "b", "е": "e", "ё": "e", "к": "k", "м": "m", "н": "h",
+    "о": "o", "р": "p", "с": "c", "т": "t", "у": "y", "х": "x",
+})
+_SEPARATORS_RE = re.compile(r"[\s_\-.]+")
+
+# Наибольшее расстояние, при котором имя ещё предлагается
+MAX_DISTANCE = 3
+
+
+def normalize_name(name: str) -> str:
+    """Имя без учёта регистра, кириллических «двойников» и разделителей."""
+    return _SEPARATORS_RE.sub("", name.casefold().translate(_HOMOGLYPHS))
+
+
+def levenshtein(a: str, b: str, limit: Optional[int] = None) -> int:
+    """Расстояние Левенштейна (вставка, удаление, замена — по 1).
+
+    Считается бит-параллельным алгоритмом Майерса: столбец матрицы правок
+    хранится в двух целых, на символ ``a`` — десяток битовых операций.
+    С ``limit`` строки, заведомо отличающиеся сильнее (по длине), не
+    сравниваются: возвращается ``limit + 1``.
+    """
+    if a == b:
+        return 0
+    if len(a) < len(b):
+        a, b = b, a
+    if limit is not None and len(a) - len(b) > limit:
+        return limit + 1
+    m = len(b)
+    if m == 0:
+        return len(a)
+    peq: Dict[str, int] = {}
+    for i, c in enumerate(b):
+        peq[c] = peq.get(c, 0) | (1 << i)
+    mask = (1 << m) - 1
+    high = 1 << (m - 1)
+    pv, mv, score = mask, 0, m
+    for c in a:
+        eq = peq.get(c, 0)
+        xv = eq | mv
+        xh = ((((eq & pv) + pv) & mask) ^ pv) | eq
+        ph = (mv | ~(xh | pv)) & mask
+        mh = pv & xh
+        if ph & high:
+            score += 1
+        elif mh & high:
+            score -= 1
+        ph = ((ph << 1) | 1) & mask
+        mh = (mh << 1) & mask
+        pv = (mh | ~(xv | ph)) & mask
+        mv = ph & xv
+    return score
+
+
+def _trigrams(key: str) -> List[Tuple[str, int]]:
+    """Триграммы имени с краевыми метками; повторы нумеруются."""
+    padded = f"^^{key}$$"
+    seen: Dict[str, int] = {}
+    grams = []
+    for i in range(len(padded) - 2):
+        g = padded[i:i + 3]
+        n = seen.get(g, 0)
+        seen[g] = n + 1
+        grams.append((g, n))
+    return grams
+
+
+class NameIndex:
+    """Индекс имён для поиска ближайшего по расстоянию Левенштейна."""
+
+    __slots__ = ("_names", "_grams", "_postings")
+
+    def __init__(self, names: Iterable[str] = ()):
+        self._names: List[Tuple[str, str]] = []
+        self._grams: List[frozenset] = []
+        self._postings: Dict[Tuple[str, int], List[int]] = {}
+        for name in names:
+            self.add(name)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def add(self, name: str) -> None:
+        key = normalize_name(name)
+        pos = len(self._names)
+        grams = _trigrams(key)
+        self._names.append((name, key))
+        self._grams.append(frozenset(grams))
+        for g in grams:
+            self._postings.setdefault(g, []).append(pos)
+
+    def closest(self, name: str, max_distance: Optional[int] = None) -> Optional[Tuple[str, int]]:
+        """Ближайшее имя и расстояние до него (``None``, если дальше порога).
+
+        По умолчанию порог — пятая часть длины нормализованного имени, но
+        не меньше 1 и не больше ``MAX_DISTANCE``. При равных расстояниях
+        побеждает имя, добавленное раньше.
+        """
+        if not self._names:
+            return None
+        key = normalize_name(name)
+        limit = max_distance
+        if limit is None:
+            limit = min(MAX_DISTANCE, max(1, len(key) // 5))
+        grams = _trigrams(key)
+        # Сколько триграмм запроса должно уцелеть у имени в пределах limit правок
+        need = len(grams) - 3 * limit
+        if need <= 0:
+            candidates = range(len(self._names))
+        else:
+            postings = self._postings
+            query = frozenset(grams)
+            grams.sort(key=lambda g: len(postings.get(g, ())))
+            found = set()
+            for g in grams[:len(grams) - need + 1]:
+                found.update(postings.get(g, ()))
+            # Фильтр по числу общих триграмм отсекает почти всех кандидатов
+            candidates = sorted(pos for pos in found if len(query & self._grams[pos]) >= need)
+        best: Optional[Tuple[str, int]] = None
+        for pos in candidates:
+            cand, cand_key = self._names[pos]
+            d = levenshtein(key, cand_key, limit)
+            if d <= limit and (best is None or d < best[1]):
+                best = (cand, d)
+                if d == 0:
+                    break
+                limit = d
+        return best
+
+
+class NameHints:
+    """Подсказки для одного построителя отчёта.
+
+    ``entries`` — записи перечня, не сопоставленные ни с одним файлом по
+    имени: среди них ищется имя для файла без записи (``for_file``). Такие
+    файлы запоминаются, и для лишних записей перечня (``for_entry``) имя
+    ищется уже среди них. Индексы строятся при первом обращении, поэтому
+    полностью сопоставленный перечень ничего не стоит.
+    """
+
+    __slots__ = ("_entries", "_entry_index", "_files", "_file_index")
+
+    def __init__(self, entries: Iterable[str]):
+        self._entries = entries
+        self._entry_index: Optional[NameIndex] = None
+        self._files: List[str] = []
+        self._file_index: Optional[NameIndex] = None
+
+    def for_file(self, name: str) -> Optional[Tuple[str, int]]:
+        self._files.append(name)
+        if self._entry_index is None:
+            self._entry_index = NameIndex(self._entries)
+        return self._entry_index.closest(name)
+
+    def for_entry(self, name: str) -> Optional[Tuple[str, int]]:
+        if self._file_index is None:
+            self._file_index = NameIndex(self._files)
+        return self._file_index.closest(name)
@@ -0,0 +1,316 @@
+# -*- coding: utf-8 -*-
+"""Быстрая проверка комплекта для CI (``--fail-fast``).
+
+Отчёты не пишутся: итог — одна строка JSON (``Verdict``) и код выхода
+(0 — расхождений нет, 1 — найдено расхождение, 2 — ошибка входных данных
+или сбой). Проверки идут от дешёвых к дорогим, первое расхождение
+останавливает работу и снимает ещё не выполненную:
+
+1. ``names`` — имена IFC и PDF против записей XML;
+2. ``iul_text`` — ИУЛ с текстовым слоем (без OCR): записи без файла,
+   размер, дата/время и имя PDF;
+3. ``crc`` — CRC-32 файлов от маленьких к большим в ``io_jobs`` потоков;
+4. ``ocr`` — распознавание сканов ИУЛ;
+5. ``full`` — строки отчётов, как в обычном запуске (по готовым CRC-32).
+
+Ранние этапы сообщают только о расхождениях, которые обычный запуск тоже
+покажет (в отчёте статус может быть точнее: например, переименованный файл —
+NAME_MISMATCH вместо ERROR_IFC_EXTRA). Этап ``full`` проверяет всё
+остальное, поэтому комплект, прошедший ``--fail-fast``, даёт отчёты без ошибок.
+Сводная проверка (``--check-consolidated``) выполняется только на этапе ``full``.
+"""
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple
+import json
+import logging
+import time
+
+from .cancel import CancelToken, OperationCancelled, check
+from .crc import CrcCache, compute_crc32
+from .iul_reader import IulEntry, IulEntryCache, extract_iul_entries, pdf_name_ok_strict
+from .report_builder import iter_report
+from .report_builder_consolidated import iter_report_consolidated
+from .report_builder_iul import iter_report_iul
+from .report_builder_pdf_xml import iter_report_pdf_xml
+from .rows import ReportRow, Status, details_text, status_text
+from .runner import EXIT_CANCELLED, InputError, SharedCaches, collect_inputs
+from .scheduler import Scheduler
+from .utils import fmt_mtime
+
+PHASES = ("names", "iul_text", "crc", "ocr", "full")
+
+INPUT_ERROR = "INPUT_ERROR"
+FAILURE = "FAILURE"
+CANCELLED = "CANCELLED"
+
+# Столбцы строки отчёта, из которых берётся имя файла для вердикта
+_FILE_COLUMNS = ("Имя файла IFC", "Имя PDF", "Имя файла IFC из XML", "Имя файла IFC из ИУЛ")
+
+
+@dataclass
+class Verdict:
+    """Итог ``--fail-fast``: первое расхождение (этап, проверка, статус, файл) или ``ok``."""
+
+    ok: bool
+    phase: Optional[str] = None
+    check: Optional[str] = None
+    status: Optional[str] = None
+    file: Optional[str] = None
+    details: Optional[str] = None
+    seconds: float = 0.0
+
+    @property
+    def code(self) -> int:
+        if self.ok:
+            return 0
+        if self.status == CANCELLED:
+            return EXIT_CANCELLED
+        return 2 if self.status in (INPUT_ERROR, FAILURE) else 1
+
+    def to_json(self) -> str:
+        """Компактная строка JSON без пустых полей."""
+        data = {k: v for k, v in asdict(self).items() if v is not None}
+        data["seconds"] = round(self.seconds, 3)
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+class _Mismatch(Exception):
+    def __init__(self, verdict: Verdict):
+        super().__init__(verdict.status)
+        self.verdict = verdict
+
+
+def _row_file(row: ReportRow) -> Optional[str]:
+    for column in _FILE_COLUMNS:
+        value = row.get(column)
+        if value:
+            return value
+    return None
+
+
+class _Gate:
+    """Состояние одной проверки: данные этапов переходят к следующим."""
+
+    def __init__(self, args, ifc_files: List[Path], pdfs: List[Path], sched: Scheduler,
+                 cancel: CancelToken, shared: SharedCaches):
+        self.args = args
+        self.ifc_files = ifc_files
+        self.pdfs = pdfs
+        self.sched = sched
+        self.shared = shared
+        # Свой токен: расхождение снимает работу проверки, Ctrl+C — тоже
+        self.stop = cancel.child()
+        self.phase = PHASES[0]
+        self.ifc_by_name = {f.name: f for f in ifc_files}
+        self.ifc_crc = CrcCache(
+            dict(shared.ifc_crc.items()),
+            compute=lambda p: compute_crc32(p, scheduler=sched, cancel=self.stop),
+        )
+        self.pdf_crc = CrcCache(compute=shared.pdf_cache.crc32)
+        self.xml_map: Dict[str, dict] = {}
+        self.xml_pdf: Dict[str, dict] = {}
+        # Записи ИУЛ из текстового слоя: по PDF и те, что OCR уже не изменит
+        self.text_entries: Dict[Path, List[IulEntry]] = {}
+        self.final_entries: Dict[str, IulEntry] = {}
+        self.iul_map: Dict[str, IulEntry] = {}
+        self.timed_out: Set[str] = set()
+
+    def _fail(self, check_name: str, status, file: Optional[str], details: Optional[str]) -> None:
+        if isinstance(status, Status):
+            status = status_text(status)
+        raise _Mismatch(Verdict(False, self.phase, check_name, status, file, details))
+
+    def run(self) -> None:
+        for phase in PHASES:
+            self.phase = phase
+            t0 = time.perf_counter()
+            getattr(self, phase)()
+            check(self.stop)
+            logging.debug("Этап %s: %.2f с", phase, time.perf_counter() - t0)
+
+    def names(self) -> None:
+        a = self.args
+        if a.check_xml or a.check_consolidated:
+            self.xml_map = self.shared.parse_xml(a.xml)[0]
+        if a.check_pdf_xml:
+            self.xml_pdf = self.shared.parse_xml(a.xml, pdf=True)
+        if a.check_xml:
+            self._compare_names("xml", self.xml_map, self.ifc_files, Status.ERROR_IFC_EXTRA)
+        if a.check_pdf_xml:
+            self._compare_names("pdf_xml", self.xml_pdf, self.pdfs, Status.ERROR_PDF_EXTRA)
+
+    def _compare_names(self, check_name: str, manifest: Dict[str, dict], files: List[Path], extra: Status) -> None:
+        for f in files:
+            if f.name not in manifest:
+                self._fail(check_name, extra, f.name, "Нет записи в XML с таким именем")
+        names = {f.name for f in files}
+        for name in manifest:
+            if name not in names:
+                self._fail(check_name, Status.ERROR_XML_EXTRA, name, "Запись в XML есть, файла с таким именем нет")
+
+    def iul_text(self) -> None:
+        a = self.args
+        if not a.check_iul:
+            return
+        parsed = IulEntryCache()
+        extract_iul_entries(
+            self.pdfs,
+            pdf_cache=self.shared.pdf_cache,
+            cancel=self.stop,
+            doc_timeout=a.pdf_timeout,
+            workers=self.sched.processes(1),
+            timed_out=self.timed_out,
+            entries_cache=parsed,
+            pool=self.shared.pool,
+            ocr=False,
+        )
+        # Прерванный разбор возвращает только разобранное
+        check(self.stop)
+        # Запись окончательна, если до её PDF нет сканов: при совпадении имён
+        # побеждает первый PDF, а записи сканов станут известны только после OCR
+        scans_before = False
+        seen: Dict[str, IulEntry] = {}
+        for p in self.pdfs:
+            entries = parsed.get(p)
+            if not entries:
+                scans_before = True
+                continue
+            self.text_entries[p] = entries
+            for e in entries:
+                if e.basename in seen:
+                    continue
+                seen[e.basename] = e
+                if not scans_before:
+                    self.final_entries[e.basename] = e
+
+        for name, e in seen.items():
+            if name not in self.ifc_by_name:
+                self._fail("iul", Status.ERROR_IUL_EXTRA, name, f"Запись в ИУЛ ({e.source_pdf}) есть, файла с таким именем нет")
+        for name, e in self.final_entries.items():
+            st = self.ifc_by_name[name].stat()
+            if e.size_bytes is not None and e.size_bytes != st.st_size:
+                self._fail("iul", Status.SIZE_MISMATCH, name, f"Размер не совпадает: ИУЛ={e.size_bytes}, IFC={st.st_size}")
+            actual_dt = fmt_mtime(st.st_mtime)
+            if e.dt_str and e.dt_str != actual_dt:
+                self._fail("iul", Status.DT_MISMATCH, name, f"Дата/время не совпадает: ИУЛ={e.dt_str}, IFC={actual_dt}")
+            if a.pdf_name_strict and e.source_pdf and not pdf_name_ok_strict(name, e.source_pdf):
+                self._fail("iul", Status.PDF_NAME_MISMATCH, name, f"Имя PDF не соответствует строгому правилу: {e.source_pdf}")
+        if not scans_before:
+            for f in self.ifc_files:
+                if f.name not in seen:
+                    self._fail("iul", Status.ERROR_IFC_EXTRA, f.name, "Файл есть, но нет записи в ИУЛ с таким именем")
+
+    def crc(self) -> None:
+        a = self.args
+        # Ожидаемые CRC-32 файла: (проверка, источник, значение)
+        expected: Dict[Path, List[Tuple[str, str, str]]] = {}
+        for f in self.ifc_files:
+            want = []
+            meta = self.xml_map.get(f.name) if a.check_xml else None
+            if meta and meta.get("crc_hex"):
+                want.append(("xml", "XML", meta["crc_hex"].upper()))
+            e = self.final_entries.get(f.name)
+            if e is not None and e.crc_hex:
+                want.append(("iul", "ИУЛ", e.crc_hex.upper()))
+            expected[f] = want
+        jobs: List[Tuple[Path, Callable[[Path], int], str]] = [(f, self.ifc_crc, "IFC") for f in self.ifc_files]
+        if a.check_pdf_xml:
+            for p in self.pdfs:
+                meta = self.xml_pdf.get(p.name)
+                expected[p] = [("pdf_xml", "XML", meta["crc_hex"].upper())] if meta and meta.get("crc_hex") else []
+                jobs.append((p, self.pdf_crc, "PDF"))
+        jobs.sort(key=lambda job: job[0].stat().st_size)
+
+        with ThreadPoolExecutor(max_workers=self.sched.io_jobs, thread_name_prefix="gate-crc") as pool:
+            futures = {pool.submit(hasher, path): (path, kind) for path, hasher, kind in jobs}
+            try:
+                for fut in as_completed(futures):
+                    path, kind = futures[fut]
+                    actual = f"{fut.result():08X}"
+                    for check_name, source, want in expected.get(path, ()):
+                        if want != actual:
+                            self._fail(check_name, Status.CRC_MISMATCH, path.name,
+                                       f"CRC-32 не совпадает: {source}={want}, {kind}={actual}")
+            except BaseException:
+                # Хэширование остальных файлов снимается: начатые прерываются между блоками
+                self.stop.cancel()
+                pool.shutdown(wait=True, cancel_futures=True)
+                raise
+
+    def ocr(self) -> None:
+        a = self.args
+        if not (a.check_iul or a.check_consolidated):
+            return
+        # Разобранные по текстовому слою PDF не читаются заново — распознаются только сканы
+        cache = IulEntryCache(shared=self.shared.entries)
+        for p, entries in self.text_entries.items():
+            cache.put(p, entries)
+        extra: List[IulEntry] = []
+
+        def progress(e: IulEntry) -> None:
+            if a.check_iul and not extra and e.basename not in self.ifc_by_name:
+                extra.append(e)
+                self.stop.cancel()
+
+        self.timed_out = set()
+        self.iul_map = extract_iul_entries(
+            self.pdfs,
+            progress,
+            pdf_cache=self.shared.pdf_cache,
+            cancel=self.stop,
+            doc_timeout=a.pdf_timeout,
+            page_timeout=a.page_timeout,
+            workers=self.sched.processes(1),
+            timed_out=self.timed_out,
+            entries_cache=cache,
+            pool=self.shared.pool,
+        )
+        if extra:
+            e = extra[0]
+            self._fail("iul", Status.ERROR_IUL_EXTRA, e.basename, f"Запись в ИУЛ ({e.source_pdf}) есть, файла с таким именем нет")
+
+    def full(self) -> None:
+        a = self.args
+        reports = []
+        if a.check_xml:
+            reports.append(("xml", lambda: iter_report(
+                self.xml_map, self.ifc_files, case_sensitive=True, cancel=self.stop, hasher=self.ifc_crc)))
+        if a.check_pdf_xml:
+            reports.append(("pdf_xml", lambda: iter_report_pdf_xml(
+                self.xml_pdf, self.pdfs, case_sensitive=True, hasher=self.pdf_crc, cancel=self.stop)))
+        if a.check_iul:
+            reports.append(("iul", lambda: iter_report_iul(
+                self.iul_map, self.ifc_files, self.pdfs, strict_pdf_name=bool(a.pdf_name_strict),
+                timed_out_pdfs=self.timed_out, cancel=self.stop, hasher=self.ifc_crc)))
+        if a.check_consolidated:
+            reports.append(("consolidated", lambda: iter_report_consolidated(
+                self.xml_map, self.iul_map, self.ifc_files, case_sensitive=True, hasher=self.ifc_crc, cancel=self.stop)))
+        for check_name, rows in reports:
+            for row in rows():
+                if not row.ok:
+                    self._fail(check_name, row.status, _row_file(row), details_text(row))
+            # Прерванный генератор просто завершается — это не «расхождений нет»
+            check(self.stop)
+
+
+def run_gate(args, sched: Scheduler, cancel: CancelToken, shared: Optional[SharedCaches] = None) -> Verdict:
+    """Проверяет проект ``args`` до первого расхождения; см. описание модуля."""
+    started = time.perf_counter()
+    try:
+        ifc_files, pdfs = collect_inputs(args)
+        _Gate(args, ifc_files, pdfs, sched, cancel, shared or SharedCaches(sched)).run()
+        verdict = Verdict(True)
+    except _Mismatch as m:
+        verdict = m.verdict
+    except InputError as e:
+        verdict = Verdict(False, status=INPUT_ERROR, details=str(e))
+    except OperationCancelled:
+        verdict = Verdict(False, status=CANCELLED)
+    except Exception as e:  # noqa: BLE001 - CI получает вердикт и при сбое
+        logging.exception("Сбой быстрой проверки")
+        verdict = Verdict(False, status=FAILURE, details=str(e))
+    verdict.seconds = time.perf_counter() - started
+    return verdict
@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+"""История запусков в локальной базе SQLite.
+
+Каждый завершённый запуск CLI (``--history``) дописывает в базу строки всех
+отчётов (ключ строки, статус, подробности) и итоги каждого отчёта — те же,
+что на листе итогов (``add_summary_sheet``). По истории без открытия XLSX
+отвечают запросы:
+
+* ``changes`` — что изменилось с запуска N;
+* ``failing`` — файлы, которые не проходят проверку уже N дней подряд;
+* ``throughput`` — длительность и скорость каждого запуска.
+
+Таблицы::
+
+    runs  (id, project, started, finished, files)
+    stats (run_id, report, total, ok, errors)
+    rows  (run_id, report, file, status, details)
+
+Индексы — по проекту, файлу и статусу.
+"""
+from __future__ import annotations
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+import sqlite3
+import threading
+import time
+
+from .run_state import CHANGED, FIXED, NEW_ERROR, row_key
+
+DEFAULT_HISTORY_NAME = ".ifc_crc_history.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    project TEXT NOT NULL,
+    started REAL NOT NULL,
+    finished REAL NOT NULL,
+    files INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS stats (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    report TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    ok INTEGER NOT NULL,
+    errors INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rows (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    report TEXT NOT NULL,
+    file TEXT,
+    status TEXT,
+    details TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_runs_project ON runs (project, id);
+CREATE INDEX IF NOT EXISTS ix_stats_run ON stats (run_id);
+CREATE INDEX IF NOT EXISTS ix_rows_run ON rows (run_id, report, file);
+CREATE INDEX IF NOT EXISTS ix_rows_file ON rows (report, file, run_id);
+CREATE INDEX IF NOT EXISTS ix_rows_status ON rows (status, run_id);
+"""
+
+
+class RunRecorder:
+    """Строки и итоги отчётов одного запуска, собираемые по ходу записи.
+
+    Этапы проверки работают в разных потоках, поэтому добавление строк
+    защищено блокировкой; в базу всё пишется одной транзакцией в конце.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.rows: List[Tuple[str, Optional[str], Optional[str], Optional[str]]] = []
+        self.stats: Dict[str, Mapping[str, int]] = {}
+
+    def record(self, report: str, rows: Iterable[Mapping[str, Any]]) -> Iterator[Mapping[str, Any]]:
+        """Отдаёт ``rows`` без изменений, попутно запоминая их."""
+        for r in rows:
+            with self._lock:
+                self.rows.append((report, row_key(r), r.get("Статус"), r.get("Подробности")))
+            yield r
+
+    def add_stats(self, report: str, stats: Mapping[str, int]) -> None:
+        with self._lock:
+            self.stats[report] = stats
+
+
+class HistoryStore:
+    """База истории запусков."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.con = sqlite3.connect(path)
+        self.con.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self.con.close()
+
+    def __enter__(self) -> "HistoryStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def add_run(self, project: str, started: float, files: int, recorder: RunRecorder, finished: Optional[float] = None) -> int:
+        """Записывает запуск; возвращает его номер."""
+        finished = time.time() if finished is None else finished
+        with self.con:
+            cur = self.con.execute(
+                "INSERT INTO runs (project, started, finished, files) VALUES (?, ?, ?, ?)",
+                (project, started, finished, files),
+            )
+            run_id = cur.lastrowid
+            self.con.executemany(
+                "INSERT INTO stats VALUES (?, ?, ?, ?, ?)",
+                [(run_id, report, s["total"], s["ok"], s["errors"]) for report, s in recorder.stats.items()],
+            )
+            self.con.executemany(
+                "INSERT INTO rows VALUES (?, ?, ?, ?, ?)",
+                ((run_id,) + r for r in recorder.rows),
+            )
+        return run_id
+
+    def last_run(self, project: str) -> Optional[int]:
+        row = self.con.execute("SELECT MAX(id) FROM runs WHERE project = ?", (project,)).fetchone()
+        return row[0]
+
+    def projects(self) -> List[str]:
+        return [r[0] for r in self.con.execute("SELECT DISTINCT project FROM runs ORDER BY project")]
+
+    def changes(self, project: str, since: int, until: Optional[int] = None) -> List[Tuple[str, str, Optional[str], Optional[str], Optional[str]]]:
+        """Что изменилось с запуска ``since`` до ``until`` (по умолчанию — последнего).
+
+        Строки ``(вид, отчёт, файл, статус тогда, статус сейчас)``; виды —
+        как на листе «Изменения»: новые, изменившиеся и исправленные ошибки.
+        """
+        until = self.last_run(project) if until is None else until
+        if until is None:
+            return []
+        # FULL OUTER JOIN двух запусков через UNION двух LEFT JOIN
+        pairs = self.con.execute(
+            """
+            SELECT n.report, n.file, o.status, n.status
+              FROM rows n LEFT JOIN rows o
+                ON o.run_id = :old AND o.report = n.report AND o.file IS n.file
+             WHERE n.run_id = :new
+            UNION ALL
+            SELECT o.report, o.file, o.status, NULL
+              FROM rows o
+             WHERE o.run_id = :old AND NOT EXISTS (
+                   SELECT 1 FROM rows n WHERE n.run_id = :new AND n.report = o.report AND n.file IS o.file)
+            ORDER BY 1, 2
+            """,
+            {"old": since, "new": until},
+        ).fetchall()
+        out = []
+        for report, file, old, new in pairs:
+            if old == new or (new == "OK" and old is None) or (new is None and old == "OK"):
+                continue
+            if new == "OK" or new is None:
+                kind = FIXED
+            elif old is None or old == "OK":
+                kind = NEW_ERROR
+            else:
+                kind = CHANGED
+            out.append((kind, report, file, old, new))
+        return out
+
+    def failing(self, project: str, days: float = 7, now: Optional[float] = None) -> List[Tuple[str, str, Optional[str], float, int]]:
+        """Файлы, которые не проходят проверку не меньше ``days`` дней подряд.
+
+        Строки ``(отчёт, файл, статус в последнем запуске, начало серии,
+        число запусков в серии)``: серия — запуски после последнего OK.
+        """
+        now = time.time() if now is None else now
+        last = self.last_run(project)
+        if last is None:
+            return []
+        return self.con.execute(
+            """
+            WITH cur AS (
+                SELECT report, file, status FROM rows
+                 WHERE run_id = :last AND status != 'OK' AND file IS NOT NULL
+            ),
+            last_ok AS (
+                SELECT c.report, c.file, (
+                    SELECT MAX(r.run_id) FROM rows r JOIN runs u ON u.id = r.run_id
+                     WHERE u.project = :project AND r.report = c.report AND r.file = c.file AND r.status = 'OK'
+                ) AS ok_run
+                FROM cur c
+            ),
+            streak AS (
+                SELECT l.report, l.file, MIN(u.started) AS since, COUNT(*) AS runs
+                  FROM last_ok l
+                  JOIN rows r ON r.report = l.report AND r.file = l.file AND r.run_id > IFNULL(l.ok_run, 0)
+                  JOIN runs u ON u.id = r.run_id AND u.project = :project
+                 GROUP BY l.report, l.file
+            )
+            SELECT s.report, s.file, c.status, s.since, s.runs
+              FROM streak s JOIN cur c ON c.report = s.report AND c.file = s.file
+             WHERE s.since <= :cutoff
+             ORDER BY s.since, s.report, s.file
+            """,
+            {"last": last, "project": project, "cutoff": now - days * 86400},
+        ).fetchall()
+
+    def throughput(self, project: str, limit: int = 20) -> List[Tuple[int, float, float, int, int, int]]:
+        """Последние запуски: ``(номер, начало, длительность с, файлов, строк, ошибок)``."""
+        return self.con.execute(
+            """
+            SELECT u.id, u.started, u.finished - u.started, u.files,
+                   IFNULL(SUM(s.total), 0), IFNULL(SUM(s.errors), 0)
+              FROM runs u LEFT JOIN stats s ON s.run_id = u.id
+             WHERE u.project = ?
+             GROUP BY u.id
+             ORDER BY u.id DESC
+             LIMIT ?
+            """,
+            (project, limit),
+        ).fetchall()
@@ -2,33 +2,78 @@
 from __future__ import annotations
 from dataclasses import dataclass
 from io import BytesIO
+from functools import partial
 from pathlib import Path
-from typing import List, Dict, Optional, Callable
+from typing import TYPE_CHECKING, Any, Iterator, List, Dict, Optional, Callable, Set, Tuple, Union
+import importlib
+import logging
 import os
 import re
 import sys
 
-try:
-    from PyPDF2 import PdfReader  # type: ignore
-except Exception:
-    PdfReader = None
+from .cancel import CancelToken, OperationCancelled, TimeBudgetExceeded, check
+from .crc_index import CONFUSABLE_GROUPS
+from .pdf_loader import PdfCache, PdfDocument, load_pdf, open_document
+
+if TYPE_CHECKING:
+    from .workers import TimedProcessPool
+
+# Тяжёлые необязательные зависимости импортируются при первом обращении
+# (``_optional`` или атрибут модуля, например ``iul_reader.fitz``): проверка
+# без ИУЛ не тратит на них время запуска. Отсутствующая зависимость — None.
+_LAZY: Dict[str, Tuple[str, Optional[str]]] = {
+    "PdfReader": ("PyPDF2", "PdfReader"),
+    "fitz": ("fitz", None),  # PyMuPDF
+    "pytesseract": ("pytesseract", None),
+    "Image": ("PIL.Image", None),
+}
+_loaded: Dict[str, Any] = {}
+
+
+def _optional(name: str) -> Any:
+    if name not in _loaded:
+        module, attr = _LAZY[name]
+        try:
+            value = importlib.import_module(module)
+            if attr is not None:
+                value = getattr(value, attr)
+        except Exception:
+            value = None
+        if name == "pytesseract" and value is not None:
+            # Встроенный Tesseract ищется только перед первым OCR
+            _configure_embedded_tesseract(value)
+        _loaded[name] = value
+    return _loaded[name]
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY:
+        return _optional(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-try:
-    import fitz  # PyMuPDF  # type: ignore
-except Exception:
-    fitz = None
-
-try:
-    import pytesseract  # type: ignore
-    from PIL import Image  # type: ignore
-except Exception:
-    pytesseract = None
-    Image = None
 
 CRC_RE = re.compile(r"CRC[-\s_]*32\s*([0-9A-Fa-f]{8})")
+# В распознанном тексте помимо hex-цифр допускаются буквы, которыми OCR
+# подменяет цифры (O, I, S...), в любом регистре: такие значения исправляются
+# при сверке по индексу фактических CRC (crc_index). У текстового слоя таких
+# подмен нет — там действует строгий CRC_RE.
+_OCR_CRC_CHARS = "".join(sorted(set("0123456789ABCDEF" + "".join(CONFUSABLE_GROUPS))))
+OCR_CRC_RE = re.compile(r"CRC[-\s_]*32\s*((?i:[%s]){8})" % _OCR_CRC_CHARS)
 IFC_RE = re.compile(r"([\w\-. ]+?\.ifc)", re.IGNORECASE)
 DT_RE = re.compile(r"(\d{2}\.\d{2}\.\d{4}\s+\d{2}:\d{2})")
 SIZE_RE = re.compile(r"Размер\s+файла\D*(\d+)", re.IGNORECASE)
+# Строка с IFC разбирается за один вызов: дата/время и «Размер файла» ищутся
+# опережающими проверками по всей строке (как DT_RE/SIZE_RE.search), имя — как
+# IFC_RE.search, а «last» — последнее число после имени (запасной размер).
+# Самое левое совпадение IFC_RE всегда начинается в начале серии допустимых
+# символов, поэтому условие (?<![\w\-. ]) не меняет результат, но избавляет
+# от повторного просмотра серии с каждой позиции.
+ENTRY_LINE_RE = re.compile(
+    r"(?=(?:.*?(?P<dt>\d{2}\.\d{2}\.\d{4}\s+\d{2}:\d{2}))?)"
+    r"(?=(?:.*?(?i:Размер\s+файла)\D*(?P<size>\d+))?)"
+    r".*?(?<![\w\-. ])(?P<ifc>(?i:[\w\-. ]+?\.ifc))"
+    r"(?:.*(?<!\d)(?P<last>\d+))?"
+)
 # Обособленное вхождение "УЛ" или "ИУЛ" (\s, _)
 IUL_KEYWORD_RE = re.compile(r"(^|[\s_])(ИУЛ|УЛ)([\s_]|$)")
 
@@ -52,10 +97,7 @@ def _find_embedded_tesseract_dir() -> Optional[Path]:
     return None
 
 
-def _configure_embedded_tesseract() -> None:
-    if pytesseract is None:
-        return
-
+def _configure_embedded_tesseract(pytesseract: Any) -> None:
     current_cmd = str(getattr(pytesseract, "tesseract_cmd", "")).strip()
     if current_cmd and Path(current_cmd).exists():
         return
@@ -76,40 +118,128 @@ def _configure_embedded_tesseract() -> None:
         os.environ.setdefault("TESSDATA_PREFIX", str(directory))
 
 
-@dataclass
+# Записей ИУЛ в крупных проектах десятки тысяч: без __dict__ они заметно компактнее
+_DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(**_DATACLASS_SLOTS)
 class IulEntry:
     basename: str
     crc_hex: Optional[str]
     dt_str: Optional[str]
     size_bytes: Optional[int]
-    context: str
+    context: Optional[str]  # исходная строка; парсеры её не сохраняют
     source_pdf: str
+    ocr: bool = False  # запись получена распознаванием скана
+
+PdfSource = Union[Path, PdfDocument]
 
-def _extract_text_pypdf2(pdf_path: Path) -> str:
+
+class IulEntryCache:
+    """Записи ИУЛ, уже извлечённые из PDF, с размером и mtime документа.
+
+    Позволяет не разбирать (и не распознавать OCR) неизменившиеся PDF
+    повторно — например, между запусками (``run_state``). ``known`` — в том
+    же виде, что отдаёт ``items()``; ``record`` вызывается для каждого
+    добавленного PDF (например, ``Journal.recorder``). ``shared`` — общий
+    кэш нескольких проектов (``--batch``): из него берутся записи, которых
+    нет в этом кэше, и в него же попадают новые.
+    """
+
+    def __init__(
+        self,
+        known: Optional[Dict[str, Tuple[Tuple[int, int], List[IulEntry]]]] = None,
+        record: Optional[Callable[[str, Tuple[int, int], List[IulEntry]], None]] = None,
+        shared: Optional["IulEntryCache"] = None,
+    ):
+        self._entries: Dict[str, Tuple[Tuple[int, int], List[IulEntry]]] = dict(known or {})
+        self._record = record
+        self._shared = shared
+
+    @staticmethod
+    def _ident(path: Path) -> Tuple[int, int]:
+        st = path.stat()
+        return st.st_size, st.st_mtime_ns
+
+    def get(self, path: Path) -> Optional[List[IulEntry]]:
+        cached = self._entries.get(str(path))
+        try:
+            if cached is not None and cached[0] == self._ident(path):
+                return cached[1]
+        except OSError:
+            pass
+        if self._shared is not None:
+            entries = self._shared.get(path)
+            if entries is not None:
+                self.put(path, entries)
+                return entries
+        return None
+
+    def put(self, path: Path, entries: List[IulEntry]) -> None:
+        try:
+            ident = self._ident(path)
+        except OSError:
+            return
+        self._entries[str(path)] = (ident, entries)
+        if self._record is not None:
+            self._record(str(path), ident, entries)
+        if self._shared is not None:
+            self._shared.put(path, entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def items(self) -> Iterator[Tuple[str, Tuple[Tuple[int, int], List[IulEntry]]]]:
+        return iter(self._entries.items())
+
+
+def _extract_text_pypdf2(source: PdfSource, *, cancel: Optional[CancelToken] = None) -> str:
+    PdfReader = _optional("PdfReader")
     if PdfReader is None:
         return ""
     try:
-        reader = PdfReader(str(pdf_path))
+        if isinstance(source, PdfDocument):
+            reader = PdfReader(source.stream())
+        else:
+            reader = PdfReader(str(source))
         parts = []
         for p in reader.pages:
+            check(cancel)
             try:
                 parts.append(p.extract_text() or "")
             except Exception:
                 parts.append("")
         return "\n".join(parts)
+    except OperationCancelled:
+        raise
     except Exception:
         return ""
 
-def _extract_text_ocr(pdf_path: Path, dpi: int = 300) -> str:
+def _extract_text_ocr(
+    source: PdfSource,
+    dpi: int = 300,
+    *,
+    cancel: Optional[CancelToken] = None,
+    page_timeout: Optional[float] = None,
+    skipped: Optional[List[int]] = None,
+) -> str:
+    """OCR всех страниц. ``page_timeout`` ограничивает распознавание одной
+    страницы: процесс tesseract снимается, страница пропускается, а её номер
+    добавляется в ``skipped``."""
+    fitz, pytesseract, Image = _optional("fitz"), _optional("pytesseract"), _optional("Image")
     if fitz is None or pytesseract is None or Image is None:
         return ""
     try:
-        doc = fitz.open(str(pdf_path))
+        if isinstance(source, PdfDocument):
+            doc = fitz.open(stream=source.data, filetype="pdf")
+        else:
+            doc = fitz.open(str(source))
     except Exception:
         return ""
     text_parts: List[str] = []
     try:
-        for page in doc:
+        for n, page in enumerate(doc):
+            check(cancel)
             try:
                 mat = fitz.Matrix(dpi / 72, dpi / 72)
                 pix = page.get_pixmap(matrix=mat, alpha=False)
@@ -119,19 +249,48 @@ def _extract_text_ocr(pdf_path: Path, dpi: int = 300) -> str:
                     gray = img.convert("L")  # grayscale for better OCR
                     txt = ""
                     try:
-                        txt = pytesseract.image_to_string(gray, lang="rus+eng")
+                        txt = pytesseract.image_to_string(
+                            gray, lang="rus+eng", timeout=page_timeout or 0
+                        )
                     finally:
                         gray.close()
                 finally:
                     img.close()
                 if txt.strip():
                     text_parts.append(txt)
+            except OperationCancelled:
+                raise
             except Exception:
+                if skipped is not None:
+                    skipped.append(n)
                 continue
     finally:
         doc.close()
     return "\n".join(text_parts)
 
+def _extract_words(source: PdfSource) -> List[List[tuple]]:
+    """Слова текстового слоя с координатами: по списку на страницу."""
+    fitz = _optional("fitz")
+    if fitz is None:
+        return []
+    try:
+        if isinstance(source, PdfDocument):
+            doc = fitz.open(stream=source.data, filetype="pdf")
+        else:
+            doc = fitz.open(str(source))
+    except Exception:
+        return []
+    pages: List[List[tuple]] = []
+    try:
+        for page in doc:
+            try:
+                pages.append(page.get_text("words"))
+            except Exception:
+                continue
+    finally:
+        doc.close()
+    return pages
+
 def _normalize_text(txt: str) -> str:
     txt = txt.replace("\r", "\n")
     return "\n".join(ln.strip() for ln in txt.splitlines())
@@ -152,16 +311,22 @@ def extract_pdf_text_debug(
     """
 
     results: Dict[str, Dict[str, str]] = {}
+    source: Optional[PdfSource]
+    try:
+        source = open_document(pdf_path)
+    except OSError:
+        # Нечитаемый файл — пустые тексты, как и при сбое извлечения
+        source = None
 
     if include_pypdf2:
-        raw_pypdf2 = _extract_text_pypdf2(pdf_path)
+        raw_pypdf2 = _extract_text_pypdf2(source) if source is not None else ""
         results["pypdf2"] = {
             "raw": raw_pypdf2,
             "normalized": _normalize_text(raw_pypdf2),
         }
 
     if include_ocr:
-        raw_ocr = _extract_text_ocr(pdf_path, dpi=dpi)
+        raw_ocr = _extract_text_ocr(source, dpi=dpi) if source is not None else ""
         results["ocr"] = {
             "raw": raw_ocr,
             "normalized": _normalize_text(raw_ocr),
@@ -170,40 +335,38 @@ def extract_pdf_text_debug(
     return results
 
 
-def _parse_entries(text: str, pdf_name: str, progress: Optional[Callable[[IulEntry], None]] = None) -> List[IulEntry]:
-    lines = [ln for ln in text.splitlines() if ln]
+def _parse_entries(
+    text: str,
+    pdf_name: str,
+    progress: Optional[Callable[[IulEntry], None]] = None,
+    ocr: bool = False,
+) -> List[IulEntry]:
     entries: List[IulEntry] = []
     last_crc: Optional[str] = None
-    for ln in lines:
-        m_crc = CRC_RE.search(ln)
-        if m_crc:
-            last_crc = m_crc.group(1).upper()
+    scan = ENTRY_LINE_RE.match
+    crc_re = OCR_CRC_RE if ocr else CRC_RE
+    for ln in text.splitlines():
+        if not ln:
+            continue
+        if "CRC" in ln:
+            m_crc = crc_re.search(ln)
+            if m_crc:
+                last_crc = m_crc.group(1).upper()
 
         if ".ifc" in ln or ".IFC" in ln:
-            m_ifc = IFC_RE.search(ln)
-            if not m_ifc:
+            m = scan(ln)
+            if not m:
                 continue
-            fname = Path(m_ifc.group(1)).name
-            m_dt = DT_RE.search(ln)
-            dt = m_dt.group(1) if m_dt else None
-            size = None
-
-            m_size = SIZE_RE.search(ln)
-            if m_size:
-                size = int(m_size.group(1))
-            else:
-                tail = ln[m_ifc.end():]
-                ints = [int(x) for x in re.findall(r"\d+", tail)]
-                if ints:
-                    size = ints[-1]
-
+            size_s = m.group("size") or m.group("last")
             entry = IulEntry(
-                basename=fname,
+                # в имени нет разделителей пути, так что Path(...).name не нужен
+                basename=m.group("ifc"),
                 crc_hex=(last_crc or None),
-                dt_str=dt,
-                size_bytes=size,
-                context=ln,
+                dt_str=m.group("dt"),
+                size_bytes=int(size_s) if size_s is not None else None,
+                context=None,
                 source_pdf=pdf_name,
+                ocr=ocr,
             )
             entries.append(entry)
             if progress:
@@ -214,23 +377,181 @@ def _parse_entries(text: str, pdf_name: str, progress: Optional[Callable[[IulEnt
     return entries
 
 
-def extract_iul_entries_from_pdf(pdf_path: Path, progress: Optional[Callable[[IulEntry], None]] = None) -> List[IulEntry]:
-    text = _extract_text_pypdf2(pdf_path)
+def _completeness(entries: List[IulEntry]) -> int:
+    return sum(
+        bool(e.crc_hex) + bool(e.dt_str) + (e.size_bytes is not None)
+        for e in entries
+    )
+
+
+def ocr_available() -> bool:
+    """Установлены ли PyMuPDF, pytesseract и Pillow, нужные для OCR."""
+    return all(_optional(n) is not None for n in ("fitz", "pytesseract", "Image"))
+
+
+def _document_entries(
+    source: PdfSource,
+    *,
+    cancel: Optional[CancelToken] = None,
+    page_timeout: Optional[float] = None,
+    ocr: bool = True,
+) -> Tuple[List[IulEntry], bool]:
+    """Записи документа и признак окончательного разбора.
+
+    Разбор не окончательный, если скан не распознавался (``ocr=False`` или
+    OCR недоступен) либо часть страниц пропущена по ``page_timeout``: такие
+    записи нельзя кэшировать между запусками.
+    """
+    doc = source if isinstance(source, PdfDocument) else load_pdf(source)
+    name = doc.name
+    text = _extract_text_pypdf2(doc, cancel=cancel)
     text = _normalize_text(text)
-    entries = _parse_entries(text, pdf_path.name, progress)
-    if not entries:
-        text_ocr = _extract_text_ocr(pdf_path)
-        text_ocr = _normalize_text(text_ocr)
-        entries = _parse_entries(text_ocr, pdf_path.name, progress)
+    entries = _parse_entries(text, name)
+    if not entries or not all(e.dt_str and e.size_bytes is not None for e in entries):
+        # Перенесённые имена и переставленные столбцы: восстанавливаем таблицу
+        # по координатам слов, прежде чем уходить в медленный OCR.
+        from .iul_table import parse_word_table
+        check(cancel)
+        table = parse_word_table(_extract_words(doc), name)
+        if _completeness(table) > _completeness(entries):
+            entries = table
+    if entries:
+        return entries, True
+    if not ocr:
+        return entries, False
+    skipped: List[int] = []
+    text_ocr = _extract_text_ocr(doc, cancel=cancel, page_timeout=page_timeout, skipped=skipped)
+    text_ocr = _normalize_text(text_ocr)
+    entries = _parse_entries(text_ocr, name, ocr=True)
+    return entries, ocr_available() and not skipped
+
+
+def _indexed_entries(item: Tuple[int, PdfSource], **kwargs: Any) -> Tuple[List[IulEntry], bool]:
+    """``_document_entries`` для пула процессов: элемент — ``(номер PDF, источник)``."""
+    return _document_entries(item[1], **kwargs)
+
+
+def _notify(progress: Optional[Callable[[IulEntry], None]], entries: List[IulEntry]) -> None:
+    if not progress:
+        return
+    for e in entries:
+        try:
+            progress(e)
+        except Exception:
+            pass
+
+
+def _pdf_entries(
+    pdf_path: Path,
+    *,
+    pdf_cache: Optional[PdfCache] = None,
+    cancel: Optional[CancelToken] = None,
+    page_timeout: Optional[float] = None,
+    ocr: bool = True,
+) -> Tuple[List[IulEntry], bool]:
+    # Файл читается один раз: и PyPDF2, и OCR работают с одним буфером,
+    # а при общем ``pdf_cache`` его же использует проверка PDF↔XML.
+    try:
+        doc = open_document(pdf_path, pdf_cache)
+    except OSError:
+        return [], True
+    return _document_entries(doc, cancel=cancel, page_timeout=page_timeout, ocr=ocr)
+
+
+def extract_iul_entries_from_pdf(
+    pdf_path: Path,
+    progress: Optional[Callable[[IulEntry], None]] = None,
+    *,
+    pdf_cache: Optional[PdfCache] = None,
+    cancel: Optional[CancelToken] = None,
+    page_timeout: Optional[float] = None,
+    ocr: bool = True,
+) -> List[IulEntry]:
+    entries, _ = _pdf_entries(pdf_path, pdf_cache=pdf_cache, cancel=cancel, page_timeout=page_timeout, ocr=ocr)
+    _notify(progress, entries)
     return entries
 
 def extract_iul_entries(
     paths: List[Path],
     progress: Optional[Callable[[IulEntry], None]] = None,
+    *,
+    pdf_cache: Optional[PdfCache] = None,
+    cancel: Optional[CancelToken] = None,
+    doc_timeout: Optional[float] = None,
+    page_timeout: Optional[float] = None,
+    workers: int = 1,
+    timed_out: Optional[Set[str]] = None,
+    entries_cache: Optional[IulEntryCache] = None,
+    pool: Optional["TimedProcessPool"] = None,
+    ocr: bool = True,
 ) -> Dict[str, IulEntry]:
+    """Извлекает записи из всех PDF; при совпадении имён побеждает первый PDF.
+
+    Если задан ``doc_timeout`` или ``workers > 1``, документы разбираются в
+    рабочих процессах: документ, не уложившийся в ``doc_timeout`` секунд,
+    снимается, а его имя добавляется в ``timed_out``. При отмене ``cancel``
+    разбор останавливается и возвращаются записи уже разобранных PDF
+    (вызывающий проверяет ``cancel.cancelled``). PDF, записи которых уже
+    есть в ``entries_cache``, не разбираются; в кэш попадают только
+    окончательные разборы (см. ``_document_entries``). ``pool`` — готовый пул
+    процессов (например, постоянный пул службы проверок) вместо нового на
+    каждый вызов; число процессов тогда берётся из него. С ``ocr=False``
+    сканы без текстового слоя не распознаются (и не дают записей).
+    """
+    per_pdf: List[List[IulEntry]] = [[] for _ in paths]
+    pending: List[int] = []
+    for i, p in enumerate(paths):
+        cached = entries_cache.get(p) if entries_cache is not None else None
+        if cached is None:
+            pending.append(i)
+        else:
+            per_pdf[i] = cached
+            _notify(progress, cached)
+    if pool is not None:
+        workers = pool.workers
+    parsed = 0
+    try:
+        if doc_timeout is None and workers <= 1:
+            for i in pending:
+                check(cancel)
+                per_pdf[i], final = _pdf_entries(
+                    paths[i], pdf_cache=pdf_cache,
+                    cancel=cancel, page_timeout=page_timeout, ocr=ocr,
+                )
+                if entries_cache is not None and final:
+                    entries_cache.put(paths[i], per_pdf[i])
+                _notify(progress, per_pdf[i])
+                parsed += 1
+        elif pending:
+            from .workers import TimedProcessPool
+
+            # Задача несёт номер PDF: у PDF из разных папок имена могут совпадать.
+            # Уже прочитанные в кэш PDF передаются в процесс из памяти
+            sources = [(i, (pdf_cache.peek(paths[i]) if pdf_cache else None) or paths[i]) for i in pending]
+            task = partial(_indexed_entries, page_timeout=page_timeout, ocr=ocr)
+            for (i, _), ok, result in (pool or TimedProcessPool(workers)).run(task, sources, doc_timeout, cancel):
+                name = paths[i].name
+                if ok:
+                    per_pdf[i], final = result
+                    if entries_cache is not None and final:
+                        entries_cache.put(paths[i], per_pdf[i])
+                    _notify(progress, per_pdf[i])
+                    parsed += 1
+                elif isinstance(result, TimeBudgetExceeded):
+                    logging.warning("Разбор PDF прерван по лимиту времени: %s", name)
+                    if timed_out is not None:
+                        timed_out.add(name)
+                elif not isinstance(result, OSError):
+                    logging.warning("Не удалось разобрать PDF %s: %s", name, result)
+    except OperationCancelled:
+        if cancel is None or not cancel.cancelled:
+            raise
+        # Прерывание пользователем: разобранное сохраняется (частичный отчёт)
+        logging.warning("Разбор ИУЛ прерван: разобрано PDF %s из %s", len(paths) - len(pending) + parsed, len(paths))
+
     res: Dict[str, IulEntry] = {}
-    for p in paths:
-        for e in extract_iul_entries_from_pdf(p, progress=progress):
+    for entries in per_pdf:
+        for e in entries:
             key = e.basename
             if key not in res:
                 res[key] = e
@@ -248,6 +569,3 @@ def pdf_name_ok_strict(ifc_name: str, pdf_name: str) -> bool:
     stem = Path(pdf_name).stem.upper()
     return (ifc_stem in stem) and stem.endswith("_УЛ")
 
-
-if pytesseract is not None:
-    _configure_embedded_tesseract()
@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+"""Разбор таблицы ИУЛ по координатам слов текстового слоя (PyMuPDF).
+
+Построчный разбор (``iul_reader._parse_entries``) требует, чтобы имя IFC,
+дата и размер стояли в одной строке текста. Если длинное имя переносится
+внутри ячейки или столбцы идут в другом порядке, строки таблицы
+восстанавливаются здесь по положению слов (``page.get_text("words")``):
+ячейка имени собирается из фрагментов, выровненных по левому краю, а дата,
+время, размер и CRC-32 берутся из слов на той же высоте строки.
+"""
+from __future__ import annotations
+from typing import Callable, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+import re
+
+from .iul_reader import CRC_RE, IulEntry
+
+DATE_W_RE = re.compile(r"^\d{2}\.\d{2}\.\d{4}$")
+TIME_W_RE = re.compile(r"^\d{2}:\d{2}$")
+INT_W_RE = re.compile(r"^\d+$")
+HEX_W_RE = re.compile(r"^[0-9A-Fa-f]{8}$")
+IFC_END_RE = re.compile(r"\.ifc[,;]?$", re.IGNORECASE)
+# Заголовки столбцов, которые нельзя принимать за перенос имени файла
+HEADER_RE = re.compile(r"^(имя|наименование|обозначение|файл|file)", re.IGNORECASE)
+
+
+class Word(NamedTuple):
+    x0: float
+    y0: float
+    x1: float
+    y1: float
+    text: str
+
+    @property
+    def h(self) -> float:
+        return self.y1 - self.y0
+
+    @property
+    def yc(self) -> float:
+        return (self.y0 + self.y1) / 2
+
+
+class _Row:
+    __slots__ = ("parts", "cell", "top", "bottom", "label_crc", "others")
+
+    def __init__(self, parts: List[List[Word]], label_crc: Optional[str]):
+        self.parts = parts
+        self.cell = [w for frag in parts for w in frag]
+        cell = self.cell
+        self.top = min(w.y0 for w in cell)
+        self.bottom = max(w.y1 for w in cell)
+        self.label_crc = label_crc
+        self.others: List[Word] = []
+
+
+def _group_lines(words: Iterable[Word]) -> List[List[Word]]:
+    lines: List[List[Word]] = []
+    for w in sorted(words, key=lambda w: (w.yc, w.x0)):
+        if lines:
+            last = lines[-1]
+            ref = last[0]
+            if abs(w.yc - ref.yc) <= 0.5 * min(w.h, ref.h):
+                last.append(w)
+                continue
+        lines.append([w])
+    for ln in lines:
+        ln.sort(key=lambda w: w.x0)
+    return lines
+
+
+def _join_fragments(fragments: Sequence[str]) -> str:
+    # Перенос после "_", "-" или "." чаще всего разрывает имя без пробела
+    out = fragments[0]
+    for frag in fragments[1:]:
+        if out.endswith(("_", "-", ".")) or frag.startswith(("_", "-", ".")):
+            out += frag
+        else:
+            out += " " + frag
+    return out
+
+
+def _is_value(text: str) -> bool:
+    return bool(DATE_W_RE.match(text) or TIME_W_RE.match(text))
+
+
+def _name_cell(lines: List[List[Word]], li: int, wi: int, taken: set) -> List[List[Word]]:
+    """Собирает ячейку имени, заканчивающуюся словом ``lines[li][wi]``."""
+    line = lines[li]
+    end = line[wi]
+    tol = end.h
+    start = wi
+    while start > 0:
+        prev = line[start - 1]
+        if (line[start].x0 - prev.x1) > tol or _is_value(prev.text) or id(prev) in taken:
+            break
+        start -= 1
+    parts = [line[start:wi + 1]]
+    left = line[start].x0
+    top = min(w.y0 for w in parts[0])
+
+    # Фрагменты переноса выше: начинаются у того же левого края ячейки
+    for up in range(li - 1, -1, -1):
+        upper = lines[up]
+        if top - max(w.y1 for w in upper) > 0.5 * tol:
+            break
+        idx = next((i for i, w in enumerate(upper) if abs(w.x0 - left) <= tol), None)
+        if idx is None:
+            break
+        frag = [upper[idx]]
+        for w in upper[idx + 1:]:
+            if (w.x0 - frag[-1].x1) > tol or _is_value(w.text):
+                break
+            frag.append(w)
+        text = " ".join(w.text for w in frag)
+        if (
+            any(id(w) in taken for w in frag)
+            or IFC_END_RE.search(frag[-1].text)
+            or CRC_RE.search(text)
+            or HEADER_RE.match(text)
+        ):
+            break
+        parts.insert(0, frag)
+        top = min(w.y0 for w in frag)
+    return parts
+
+
+def _pick_size(words: List[Word], exclude: set) -> Optional[int]:
+    groups: List[List[Word]] = []
+    for w in sorted(words, key=lambda w: (w.yc, w.x0)):
+        if id(w) in exclude or not INT_W_RE.match(w.text):
+            continue
+        if groups:
+            last = groups[-1][-1]
+            if abs(w.yc - last.yc) <= 0.5 * w.h and 0 <= w.x0 - last.x1 <= 0.5 * w.h:
+                groups[-1].append(w)  # разделитель разрядов: "1 234 567"
+                continue
+        groups.append([w])
+    if not groups:
+        return None
+    # Номер п/п тоже число, но размер файла заведомо больше него
+    return max(int("".join(w.text for w in g)) for g in groups)
+
+
+def _in_group(w: Word, words: List[Word]) -> bool:
+    """Входит ли число ``w`` в размер с разделителем разрядов («12 345 678»)."""
+    for o in words:
+        if o is w or not INT_W_RE.match(o.text) or abs(o.yc - w.yc) > 0.5 * w.h:
+            continue
+        if 0 <= o.x0 - w.x1 <= 0.5 * w.h or 0 <= w.x0 - o.x1 <= 0.5 * w.h:
+            return True
+    return False
+
+
+def _crc_candidates(words: List[Word]) -> List[Word]:
+    return [w for w in words if HEX_W_RE.match(w.text) and not (INT_W_RE.match(w.text) and _in_group(w, words))]
+
+
+def _pick_crc(words: List[Word], columns: List[Tuple[float, float]], labelled: bool) -> Optional[Word]:
+    """Ячейка CRC-32 строки.
+
+    Восемь hex-цифр с буквой — точно CRC. CRC из одних цифр (около 2%
+    значений) не отличить от размера по виду, поэтому он берётся по
+    столбцу: под ячейками CRC с буквами (``columns``) в этом документе.
+    Если столбец неизвестен, единственное такое число считается CRC, только
+    когда в документе нет CRC-32 с подписью (иначе это размер).
+    """
+    candidates = _crc_candidates(words)
+    crc_w = next((w for w in candidates if not INT_W_RE.match(w.text)), None)
+    if crc_w is not None:
+        return crc_w
+    if columns:
+        return next((w for w in candidates if any(w.x0 < x1 and x0 < w.x1 for x0, x1 in columns)), None)
+    if not labelled and len(candidates) == 1:
+        return candidates[0]
+    return None
+
+
+def parse_word_table(
+    pages: Iterable[Sequence[Tuple]],
+    pdf_name: str,
+    progress: Optional[Callable[[IulEntry], None]] = None,
+) -> List[IulEntry]:
+    """Строит записи ИУЛ по словам страниц в формате ``page.get_text("words")``.
+
+    Каждое слово — кортеж ``(x0, y0, x1, y1, text, ...)``.
+    """
+    entries: List[IulEntry] = []
+    last_crc: Optional[str] = None
+    # Положение столбца CRC-32: ячейки с hex-буквами
+    crc_columns: List[Tuple[float, float]] = []
+    for raw_words in pages:
+        words = [Word(float(w[0]), float(w[1]), float(w[2]), float(w[3]), str(w[4])) for w in raw_words if str(w[4]).strip()]
+        if not words:
+            continue
+        lines = _group_lines(words)
+        taken: set = set()
+        label_words: set = set()
+        rows: List[_Row] = []
+        for li, line in enumerate(lines):
+            m_crc = CRC_RE.search(" ".join(w.text for w in line))
+            if m_crc:
+                last_crc = m_crc.group(1).upper()
+                if not any(IFC_END_RE.search(w.text) for w in line):
+                    label_words.update(id(w) for w in line)
+                    taken.update(id(w) for w in line)
+                    continue
+            for wi, w in enumerate(line):
+                if id(w) in taken or not IFC_END_RE.search(w.text):
+                    continue
+                row = _Row(_name_cell(lines, li, wi, taken), last_crc)
+                taken.update(id(x) for x in row.cell)
+                rows.append(row)
+        if not rows:
+            continue
+
+        # Остальные слова относим к ближайшей по высоте строке таблицы
+        for w in words:
+            if id(w) in taken or id(w) in label_words:
+                continue
+            best: Optional[_Row] = None
+            best_dist = 0.0
+            for row in rows:
+                tol = 0.6 * w.h
+                if row.top - tol <= w.yc <= row.bottom + tol:
+                    dist = abs(w.yc - (row.top + row.bottom) / 2)
+                    if best is None or dist < best_dist:
+                        best, best_dist = row, dist
+            if best is not None:
+                best.others.append(w)
+
+        for row in rows:
+            crc_columns.extend(
+                (w.x0, w.x1) for w in _crc_candidates(row.others) if not INT_W_RE.match(w.text)
+            )
+        for row in rows:
+            others = sorted(row.others, key=lambda w: (w.yc, w.x0))
+            date = next((w for w in others if DATE_W_RE.match(w.text)), None)
+            time_w = next((w for w in others if TIME_W_RE.match(w.text)), None)
+            dt = f"{date.text} {time_w.text}" if (date and time_w) else None
+            crc_w = _pick_crc(others, crc_columns, last_crc is not None)
+            crc = crc_w.text.upper() if crc_w else row.label_crc
+            exclude = {id(w) for w in (date, time_w, crc_w) if w is not None}
+            size = _pick_size(others, exclude)
+            name = _join_fragments([" ".join(w.text for w in frag) for frag in row.parts])
+            name = name.rstrip(",;")
+            entry = IulEntry(
+                basename=name,
+                crc_hex=crc,
+                dt_str=dt,
+                size_bytes=size,
+                context=None,
+                source_pdf=pdf_name,
+            )
+            entries.append(entry)
+            if progress:
+                try:
+                    progress(entry)
+                except Exception:
+                    pass
+    return entries
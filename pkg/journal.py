@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""Журнал выполненной работы для продолжения прерванного запуска (``--resume``).
+
+Полная проверка большого каталога идёт часами, а отчёты пишутся только в
+конце. Чтобы сбой, перезагрузка или обрыв сети не обнуляли работу, каждый
+посчитанный CRC-32 и каждый разобранный PDF с ИУЛ дописывается в журнал —
+файл JSON Lines, одна запись на строку::
+
+    {"t": "journal", "version": 1}
+    {"t": "crc", "kind": "ifc", "path": "...", "size": 1, "mtime": 2, "crc": 3}
+    {"t": "iul", "path": "...", "size": 1, "mtime": 2, "entries": [...]}
+
+Журнал только дописывается; ``fsync`` выполняется пачками (каждые
+``batch`` записей или ``interval`` секунд), так что при сбое теряется не
+больше одной пачки. Оборванная последняя строка при чтении пропускается,
+а при продолжении (``--resume``) отрезается перед дозаписью.
+
+Записи журнала сверяются с размером и mtime файла при повторном
+использовании (``CrcCache``, ``IulEntryCache``): изменившийся файл
+обрабатывается заново. После успешного запуска журнал удаляется.
+"""
+from __future__ import annotations
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+import json
+import logging
+import os
+import threading
+import time
+
+from .iul_reader import IulEntry
+
+JOURNAL_VERSION = 1
+DEFAULT_JOURNAL_NAME = ".ifc_crc_journal.jsonl"
+
+Ident = Tuple[int, int]
+
+
+def _drop_torn_tail(path: Path) -> int:
+    """Отрезает оборванную при сбое последнюю строку, чтобы следующая запись
+    не склеилась с ней. Возвращает новый размер файла."""
+    with path.open("rb+") as f:
+        size = f.seek(0, os.SEEK_END)
+        pos = size
+        while pos > 0:
+            step = min(pos, 4096)
+            f.seek(pos - step)
+            chunk = f.read(step)
+            if pos == size and chunk.endswith(b"\n"):
+                return size
+            nl = chunk.rfind(b"\n")
+            if nl >= 0:
+                pos = pos - step + nl + 1
+                break
+            pos -= step
+        f.truncate(pos)
+        return pos
+
+
+class Journal:
+    """Журнал, открытый на дозапись. Потокобезопасен: записи приходят из
+    этапов конвейера, работающих одновременно."""
+
+    def __init__(self, path: Path, batch: int = 64, interval: float = 1.0):
+        self.path = path
+        self.batch = batch
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._unsynced = 0
+        self._synced_at = time.monotonic()
+        new = not path.exists() or _drop_torn_tail(path) == 0
+        self._f = path.open("a", encoding="utf-8")
+        if new:
+            self._write({"t": "journal", "version": JOURNAL_VERSION})
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        with self._lock:
+            self._f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._unsynced += 1
+            if self._unsynced >= self.batch or time.monotonic() - self._synced_at >= self.interval:
+                self._sync()
+
+    def _sync(self) -> None:
+        self._f.flush()
+        os.fsync(self._f.fileno())
+        self._unsynced = 0
+        self._synced_at = time.monotonic()
+
+    def recorder(self, kind: str) -> Callable[[str, Ident, Any], None]:
+        """Функция ``record`` для ``CrcCache`` (``kind`` — ``"ifc"``, ``"pdf"``)
+        или для ``IulEntryCache`` (``kind == "iul"``)."""
+        if kind == "iul":
+            def record(path: str, ident: Ident, entries: List[IulEntry]) -> None:
+                self._write({
+                    "t": "iul", "path": path, "size": ident[0], "mtime": ident[1],
+                    "entries": [asdict(e) for e in entries],
+                })
+        else:
+            def record(path: str, ident: Ident, crc: int) -> None:
+                self._write({
+                    "t": "crc", "kind": kind, "path": path, "size": ident[0], "mtime": ident[1], "crc": crc,
+                })
+        return record
+
+    def close(self) -> None:
+        with self._lock:
+            if self._f.closed:
+                return
+            self._sync()
+            self._f.close()
+
+    def discard(self) -> None:
+        """Закрывает и удаляет журнал: запуск завершён, продолжать нечего."""
+        self.close()
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self) -> "Journal":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class Replay:
+    """Содержимое журнала прерванного запуска в виде ``known`` для кэшей."""
+
+    def __init__(self) -> None:
+        self.crcs: Dict[str, Dict[str, Tuple[Ident, int]]] = {}
+        self.pdfs: Dict[str, Tuple[Ident, List[IulEntry]]] = {}
+
+    def __len__(self) -> int:
+        return sum(len(v) for v in self.crcs.values()) + len(self.pdfs)
+
+
+def load_journal(path: Path) -> Replay:
+    """Читает журнал; отсутствующий файл — пустой журнал. Повреждённые строки
+    (например, оборванная при сбое последняя) пропускаются."""
+    replay = Replay()
+    try:
+        f = path.open("r", encoding="utf-8")
+    except FileNotFoundError:
+        return replay
+    skipped = 0
+    with f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+                t = rec["t"]
+                if t == "journal":
+                    if rec.get("version") != JOURNAL_VERSION:
+                        logging.warning("Журнал %s другой версии; продолжение невозможно", path)
+                        return Replay()
+                    continue
+                ident = (int(rec["size"]), int(rec["mtime"]))
+                if t == "crc":
+                    replay.crcs.setdefault(rec["kind"], {})[rec["path"]] = (ident, int(rec["crc"]))
+                elif t == "iul":
+                    replay.pdfs[rec["path"]] = (ident, [IulEntry(**e) for e in rec["entries"]])
+            except (ValueError, KeyError, TypeError):
+                skipped += 1
+    if skipped:
+        logging.warning("Журнал %s: пропущено повреждённых записей: %s", path, skipped)
+    return replay
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""Однократное чтение PDF: CRC-32 и разбор текста по одному буферу."""
+from __future__ import annotations
+from collections import OrderedDict
+from contextlib import nullcontext
+from dataclasses import dataclass
+from io import BytesIO
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+import threading
+import zlib
+
+if TYPE_CHECKING:
+    from .scheduler import Scheduler
+
+# Сколько байт PDF держать в памяти между проверками (PDF↔XML и ИУЛ).
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+@dataclass
+class PdfDocument:
+    path: Path
+    data: bytes
+    crc32: int
+
+    @property
+    def name(self) -> str:
+        return self.path.name
+
+    def stream(self) -> BytesIO:
+        """Поток для ``PdfReader(BytesIO)``; байты не копируются с диска повторно."""
+        return BytesIO(self.data)
+
+
+def load_pdf(path: Path, chunk_size: int = 1024 * 1024, scheduler: Optional["Scheduler"] = None) -> PdfDocument:
+    """Читает PDF целиком за один проход, попутно считая CRC-32.
+
+    ``scheduler`` учитывает весь файл в бюджете одновременного чтения и
+    ограничивает полосу.
+    """
+    crc = 0
+    buf = bytearray()
+    with path.open("rb") as f, (scheduler.reserve(path.stat().st_size) if scheduler else nullcontext()):
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            if scheduler is not None:
+                scheduler.throttle(len(chunk))
+            crc = zlib.crc32(chunk, crc)
+            buf += chunk
+    return PdfDocument(path=path, data=bytes(buf), crc32=crc & 0xFFFFFFFF)
+
+
+def _identity(path: Path) -> Tuple[int, int]:
+    st = path.stat()
+    return st.st_size, st.st_mtime_ns
+
+
+class PdfCache:
+    """Кэш PDF, общий для проверки PDF↔XML и разбора ИУЛ.
+
+    CRC-32 запоминается для каждого прочитанного файла, а сами байты — пока
+    их суммарный объём не превышает ``max_bytes``. Вытеснение устойчиво к
+    проходу по набору больше бюджета: сначала вытесняются документы, уже
+    использованные повторно (самые давние), а прочитанные один раз ждут
+    своего второго прохода — новый документ в полный кэш тогда не попадает.
+    Исключение — документ, читаемый с диска второй раз: значит, рабочий набор
+    сменился, и он вытесняет самый давний из ждущих. Записи сверяются с
+    размером и mtime файла, изменённый файл читается заново. Файлы читаются
+    через ``scheduler``, если он задан. Кэш можно делить между потоками
+    (проекты ``--batch`` работают с одним кэшем).
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, scheduler: Optional["Scheduler"] = None):
+        self.max_bytes = max_bytes
+        self.scheduler = scheduler
+        self._lock = threading.RLock()
+        self._crc: Dict[str, Tuple[Tuple[int, int], int]] = {}
+        # Прочитанные один раз и уже использованные повторно — каждые в порядке давности
+        self._fresh: "OrderedDict[str, Tuple[Tuple[int, int], PdfDocument]]" = OrderedDict()
+        self._reused: "OrderedDict[str, Tuple[Tuple[int, int], PdfDocument]]" = OrderedDict()
+        self._held = 0
+
+    def load(self, path: Path) -> PdfDocument:
+        key = str(path)
+        ident = _identity(path)
+        with self._lock:
+            cached = self._fresh.pop(key, None) or self._reused.pop(key, None)
+            if cached is not None and cached[0] == ident:
+                self._reused[key] = cached
+                return cached[1]
+            if cached is not None:
+                self._held -= len(cached[1].data)
+            seen = key in self._crc
+        doc = load_pdf(path, scheduler=self.scheduler)
+        with self._lock:
+            self._crc[key] = (ident, doc.crc32)
+            self._hold(key, ident, doc, seen)
+        return doc
+
+    def crc32(self, path: Path) -> int:
+        """CRC-32 файла; повторно файл не читается, если он не менялся."""
+        cached = self._crc.get(str(path))
+        if cached is not None and cached[0] == _identity(path):
+            return cached[1]
+        return self.load(path).crc32
+
+    def peek(self, path: Path) -> Optional[PdfDocument]:
+        """Документ из памяти без чтения с диска (``None``, если его там нет)."""
+        key = str(path)
+        try:
+            ident = _identity(path)
+        except OSError:
+            return None
+        with self._lock:
+            cached = self._fresh.get(key) or self._reused.get(key)
+            if cached is None or cached[0] != ident:
+                return None
+            self._fresh.pop(key, None)
+            self._reused.pop(key, None)
+            self._reused[key] = cached
+            return cached[1]
+
+    def discard(self, path: Path) -> None:
+        """Освобождает байты документа (CRC-32 остаётся в кэше)."""
+        key = str(path)
+        with self._lock:
+            cached = self._fresh.pop(key, None) or self._reused.pop(key, None)
+            if cached is not None:
+                self._held -= len(cached[1].data)
+
+    def _hold(self, key: str, ident: Tuple[int, int], doc: PdfDocument, seen: bool) -> None:
+        self.discard(doc.path)
+        size = len(doc.data)
+        if size > self.max_bytes:
+            return
+        victims = [self._reused, self._fresh] if seen else [self._reused]
+        free = self.max_bytes - self._held
+        if free + sum(len(d.data) for docs in victims for _, d in docs.values()) < size:
+            return
+        for docs in victims:
+            while free < size and docs:
+                _, (_, old) = docs.popitem(last=False)
+                self._held -= len(old.data)
+                free += len(old.data)
+        self._fresh[key] = (ident, doc)
+        self._held += size
+
+
+def open_document(path: Path, cache: Optional[PdfCache] = None) -> PdfDocument:
+    return cache.load(path) if cache is not None else load_pdf(path)
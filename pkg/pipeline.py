@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""Этапы проверки с зависимостями, выполняемые параллельно.
+
+Этап — функция, которая получает результаты этапов-зависимостей (в порядке
+``deps``) и возвращает свой результат. Этап запускается, как только готовы
+все его зависимости, на исполнителе своего вида: ``IO`` — хэширование и
+запись отчётов, ``CPU`` — разбор PDF и OCR. Так хэширование IFC идёт
+одновременно с разбором ИУЛ, а каждый отчёт записывается сразу, как только
+готовы его входные данные.
+
+При ошибке этапа новые этапы не запускаются, уже запущенные доводятся до
+конца, а первая ошибка пробрасывается из ``run``. При отмене ``cancel``
+незапущенные этапы пропускаются: их результатов нет в ответе ``run``;
+только этапы сохранения (``salvage=True``, запись частичных отчётов)
+запускаются и после отмены, когда готовы их зависимости.
+
+``listener(name, event)`` получает события этапов: ``"started"``,
+``"done"`` и ``"failed"`` (служба проверок передаёт их клиенту).
+"""
+from __future__ import annotations
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+import logging
+import time
+
+from .cancel import CancelToken
+
+IO = "io"
+CPU = "cpu"
+
+# Сколько этапов каждого вида может выполняться одновременно
+DEFAULT_WORKERS = {IO: 4, CPU: 1}
+
+
+class Stage:
+    __slots__ = ("name", "fn", "deps", "kind", "salvage")
+
+    def __init__(self, name: str, fn: Callable[..., Any], deps: Tuple[str, ...], kind: str, salvage: bool = False):
+        self.name = name
+        self.fn = fn
+        self.deps = deps
+        self.kind = kind
+        self.salvage = salvage
+
+
+class Pipeline:
+    """Граф этапов. Зависимости этапа должны быть добавлены раньше него,
+    поэтому циклов не бывает."""
+
+    def __init__(
+        self,
+        workers: Optional[Dict[str, int]] = None,
+        cancel: Optional[CancelToken] = None,
+        listener: Optional[Callable[[str, str], None]] = None,
+    ):
+        self.workers = {**DEFAULT_WORKERS, **(workers or {})}
+        self.cancel = cancel
+        self.listener = listener
+        self._stages: Dict[str, Stage] = {}
+
+    def add(self, name: str, fn: Callable[..., Any], deps: Sequence[str] = (), kind: str = IO,
+            salvage: bool = False) -> None:
+        if name in self._stages:
+            raise ValueError(f"Этап {name} уже добавлен")
+        for d in deps:
+            if d not in self._stages:
+                raise ValueError(f"Этап {name} зависит от неизвестного этапа {d}")
+        if kind not in self.workers:
+            raise ValueError(f"Неизвестный вид этапа: {kind}")
+        self._stages[name] = Stage(name, fn, tuple(deps), kind, salvage)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._stages
+
+    def run(self) -> Dict[str, Any]:
+        """Выполняет все этапы; возвращает результаты по именам этапов."""
+        pools = {
+            kind: ThreadPoolExecutor(max_workers=n, thread_name_prefix=f"stage-{kind}")
+            for kind, n in self.workers.items()
+        }
+        results: Dict[str, Any] = {}
+        pending = dict(self._stages)
+        running: Dict[Future, Tuple[str, float]] = {}
+        error: Optional[BaseException] = None
+        try:
+            while pending or running:
+                cancelled = self.cancel is not None and self.cancel.cancelled
+                if error is None:
+                    for name, st in list(pending.items()):
+                        if (not cancelled or st.salvage) and all(d in results for d in st.deps):
+                            args = [results[d] for d in st.deps]
+                            running[pools[st.kind].submit(st.fn, *args)] = (name, time.monotonic())
+                            del pending[name]
+                            logging.debug("Этап %s запущен", name)
+                            self._notify(name, "started")
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    name, started = running.pop(fut)
+                    try:
+                        results[name] = fut.result()
+                    except BaseException as exc:  # noqa: BLE001 - пробрасывается после остановки
+                        if error is None:
+                            error = exc
+                        self._notify(name, "failed")
+                        continue
+                    logging.debug("Этап %s завершён за %.2f с", name, time.monotonic() - started)
+                    self._notify(name, "done")
+        finally:
+            for pool in pools.values():
+                pool.shutdown(wait=True)
+        if error is not None:
+            raise error
+        return results
+
+    def _notify(self, name: str, event: str) -> None:
+        if self.listener is not None:
+            try:
+                self.listener(name, event)
+            except Exception:  # noqa: BLE001 - слушатель не должен ломать конвейер
+                logging.debug("Ошибка обработчика событий этапа %s", name, exc_info=True)
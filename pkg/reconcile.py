@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""Общее ядро сопоставления «перечень ↔ фактические файлы».
+
+Перечень (записи XML или ИУЛ) индексируется один раз: по имени, по имени без
+учёта регистра и по CRC-32. Каждый фактический файл сопоставляется за O(1):
+сначала по имени, затем — если имени нет в перечне — по единственной записи
+с тем же CRC-32. Записи, не сопоставленные ни с одним файлом, возвращает
+``extras()``. Сравнение полей (CRC, размер, дата) остаётся за построителями
+отчётов.
+"""
+from __future__ import annotations
+from typing import Callable, Dict, Generic, Iterable, Iterator, List, Mapping, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# Как найдена запись перечня для файла
+BY_NAME = "name"
+BY_CRC = "crc"
+AMBIGUOUS = "ambiguous"  # несколько записей с тем же CRC-32
+MISSING = "missing"
+
+
+class Match(Generic[T]):
+    __slots__ = ("key", "entry", "by", "hits")
+
+    def __init__(self, key: Optional[str], entry: Optional[T], by: str, hits: int = 0):
+        self.key = key
+        self.entry = entry
+        self.by = by
+        self.hits = hits
+
+    def __bool__(self) -> bool:
+        return self.entry is not None
+
+
+class Reconciler(Generic[T]):
+    """Индексы перечня и учёт использованных записей.
+
+    ``crc_of(key, entry)`` возвращает CRC-32 записи в верхнем регистре (или
+    ``None``). При ``case_sensitive=False`` имя файла ищется без учёта
+    регистра; при совпадении свёрнутых имён побеждает первая запись.
+    """
+
+    def __init__(
+        self,
+        manifest: Mapping[str, T],
+        crc_of: Callable[[str, T], Optional[str]],
+        case_sensitive: bool = True,
+    ):
+        self.manifest = manifest
+        self.case_sensitive = case_sensitive
+        self._folded: Dict[str, str] = {}
+        self._by_crc: Dict[str, List[str]] = {}
+        self._used: set = set()
+        for key, entry in manifest.items():
+            if not case_sensitive:
+                self._folded.setdefault(key.lower(), key)
+            crc = crc_of(key, entry)
+            if crc:
+                self._by_crc.setdefault(crc, []).append(key)
+
+    def lookup(self, name: str) -> Optional[str]:
+        """Ключ записи перечня для имени файла (``None``, если её нет)."""
+        if name in self.manifest:
+            return name
+        if not self.case_sensitive:
+            return self._folded.get(name.lower())
+        return None
+
+    def match(self, name: str, crc_hex: Optional[str] = None) -> Match[T]:
+        """Сопоставляет файл ``name`` с фактическим CRC-32 ``crc_hex``.
+
+        Записи, найденные по CRC, не исключаются из дальнейшего поиска:
+        один и тот же CRC у нескольких файлов должен быть виден в отчёте.
+        """
+        # Горячий путь: поиск в индексах встроен, без вызова lookup()
+        entry = self.manifest.get(name)
+        if entry is not None or name in self.manifest:
+            self._used.add(name)
+            return Match(name, entry, BY_NAME, 1)
+        if not self.case_sensitive:
+            key = self._folded.get(name.lower())
+            if key is not None:
+                self._used.add(key)
+                return Match(key, self.manifest[key], BY_NAME, 1)
+        hits = self._by_crc.get(crc_hex) if crc_hex else None
+        if not hits:
+            return Match(None, None, MISSING, 0)
+        if len(hits) == 1:
+            key = hits[0]
+            self._used.add(key)
+            return Match(key, self.manifest[key], BY_CRC, 1)
+        return Match(None, None, AMBIGUOUS, len(hits))
+
+    def unclaimed(self, names: Iterable[str]) -> List[str]:
+        """Ключи перечня, которые ни одно из имён ``names`` не займёт по имени."""
+        claimed = {self.lookup(name) for name in names}
+        return [key for key in self.manifest if key not in claimed]
+
+    def extras(self) -> Iterator[Tuple[str, T]]:
+        """Записи перечня без файла — в порядке перечня."""
+        used = self._used
+        for key, entry in self.manifest.items():
+            if key not in used:
+                yield key, entry
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""Пакетное сопоставление перечня с файлами на NumPy (необязательная зависимость).
+
+Для перечней в сотни тысяч записей поштучные обращения к словарям
+(``reconcile.Reconciler``) заметны. Здесь имена переводятся в целые
+индексы одной сортировкой (``np.unique``), CRC-32 хранятся массивами
+``uint32``, а соединение по имени и запасное соединение по CRC выполняются
+через ``searchsorted``. Правила те же, что у ``Reconciler``: сначала имя
+(без учёта регистра — если так задано, побеждает первая запись), затем
+единственная запись с тем же CRC-32.
+"""
+from __future__ import annotations
+from typing import Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy не обязателен
+    np = None
+
+# Коды способа сопоставления в массиве ``by``
+MISSING, BY_NAME, BY_CRC, AMBIGUOUS = 0, 1, 2, 3
+
+
+def available() -> bool:
+    return np is not None
+
+
+def _first_index(ids, size: int):
+    """Индекс первой записи для каждого идентификатора (или -1)."""
+    lookup = np.full(size, -1, dtype=np.int64)
+    uniq, first = np.unique(ids, return_index=True)
+    lookup[uniq] = first
+    return lookup
+
+
+def join(
+    manifest_names: Sequence[str],
+    manifest_crcs: Sequence[Optional[int]],
+    file_names: Sequence[str],
+    file_crcs: Sequence[int],
+    case_sensitive: bool = True,
+) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray", "np.ndarray"]:
+    """Сопоставляет файлы с записями перечня.
+
+    ``manifest_crcs`` — CRC-32 записей числом или ``None``, если в записи
+    нет корректного CRC. Возвращает массивы ``(index, by, hits, used)``:
+    индекс записи для каждого файла (-1 — не найдена), способ сопоставления
+    (``BY_NAME``/``BY_CRC``/``AMBIGUOUS``/``MISSING``), число записей с тем же
+    CRC и маску записей перечня, сопоставленных хотя бы с одним файлом.
+    """
+    if np is None:
+        raise RuntimeError("Для пакетного сопоставления требуется numpy")
+    n_m = len(manifest_names)
+    n_f = len(file_names)
+    index = np.full(n_f, -1, dtype=np.int64)
+    by = np.zeros(n_f, dtype=np.int8)
+    hits = np.zeros(n_f, dtype=np.int64)
+    used = np.zeros(n_m, dtype=bool)
+    if n_f == 0:
+        return index, by, hits, used
+
+    # Имена → целые идентификаторы одной сортировкой
+    names = np.array(list(manifest_names) + list(file_names), dtype=str)
+    uniq, ids = np.unique(names, return_inverse=True)
+    ids = ids.reshape(-1)
+    lookup = _first_index(ids[:n_m], len(uniq)) if n_m else np.full(len(uniq), -1, dtype=np.int64)
+    index[:] = lookup[ids[n_m:]]
+
+    if not case_sensitive and n_m:
+        rest = index < 0
+        if rest.any():
+            folded = np.char.lower(names)
+            funiq, fids = np.unique(folded, return_inverse=True)
+            fids = fids.reshape(-1)
+            flookup = _first_index(fids[:n_m], len(funiq))
+            index[rest] = flookup[fids[n_m:][rest]]
+
+    by[index >= 0] = BY_NAME
+    hits[index >= 0] = 1
+
+    # Запасное соединение по CRC-32 для файлов без записи с тем же именем
+    rest = np.nonzero(index < 0)[0]
+    valid = np.fromiter((c is not None for c in manifest_crcs), dtype=bool, count=n_m)
+    if rest.size and valid.any():
+        m_crc = np.fromiter((c or 0 for c in manifest_crcs), dtype=np.uint32, count=n_m)
+        m_pos = np.nonzero(valid)[0]
+        order = np.argsort(m_crc[m_pos], kind="stable")
+        sorted_crc = m_crc[m_pos][order]
+        f_crc = np.asarray(file_crcs, dtype=np.uint32)[rest]
+        left = np.searchsorted(sorted_crc, f_crc, side="left")
+        right = np.searchsorted(sorted_crc, f_crc, side="right")
+        count = right - left
+        hits[rest] = count
+        single = count == 1
+        index[rest[single]] = m_pos[order[left[single]]]
+        by[rest[single]] = BY_CRC
+        by[rest[count > 1]] = AMBIGUOUS
+
+    matched = index[index >= 0]
+    used[matched] = True
+    return index, by, hits, used
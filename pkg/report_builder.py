@@ -1,8 +1,12 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
 from pathlib import Path
-from typing import Dict, List
+from typing import Callable, Iterator, Dict, List, Optional, Tuple
+from .cancel import CancelToken
 from .crc import compute_crc32
+from .fuzzy import NameHints
+from .reconcile import AMBIGUOUS, BY_CRC, BY_NAME, MISSING, Reconciler
+from .rows import ReportRow, Status, crc_text, details_text, pack_crc, status_labels, status_text
 from .utils import tri, recommendation
 
 
@@ -14,7 +18,121 @@ RECOMMENDATIONS = {
     "NAME_MISMATCH": "Переименуйте файл или исправьте запись в XML",
 }
 
-def build_report(xml_map: Dict[str, dict], ifc_files: List[Path], case_sensitive: bool=True) -> List[Dict]:
+
+class XmlRow(ReportRow):
+    """Строка отчёта XML↔IFC."""
+
+    __slots__ = ("ifc_name", "xml_name", "xml_crc", "ifc_crc", "name_ok", "crc_ok")
+
+    def __init__(self, ifc_name, xml_name, xml_crc, ifc_crc, name_ok, crc_ok, status, details=None):
+        self.ifc_name = ifc_name
+        self.xml_name = xml_name
+        self.xml_crc = xml_crc
+        self.ifc_crc = ifc_crc
+        self.name_ok = name_ok
+        self.crc_ok = crc_ok
+        self.status = status
+        self.details = details
+
+    COLUMNS = {
+        "Имя файла IFC": lambda r: r.ifc_name,
+        "Имя файла IFC из XML": lambda r: r.xml_name,
+        "CRC-32 XML": lambda r: crc_text(r.xml_crc),
+        "CRC-32 IFC": lambda r: crc_text(r.ifc_crc),
+        "Имя совпадает": lambda r: tri(r.name_ok),
+        "CRC совпадает": lambda r: tri(r.crc_ok),
+        "Статус": lambda r: status_text(r.status),
+        "Подробности": details_text,
+        "recommendation": lambda r: recommendation(status_labels(r.status), RECOMMENDATIONS),
+    }
+
+
+def _file_row(
+    base: str,
+    actual_crc: int,
+    key: Optional[str],
+    meta: Optional[dict],
+    by: str,
+    hint: Optional[Tuple[str, int]] = None,
+) -> XmlRow:
+    """Строка для файла IFC по результату сопоставления с записью XML.
+
+    ``hint`` — похожее имя записи XML для файла без записи (см. ``fuzzy``).
+    """
+    actual_crc_hex = f"{actual_crc:08X}"
+    name_match = None
+    crc_match = None
+    xml_crc_from_xml = None
+    status = Status(0)
+    details: List[str] = []
+    xml_name_from_xml = base if meta else None
+
+    if by == BY_CRC:
+        xml_name_from_xml = key
+        xml_crc_from_xml = (meta.get("crc_hex") or "").upper() or None
+        name_match = (key == base)
+        if not name_match:
+            status |= Status.NAME_MISMATCH
+            details.append("Сопоставлено по CRC-32, имя различается")
+        crc_match = True
+    elif meta is None:
+        status |= Status.ERROR_IFC_EXTRA
+        if by == AMBIGUOUS:
+            details.append(f"Найдено несколько записей в XML с тем же CRC ({actual_crc_hex})")
+        else:
+            details.append("Файл есть, но отсутствует запись в XML")
+        if hint:
+            details.append(f"Похожая запись в XML: {hint[0]} (расстояние {hint[1]})")
+    else:
+        name_match = True
+        xml_crc_from_xml = (meta.get("crc_hex") or "").upper() or None
+        if xml_crc_from_xml:
+            crc_match = (xml_crc_from_xml == actual_crc_hex)
+            if not crc_match:
+                status |= Status.CRC_MISMATCH
+                details.append(f"CRC-32 не совпадает: XML={xml_crc_from_xml}, IFC={actual_crc_hex}")
+        else:
+            details.append("В XML отсутствует CRC-32")
+
+    if not status and name_match is True and (crc_match is True or crc_match is None):
+        status = Status.OK
+
+    return XmlRow(
+        base,
+        xml_name_from_xml,
+        pack_crc(xml_crc_from_xml),
+        actual_crc,
+        name_match,
+        crc_match,
+        status,
+        details or None,
+    )
+
+
+def _extra_row(name: str, meta: dict, hint: Optional[Tuple[str, int]] = None) -> XmlRow:
+    details = ["Запись в XML есть, соответствующий файл не найден"]
+    if hint:
+        details.append(f"Похожий файл: {hint[0]} (расстояние {hint[1]})")
+    return XmlRow(
+        None,
+        name,
+        pack_crc(meta.get("crc_hex")),
+        None,
+        None,
+        None,
+        Status.ERROR_XML_EXTRA,
+        details,
+    )
+
+
+def iter_report(
+    xml_map: Dict[str, dict],
+    ifc_files: List[Path],
+    case_sensitive: bool=True,
+    *,
+    cancel: Optional[CancelToken] = None,
+    hasher: Optional[Callable[[Path], int]] = None,
+) -> Iterator[XmlRow]:
     """
     Сравнение XML↔IFC:
       - Имя (строгое сравнение)
@@ -25,92 +143,114 @@ def build_report(xml_map: Dict[str, dict], ifc_files: List[Path], case_sensitive
       - CRC разные → CRC_MISMATCH
       - Есть совпадение по CRC, но имя отличается → NAME_MISMATCH (в одну строку)
       - Всё ок → OK
+    Строки (``XmlRow``) выдаются по мере хэширования файлов; при отмене
+    ``cancel`` генератор завершается, не дойдя до лишних записей XML.
+    ``hasher`` — источник CRC-32 (например, общий ``CrcCache``).
+    Для несопоставленных файлов и записей в «Подробности» добавляется
+    ближайшее похожее имя с другой стороны.
     """
-    rows: List[Dict] = []
-    used_xml = set()
-
-    # Индекс: CRC из XML -> список имён
-    xml_crc_index: Dict[str, List[str]] = {}
-    for name, meta in xml_map.items():
-        crc = (meta.get("crc_hex") or "").upper()
-        if crc:
-            xml_crc_index.setdefault(crc, []).append(name)
+    crc_of = hasher if hasher is not None else compute_crc32
+    recon = Reconciler(
+        xml_map,
+        lambda name, meta: (meta.get("crc_hex") or "").upper() or None,
+        case_sensitive,
+    )
+    hints = NameHints(recon.unclaimed(f.name for f in ifc_files))
 
     for f in ifc_files:
-        base = f.name
-        key = base if case_sensitive else base.lower()
-        meta = xml_map.get(key)
-        actual_crc_hex = f"{compute_crc32(f):08X}"
-
-        name_match = None
-        crc_match = None
-        xml_crc_from_xml = None
-        status: List[str] = []
-        details: List[str] = []
-        xml_name_from_xml = base if meta else None
-
-        if meta is None:
-            # пытаемся сопоставить по CRC
-            hits = xml_crc_index.get(actual_crc_hex, [])
-            if len(hits) == 1:
-                xml_name = hits[0]
-                xml_name_from_xml = xml_name
-                meta_hit = xml_map.get(xml_name if case_sensitive else xml_name.lower())
-                xml_crc_from_xml = ((meta_hit.get("crc_hex") or "").upper() if meta_hit else None)
-                used_xml.add(xml_name if case_sensitive else xml_name.lower())
-                name_match = (xml_name == base)
-                if not name_match:
-                    status.append("NAME_MISMATCH")
-                    details.append("Сопоставлено по CRC-32, имя различается")
-                crc_match = True
-            elif len(hits) > 1:
-                status.append("ERROR_IFC_EXTRA")
-                details.append(f"Найдено несколько записей в XML с тем же CRC ({actual_crc_hex})")
-            else:
-                status.append("ERROR_IFC_EXTRA")
-                details.append("Файл есть, но отсутствует запись в XML")
-        else:
-            used_xml.add(key)
-            name_match = True
-            xml_crc_from_xml = (meta.get("crc_hex") or "").upper() or None
-            if xml_crc_from_xml:
-                crc_match = (xml_crc_from_xml == actual_crc_hex)
-                if not crc_match:
-                    status.append("CRC_MISMATCH")
-                    details.append(f"CRC-32 не совпадает: XML={xml_crc_from_xml}, IFC={actual_crc_hex}")
-            else:
-                details.append("В XML отсутствует CRC-32")
-
-        if not status and name_match is True and (crc_match is True or crc_match is None):
-            status.append("OK")
-
-        rows.append({
-            "Имя файла IFC": base,
-            "Имя файла IFC из XML": xml_name_from_xml,
-            "CRC-32 XML": xml_crc_from_xml,
-            "CRC-32 IFC": actual_crc_hex,
-            "Имя совпадает": tri(name_match),
-            "CRC совпадает": tri(crc_match),
-            "Статус": ";".join(status) if status else "—",
-            "Подробности": "; ".join(details) if details else None,
-            "recommendation": recommendation(status, RECOMMENDATIONS),
-        })
+        if cancel is not None and cancel.cancelled:
+            return
+        actual_crc = crc_of(f)
+        m = recon.match(f.name, f"{actual_crc:08X}")
+        hint = hints.for_file(f.name) if m.entry is None else None
+        yield _file_row(f.name, actual_crc, m.key, m.entry, m.by, hint)
 
     # Лишние записи в XML
-    for name, meta in xml_map.items():
-        k = name if case_sensitive else name.lower()
-        if k in used_xml:
-            continue
-        rows.append({
-            "Имя файла IFC": None,
-            "Имя файла IFC из XML": name,
-            "CRC-32 XML": (meta.get("crc_hex") or "").upper() or None,
-            "CRC-32 IFC": None,
-            "Имя совпадает": "—",
-            "CRC совпадает": "—",
-            "Статус": "ERROR_XML_EXTRA",
-            "Подробности": "Запись в XML есть, соответствующий файл не найден",
-            "recommendation": RECOMMENDATIONS.get("ERROR_XML_EXTRA"),
-        })
+    for name, meta in recon.extras():
+        yield _extra_row(name, meta, hints.for_entry(name))
+
+
+# С какого объёма (записей XML + файлов) build_report переходит на NumPy
+VECTORIZE_MIN_ROWS = 50_000
+
+def build_report_vectorized(
+    xml_map: Dict[str, dict],
+    ifc_files: List[Path],
+    case_sensitive: bool=True,
+    *,
+    cancel: Optional[CancelToken] = None,
+    hasher: Optional[Callable[[Path], int]] = None,
+) -> List[XmlRow]:
+    """То же, что ``build_report``, но соединение выполняется на NumPy.
+
+    Все файлы сначала хэшируются, затем сопоставляются одним пакетом
+    (``reconcile_np.join``); строки совпадают со строками ``iter_report``.
+    """
+    from . import reconcile_np
+
+    crc_of = hasher if hasher is not None else compute_crc32
+    crcs: List[int] = []
+    for f in ifc_files:
+        if cancel is not None and cancel.cancelled:
+            break
+        crcs.append(crc_of(f))
+    files = ifc_files[:len(crcs)]
 
+    names = list(xml_map)
+    metas = list(xml_map.values())
+    # CRC из XML: только 8 hex-цифр могут совпасть с фактическим CRC
+    m_crcs = [_int_crc(meta.get("crc_hex")) for meta in metas]
+    index, by, _, used = reconcile_np.join(
+        names, m_crcs, [f.name for f in files], crcs, case_sensitive
+    )
+    by_name = {
+        reconcile_np.MISSING: MISSING,
+        reconcile_np.BY_NAME: BY_NAME,
+        reconcile_np.BY_CRC: BY_CRC,
+        reconcile_np.AMBIGUOUS: AMBIGUOUS,
+    }
+    index, by = index.tolist(), by.tolist()
+    # Записи, занятые файлами по имени, в подсказки не попадают (как в iter_report)
+    claimed = {names[i] for i, b in zip(index, by) if b == reconcile_np.BY_NAME}
+    hints = NameHints([n for n in names if n not in claimed])
+    rows: List[XmlRow] = []
+    for f, crc, i, b in zip(files, crcs, index, by):
+        if i >= 0:
+            rows.append(_file_row(f.name, crc, names[i], metas[i], by_name[b]))
+        else:
+            rows.append(_file_row(f.name, crc, None, None, by_name[b], hints.for_file(f.name)))
+    if len(files) < len(ifc_files):
+        return rows
+    for i in (~used).nonzero()[0].tolist():
+        rows.append(_extra_row(names[i], metas[i], hints.for_entry(names[i])))
     return rows
+
+
+def _int_crc(value: Optional[str]) -> Optional[int]:
+    crc = pack_crc(value)
+    return crc if isinstance(crc, int) else None
+
+
+def build_report(
+    xml_map: Dict[str, dict],
+    ifc_files: List[Path],
+    case_sensitive: bool=True,
+    *,
+    cancel: Optional[CancelToken] = None,
+    hasher: Optional[Callable[[Path], int]] = None,
+    vectorized: Optional[bool] = None,
+) -> List[XmlRow]:
+    """Список строк ``iter_report``.
+
+    ``vectorized`` выбирает пакетное соединение на NumPy; по умолчанию оно
+    включается, если numpy установлен и строк не меньше ``VECTORIZE_MIN_ROWS``.
+    """
+    if vectorized is None:
+        from . import reconcile_np
+        vectorized = (
+            reconcile_np.available()
+            and len(xml_map) + len(ifc_files) >= VECTORIZE_MIN_ROWS
+        )
+    if vectorized:
+        return build_report_vectorized(xml_map, ifc_files, case_sensitive, cancel=cancel, hasher=hasher)
+    return list(iter_report(xml_map, ifc_files, case_sensitive, cancel=cancel, hasher=hasher))
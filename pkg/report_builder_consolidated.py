@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+"""Сводная проверка XML ↔ ИУЛ ↔ IFC за один проход.
+
+Каждый IFC хэшируется один раз и сопоставляется сразу с записью XML и с
+записью ИУЛ (по имени, затем по единственному совпадению CRC-32). В строке
+собраны сведения всех трёх источников, а расхождение XML и ИУЛ между собой
+отмечается, даже если самого файла нет.
+"""
+from __future__ import annotations
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from .cancel import CancelToken
+from .crc import compute_crc32
+from .iul_reader import IulEntry
+from .reconcile import AMBIGUOUS, BY_CRC, Reconciler
+from .rows import ReportRow, Status, crc_text, details_text, pack_crc, status_labels, status_text
+from .utils import fmt_mtime, tri, recommendation
+
+
+RECOMMENDATIONS = {
+    "OK": "Действий не требуется",
+    "NO_XML_ENTRY": "Добавьте запись о файле в XML",
+    "NO_IUL_ENTRY": "Добавьте запись о файле в ИУЛ",
+    "ERROR_XML_EXTRA": "Удалите лишнюю запись из XML или добавьте соответствующий файл IFC",
+    "ERROR_IUL_EXTRA": "Удалите лишнюю запись из ИУЛ или добавьте соответствующий файл",
+    "NAME_MISMATCH": "Переименуйте файл или исправьте запись в XML/ИУЛ",
+    "XML_CRC_MISMATCH": "Обновите CRC-32 в XML или замените файл",
+    "IUL_CRC_MISMATCH": "Обновите CRC-32 в ИУЛ или замените файл",
+    "XML_IUL_MISMATCH": "Согласуйте CRC-32 в XML и ИУЛ",
+    "SIZE_MISMATCH": "Проверьте размер файла и обновите информацию в ИУЛ",
+    "DT_MISMATCH": "Обновите дату/время в ИУЛ или замените файл",
+}
+
+
+class ConsolidatedRow(ReportRow):
+    """Строка сводного отчёта XML ↔ ИУЛ ↔ IFC."""
+
+    __slots__ = (
+        "ifc_name", "xml_name", "iul_name", "pdf_name", "ifc_crc", "xml_crc", "iul_crc",
+        "ifc_size", "iul_size", "ifc_dt", "iul_dt", "xml_ok", "iul_ok", "xml_iul_ok",
+        "size_ok", "dt_ok",
+    )
+
+    def __init__(
+        self, ifc_name, xml_name, iul_name, pdf_name, ifc_crc, xml_crc, iul_crc, ifc_size,
+        iul_size, ifc_dt, iul_dt, xml_ok, iul_ok, xml_iul_ok, size_ok, dt_ok, status,
+        details=None,
+    ):
+        self.ifc_name = ifc_name
+        self.xml_name = xml_name
+        self.iul_name = iul_name
+        self.pdf_name = pdf_name
+        self.ifc_crc = ifc_crc
+        self.xml_crc = xml_crc
+        self.iul_crc = iul_crc
+        self.ifc_size = ifc_size
+        self.iul_size = iul_size
+        self.ifc_dt = ifc_dt
+        self.iul_dt = iul_dt
+        self.xml_ok = xml_ok
+        self.iul_ok = iul_ok
+        self.xml_iul_ok = xml_iul_ok
+        self.size_ok = size_ok
+        self.dt_ok = dt_ok
+        self.status = status
+        self.details = details
+
+    COLUMNS = {
+        "Имя файла IFC": lambda r: r.ifc_name,
+        "Имя файла IFC из XML": lambda r: r.xml_name,
+        "Имя файла IFC из ИУЛ": lambda r: r.iul_name,
+        "Имя PDF": lambda r: r.pdf_name,
+        "CRC-32 IFC": lambda r: crc_text(r.ifc_crc),
+        "CRC-32 XML": lambda r: crc_text(r.xml_crc),
+        "CRC-32 ИУЛ": lambda r: crc_text(r.iul_crc),
+        "Размер IFC, байт": lambda r: r.ifc_size,
+        "Размер ИУЛ, байт": lambda r: r.iul_size,
+        "Дата/время IFC": lambda r: r.ifc_dt,
+        "Дата/время ИУЛ": lambda r: r.iul_dt,
+        "CRC XML совпадает": lambda r: tri(r.xml_ok),
+        "CRC ИУЛ совпадает": lambda r: tri(r.iul_ok),
+        "XML и ИУЛ согласованы": lambda r: tri(r.xml_iul_ok),
+        "Размер совпадает": lambda r: tri(r.size_ok),
+        "Дата/время совпадает": lambda r: tri(r.dt_ok),
+        "Статус": lambda r: status_text(r.status),
+        "Подробности": details_text,
+        "recommendation": lambda r: recommendation(status_labels(r.status), RECOMMENDATIONS),
+    }
+
+
+def _xml_crc(meta: Optional[dict]) -> Optional[str]:
+    return ((meta.get("crc_hex") or "").upper() or None) if meta is not None else None
+
+
+def _iul_crc(entry: Optional[IulEntry]) -> Optional[str]:
+    return entry.crc_hex.upper() if (entry is not None and entry.crc_hex) else None
+
+
+def _agree(xml_crc: Optional[str], iul_crc: Optional[str], status: Status, details: List[str]) -> Tuple[Optional[bool], Status]:
+    """Согласованность CRC-32 в XML и ИУЛ (если он указан в обоих)."""
+    if not (xml_crc and iul_crc):
+        return None, status
+    if xml_crc == iul_crc:
+        return True, status
+    details.append(f"CRC-32 в XML и ИУЛ различается: XML={xml_crc}, ИУЛ={iul_crc}")
+    return False, status | Status.XML_IUL_MISMATCH
+
+
+def iter_report_consolidated(
+    xml_map: Dict[str, dict],
+    iul_map: Dict[str, IulEntry],
+    ifc_files: List[Path],
+    case_sensitive: bool = True,
+    *,
+    hasher: Optional[Callable[[Path], int]] = None,
+    cancel: Optional[CancelToken] = None,
+) -> Iterator[ConsolidatedRow]:
+    """Одна строка на IFC с данными XML и ИУЛ, затем строки для записей без файла.
+
+    Записи XML и ИУЛ без файла объединяются в одну строку, если их имена
+    совпадают. При отмене ``cancel`` генератор завершается.
+    """
+    crc_of = hasher if hasher is not None else compute_crc32
+    xml_recon = Reconciler(xml_map, lambda k, m: _xml_crc(m), case_sensitive)
+    iul_recon = Reconciler(iul_map, lambda k, e: _iul_crc(e), case_sensitive)
+
+    for f in ifc_files:
+        if cancel is not None and cancel.cancelled:
+            return
+        base = f.name
+        actual_crc = crc_of(f)
+        actual_hex = f"{actual_crc:08X}"
+        st = f.stat()
+        actual_size = st.st_size
+        actual_dt = fmt_mtime(st.st_mtime)
+        status = Status(0)
+        details: List[str] = []
+
+        mx = xml_recon.match(base, actual_hex)
+        xml_crc = _xml_crc(mx.entry)
+        xml_ok = None
+        if mx.entry is None:
+            status |= Status.NO_XML_ENTRY
+            if mx.by == AMBIGUOUS:
+                details.append(f"XML: несколько записей с тем же CRC ({actual_hex})")
+            else:
+                details.append("Нет записи в XML")
+        else:
+            if mx.by == BY_CRC and mx.key != base:
+                status |= Status.NAME_MISMATCH
+                details.append(f"XML: сопоставлено по CRC-32, имя в XML {mx.key}")
+            if xml_crc:
+                xml_ok = xml_crc == actual_hex
+                if not xml_ok:
+                    status |= Status.XML_CRC_MISMATCH
+                    details.append(f"CRC-32 не совпадает: XML={xml_crc}, IFC={actual_hex}")
+            else:
+                details.append("В XML отсутствует CRC-32")
+
+        mi = iul_recon.match(base, actual_hex)
+        e = mi.entry
+        iul_crc = _iul_crc(e)
+        iul_ok = size_ok = dt_ok = None
+        if e is None:
+            status |= Status.NO_IUL_ENTRY
+            if mi.by == AMBIGUOUS:
+                details.append(f"ИУЛ: несколько записей с тем же CRC ({actual_hex})")
+            else:
+                details.append("Нет записи в ИУЛ")
+        else:
+            if mi.by == BY_CRC and mi.key != base:
+                status |= Status.NAME_MISMATCH
+                details.append(f"ИУЛ: сопоставлено по CRC-32, имя в ИУЛ {e.basename}")
+            if iul_crc:
+                iul_ok = iul_crc == actual_hex
+                if not iul_ok:
+                    status |= Status.IUL_CRC_MISMATCH
+                    details.append(f"CRC-32 не совпадает: ИУЛ={iul_crc}, IFC={actual_hex}")
+            else:
+                details.append("В ИУЛ отсутствует CRC-32")
+            if e.size_bytes is not None:
+                size_ok = e.size_bytes == actual_size
+                if not size_ok:
+                    status |= Status.SIZE_MISMATCH
+                    details.append(f"Размер не совпадает: ИУЛ={e.size_bytes}, IFC={actual_size}")
+            if e.dt_str:
+                dt_ok = e.dt_str == actual_dt
+                if not dt_ok:
+                    status |= Status.DT_MISMATCH
+                    details.append(f"Дата/время не совпадает: ИУЛ={e.dt_str}, IFC={actual_dt}")
+
+        xml_iul_ok, status = _agree(xml_crc, iul_crc, status, details)
+        if not status:
+            status = Status.OK
+
+        yield ConsolidatedRow(
+            base,
+            mx.key,
+            (e.basename if e else None),
+            (e.source_pdf if e else None),
+            actual_crc,
+            pack_crc(xml_crc),
+            pack_crc(iul_crc),
+            actual_size,
+            (e.size_bytes if e else None),
+            actual_dt,
+            (e.dt_str if e else None),
+            xml_ok,
+            iul_ok,
+            xml_iul_ok,
+            size_ok,
+            dt_ok,
+            status,
+            details or None,
+        )
+
+    # Записи без файла: XML и ИУЛ с одинаковым именем — в одной строке
+    fold = (lambda n: n) if case_sensitive else (lambda n: n.lower())
+    iul_extra: Dict[str, Tuple[str, IulEntry]] = {}
+    for k, e in iul_recon.extras():
+        iul_extra.setdefault(fold(k), (k, e))
+    for k, meta in xml_recon.extras():
+        pair = iul_extra.pop(fold(k), None)
+        yield _extra_row(k, meta, pair[1] if pair else None)
+    for k, e in iul_extra.values():
+        yield _extra_row(None, None, e)
+
+
+def _extra_row(
+    xml_name: Optional[str],
+    meta: Optional[dict],
+    e: Optional[IulEntry],
+) -> ConsolidatedRow:
+    status = Status(0)
+    details: List[str] = []
+    if meta is not None:
+        status |= Status.ERROR_XML_EXTRA
+    if e is not None:
+        status |= Status.ERROR_IUL_EXTRA
+    name = xml_name or e.basename
+    details.append(f"Файл {name} не найден")
+    xml_crc = _xml_crc(meta)
+    iul_crc = _iul_crc(e)
+    xml_iul_ok, status = _agree(xml_crc, iul_crc, status, details)
+    return ConsolidatedRow(
+        None,
+        xml_name,
+        (e.basename if e else None),
+        (e.source_pdf if e else None),
+        None,
+        pack_crc(xml_crc),
+        pack_crc(iul_crc),
+        None,
+        (e.size_bytes if e else None),
+        None,
+        (e.dt_str if e else None),
+        None,
+        None,
+        xml_iul_ok,
+        None,
+        None,
+        status,
+        details,
+    )
+
+
+def build_report_consolidated(
+    xml_map: Dict[str, dict],
+    iul_map: Dict[str, IulEntry],
+    ifc_files: List[Path],
+    case_sensitive: bool = True,
+    *,
+    hasher: Optional[Callable[[Path], int]] = None,
+    cancel: Optional[CancelToken] = None,
+) -> List[ConsolidatedRow]:
+    """Список строк ``iter_report_consolidated``."""
+    return list(iter_report_consolidated(
+        xml_map, iul_map, ifc_files, case_sensitive, hasher=hasher, cancel=cancel
+    ))
@@ -1,11 +1,15 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
 from pathlib import Path
-from typing import Dict, List, Optional
-import time
+from typing import Callable, Iterator, Collection, Dict, List, Optional
+from .cancel import CancelToken
 from .crc import compute_crc32
+from .crc_index import CrcIndex
+from .fuzzy import NameHints
 from .iul_reader import IulEntry, pdf_name_ok_lenient, pdf_name_ok_strict
-from .utils import tri, recommendation
+from .reconcile import AMBIGUOUS, BY_CRC, Reconciler
+from .rows import ReportRow, Status, crc_text, details_text, pack_crc, status_labels, status_text
+from .utils import fmt_mtime, tri, recommendation
 
 
 RECOMMENDATIONS = {
@@ -13,32 +17,129 @@ RECOMMENDATIONS = {
     "ERROR_IFC_EXTRA": "Удалите лишний файл или добавьте запись в ИУЛ",
     "ERROR_IUL_EXTRA": "Удалите лишнюю запись из ИУЛ или добавьте соответствующий файл",
     "CRC_MISMATCH": "Проверьте корректность файлов и пересоздайте CRC",
+    "CRC_OCR_CORRECTED": "CRC-32 в ИУЛ распознан с ошибкой OCR; сверьте значение в PDF вручную",
     "NAME_MISMATCH": "Переименуйте файл или обновите запись в ИУЛ",
     "SIZE_MISMATCH": "Проверьте размер файла и обновите информацию в ИУЛ",
     "DT_MISMATCH": "Обновите дату/время в ИУЛ или замените файл",
     "PDF_NAME_MISMATCH": "Переименуйте PDF согласно требуемому правилу (ожидаемое имя: {expected})",
+    "IUL_TIMEOUT": "ИУЛ не разобран за отведённое время; увеличьте --pdf-timeout или проверьте PDF вручную",
 }
 
-def _fmt_mtime(ts: float) -> str:
-    t = time.localtime(ts)
-    return f"{t.tm_mday:02d}.{t.tm_mon:02d}.{t.tm_year:04d} {t.tm_hour:02d}:{t.tm_min:02d}"
+# Прежнее имя: общая функция теперь в utils
+_fmt_mtime = fmt_mtime
 
 PDF_NAME_COL = "Имя PDF соответствует шаблону"
 
 
-def build_report_iul(
+def _iul_recommendation(row: "IulRow"):
+    rec = recommendation(status_labels(row.status), RECOMMENDATIONS)
+    if rec and row.ifc_name:
+        rec = rec.format(expected=f"{Path(row.ifc_name).stem}_УЛ.pdf")
+    return rec
+
+
+class IulRow(ReportRow):
+    """Строка отчёта ИУЛ↔IFC."""
+
+    __slots__ = (
+        "ifc_name", "pdf_name", "iul_name", "iul_crc", "ifc_crc", "iul_dt", "ifc_dt",
+        "iul_size", "ifc_size", "name_ok", "crc_ok", "dt_ok", "size_ok", "pdf_name_ok",
+    )
+
+    def __init__(
+        self, ifc_name, pdf_name, iul_name, iul_crc, ifc_crc, iul_dt, ifc_dt, iul_size,
+        ifc_size, name_ok, crc_ok, dt_ok, size_ok, pdf_name_ok, status, details=None,
+    ):
+        self.ifc_name = ifc_name
+        self.pdf_name = pdf_name
+        self.iul_name = iul_name
+        self.iul_crc = iul_crc
+        self.ifc_crc = ifc_crc
+        self.iul_dt = iul_dt
+        self.ifc_dt = ifc_dt
+        self.iul_size = iul_size
+        self.ifc_size = ifc_size
+        self.name_ok = name_ok
+        self.crc_ok = crc_ok
+        self.dt_ok = dt_ok
+        self.size_ok = size_ok
+        self.pdf_name_ok = pdf_name_ok
+        self.status = status
+        self.details = details
+
+    COLUMNS = {
+        "Имя файла IFC": lambda r: r.ifc_name,
+        "Имя PDF": lambda r: r.pdf_name,
+        "Имя файла IFC из ИУЛ": lambda r: r.iul_name,
+        "CRC-32 ИУЛ": lambda r: crc_text(r.iul_crc),
+        "CRC-32 IFC": lambda r: crc_text(r.ifc_crc),
+        "Дата/время ИУЛ": lambda r: r.iul_dt,
+        "Дата/время IFC": lambda r: r.ifc_dt,
+        "Размер ИУЛ, байт": lambda r: r.iul_size,
+        "Размер IFC, байт": lambda r: r.ifc_size,
+        "Имя совпадает": lambda r: tri(r.name_ok),
+        "CRC совпадает": lambda r: tri(r.crc_ok),
+        "Дата/время совпадает": lambda r: tri(r.dt_ok),
+        "Размер совпадает": lambda r: tri(r.size_ok),
+        "Статус": lambda r: status_text(r.status),
+        "Подробности": details_text,
+        "recommendation": _iul_recommendation,
+    }
+
+
+class IulRowPdfName(IulRow):
+    """Строка ИУЛ↔IFC со столбцом проверки имени PDF."""
+
+    __slots__ = ()
+    COLUMNS = {**IulRow.COLUMNS, PDF_NAME_COL: lambda r: tri(r.pdf_name_ok)}
+
+
+def iter_report_iul(
     iul_map: Dict[str, IulEntry],
     ifc_files: List[Path],
     pdf_paths: Optional[List[Path]] = None,
     *,
     strict_pdf_name: bool = False,
     include_pdf_name_col: bool | None = None,
-) -> List[Dict]:
-    """Сравнение ИУЛ(PDF) ↔ IFC."""
+    ocr_crc_correction: bool = True,
+    timed_out_pdfs: Optional[Collection[str]] = None,
+    cancel: Optional[CancelToken] = None,
+    hasher: Optional[Callable[[Path], int]] = None,
+) -> Iterator[IulRow]:
+    """Сравнение ИУЛ(PDF) ↔ IFC.
+
+    При ``ocr_crc_correction`` CRC-32 из распознанных сканов (``IulEntry.ocr``),
+    отличающиеся от единственного фактического CRC одной типичной ошибкой OCR,
+    считаются совпавшими; такие строки помечаются статусом CRC_OCR_CORRECTED.
+
+    ``timed_out_pdfs`` — имена PDF, разбор которых прерван по лимиту времени:
+    IFC, ожидающие такой ИУЛ, получают статус IUL_TIMEOUT вместо ERROR_IFC_EXTRA.
+    Строки выдаются по мере проверки IFC. Если есть записи OCR, перед первой
+    строкой хэшируются все IFC (нужны для поправки CRC). При отмене
+    ``cancel`` генератор завершается. ``hasher`` — источник CRC-32
+    (например, общий ``CrcCache``). Для несопоставленных IFC и записей
+    ИУЛ в «Подробности» добавляется ближайшее похожее имя с другой стороны.
+    """
+    crc_of = hasher if hasher is not None else compute_crc32
     if include_pdf_name_col is None:
         include_pdf_name_col = strict_pdf_name
-    rows: List[Dict] = []
-    used = set()
+    row_cls = IulRowPdfName if include_pdf_name_col else IulRow
+
+    # Для OCR-записей сначала считаем все фактические CRC: поправка допустима,
+    # только если соседний CRC среди файлов единственный.
+    actual_crcs: Dict[Path, str] = {}
+    ocr_fixed: Dict[str, str] = {}
+    if ocr_crc_correction and any(e.ocr and e.crc_hex for e in iul_map.values()):
+        for f in ifc_files:
+            if cancel is not None and cancel.cancelled:
+                return
+            actual_crcs[f] = f"{crc_of(f):08X}"
+        crc_index = CrcIndex(actual_crcs.values())
+        for k, e in iul_map.items():
+            if e.ocr and e.crc_hex and e.crc_hex.upper() not in crc_index:
+                fixed = crc_index.correct(e.crc_hex)
+                if fixed:
+                    ocr_fixed[k] = fixed
 
     pdf_lookup: Dict[str, str] = {}
     if pdf_paths:
@@ -48,53 +149,77 @@ def build_report_iul(
                 cand = stem.rsplit("_", 1)[0] + ".IFC"
                 pdf_lookup[cand] = p.name
 
-    iul_crc_index: Dict[str, List[str]] = {}
-    for k, e in iul_map.items():
-        if e.crc_hex:
-            iul_crc_index.setdefault(e.crc_hex.upper(), []).append(k)
+    recon = Reconciler(
+        iul_map,
+        lambda k, e: ocr_fixed.get(k) or (e.crc_hex.upper() if e.crc_hex else None),
+    )
+
+    hints = NameHints(recon.unclaimed(f.name for f in ifc_files))
+
+    timed_out = set(timed_out_pdfs or ())
+    reported_timeouts = set()
 
     for f in ifc_files:
+        if cancel is not None and cancel.cancelled:
+            return
         base = f.name
-        e = iul_map.get(base)
-        actual_crc_hex = f"{compute_crc32(f):08X}"
+        actual_crc_hex = actual_crcs.get(f) or f"{crc_of(f):08X}"
+        m = recon.match(base, actual_crc_hex)
+        e = m.entry
         actual_size = f.stat().st_size
-        actual_dt = _fmt_mtime(f.stat().st_mtime)
+        actual_dt = fmt_mtime(f.stat().st_mtime)
 
         name_match = None
         crc_match = None
         size_match = None
         dt_match = None
         pdf_name_ok = None
-        status: List[str] = []
+        status = Status(0)
         details: List[str] = []
 
         pdf_name_from_file = pdf_lookup.get(base.upper())
 
-        if e is None:
-            hits = iul_crc_index.get(actual_crc_hex, [])
-            if len(hits) == 1:
-                e = iul_map[hits[0]]
-                used.add(hits[0])
-                name_match = (e.basename == base)
-                if not name_match:
-                    status.append("NAME_MISMATCH")
-                    details.append(
-                        f"Сопоставлено по CRC-32, имя различается; ожидается {base}"
-                    )
-                crc_match = True
-            elif len(hits) > 1:
-                status.append("ERROR_IFC_EXTRA")
+        if m.by == BY_CRC:
+            name_match = (e.basename == base)
+            if not name_match:
+                status |= Status.NAME_MISMATCH
+                details.append(
+                    f"Сопоставлено по CRC-32, имя различается; ожидается {base}"
+                )
+            crc_match = True
+            if m.key in ocr_fixed:
+                status |= Status.CRC_OCR_CORRECTED
+                details.append(
+                    f"CRC-32 сопоставлен с поправкой на ошибку OCR: ИУЛ={e.crc_hex.upper()}, IFC={actual_crc_hex}"
+                )
+        elif e is None:
+            hint = None
+            if m.by == AMBIGUOUS:
+                status |= Status.ERROR_IFC_EXTRA
                 details.append(f"Найдено несколько записей в ИУЛ с тем же CRC ({actual_crc_hex})")
+                hint = hints.for_file(base)
+            elif pdf_name_from_file in timed_out:
+                reported_timeouts.add(pdf_name_from_file)
+                status |= Status.IUL_TIMEOUT
+                details.append(f"Разбор {pdf_name_from_file} прерван по лимиту времени")
             else:
-                status.append("ERROR_IFC_EXTRA")
+                status |= Status.ERROR_IFC_EXTRA
                 details.append(f"Файл есть, но отсутствует запись в ИУЛ; ожидается запись для {base}")
+                hint = hints.for_file(base)
+            if hint:
+                details.append(f"Похожая запись в ИУЛ: {hint[0]} (расстояние {hint[1]})")
         else:
-            used.add(base)
             name_match = True
             if e.crc_hex:
                 crc_match = (e.crc_hex.upper() == actual_crc_hex)
-                if not crc_match:
-                    status.append("CRC_MISMATCH")
+                if not crc_match and ocr_fixed.get(base) == actual_crc_hex:
+                    crc_match = True
+                    status |= Status.CRC_OCR_CORRECTED
+                    details.append(
+                        f"CRC-32 сопоставлен с поправкой на ошибку OCR: ИУЛ={e.crc_hex.upper()}, IFC={actual_crc_hex}"
+                    )
+                elif not crc_match:
+                    status |= Status.CRC_MISMATCH
                     details.append(f"CRC-32 не совпадает: ИУЛ={e.crc_hex.upper()}, IFC={actual_crc_hex}")
             else:
                 details.append(f"В ИУЛ отсутствует CRC-32; ожидается {actual_crc_hex}")
@@ -103,7 +228,7 @@ def build_report_iul(
             if e.size_bytes is not None:
                 size_match = (e.size_bytes == actual_size)
                 if not size_match:
-                    status.append("SIZE_MISMATCH")
+                    status |= Status.SIZE_MISMATCH
                     details.append(f"Размер не совпадает: ИУЛ={e.size_bytes}, IFC={actual_size}")
             else:
                 details.append(f"В ИУЛ отсутствует размер файла; ожидается {actual_size}")
@@ -111,7 +236,7 @@ def build_report_iul(
             if e.dt_str:
                 dt_match = (e.dt_str == actual_dt)
                 if not dt_match:
-                    status.append("DT_MISMATCH")
+                    status |= Status.DT_MISMATCH
                     details.append(f"Дата/время не совпадает: ИУЛ={e.dt_str}, IFC={actual_dt}")
             else:
                 details.append(f"В ИУЛ отсутствует дата/время; ожидается {actual_dt}")
@@ -119,69 +244,80 @@ def build_report_iul(
             if strict_pdf_name and e.source_pdf:
                 pdf_name_ok = pdf_name_ok_strict(base, e.source_pdf)
                 if not pdf_name_ok:
-                    status.append("PDF_NAME_MISMATCH")
+                    status |= Status.PDF_NAME_MISMATCH
                     expected_pdf = f"{Path(base).stem}_УЛ.pdf"
                     details.append(
                         f"Имя PDF не соответствует строгому правилу: {e.source_pdf}; ожидается {expected_pdf}"
                     )
 
         if not status and e is not None:
-            status.append("OK")
+            status = Status.OK
 
-        expected_pdf_name = f"{Path(base).stem}_УЛ.pdf"
         pdf_name = (
             e.source_pdf
             if (e and e.source_pdf)
             else (pdf_name_from_file or "Не найден")
         )
-        row = {
-            "Имя файла IFC": base,
-            "Имя PDF": pdf_name,
-            "Имя файла IFC из ИУЛ": (e.basename if e else None),
-            "CRC-32 ИУЛ": (e.crc_hex.upper() if (e and e.crc_hex) else None),
-            "CRC-32 IFC": actual_crc_hex,
-            "Дата/время ИУЛ": (e.dt_str if e else None),
-            "Дата/время IFC": actual_dt,
-            "Размер ИУЛ, байт": (e.size_bytes if e else None),
-            "Размер IFC, байт": actual_size,
-            "Имя совпадает": tri(name_match),
-            "CRC совпадает": tri(crc_match),
-            "Дата/время совпадает": tri(dt_match),
-            "Размер совпадает": tri(size_match),
-            "Статус": ";".join(status) if status else "—",
-            "Подробности": "; ".join(details) if details else None,
-            "recommendation": None,
-        }
-        rec = recommendation(status, RECOMMENDATIONS)
-        if rec:
-            rec = rec.format(expected=expected_pdf_name)
-        row["recommendation"] = rec
-        if include_pdf_name_col:
-            row[PDF_NAME_COL] = tri(pdf_name_ok)
-        rows.append(row)
-
-    for k, e in iul_map.items():
-        if k in used:
-            continue
-        row = {
-            "Имя файла IFC": None,
-            "Имя PDF": e.source_pdf,
-            "Имя файла IFC из ИУЛ": e.basename,
-            "CRC-32 ИУЛ": (e.crc_hex.upper() if e.crc_hex else None),
-            "CRC-32 IFC": None,
-            "Дата/время ИУЛ": e.dt_str,
-            "Дата/время IFC": None,
-            "Размер ИУЛ, байт": e.size_bytes,
-            "Размер IFC, байт": None,
-            "Имя совпадает": "—",
-            "CRC совпадает": "—",
-            "Дата/время совпадает": "—",
-            "Размер совпадает": "—",
-            "Статус": "ERROR_IUL_EXTRA",
-            "Подробности": f"Запись в ИУЛ есть, соответствующий файл не найден; ожидается файл {e.basename}",
-            "recommendation": RECOMMENDATIONS.get("ERROR_IUL_EXTRA"),
-        }
-        if include_pdf_name_col:
-            row[PDF_NAME_COL] = "—"
-        rows.append(row)
-    return rows
+        yield row_cls(
+            base,
+            pdf_name,
+            (e.basename if e else None),
+            (pack_crc(e.crc_hex) if e else None),
+            pack_crc(actual_crc_hex),
+            (e.dt_str if e else None),
+            actual_dt,
+            (e.size_bytes if e else None),
+            actual_size,
+            name_match,
+            crc_match,
+            dt_match,
+            size_match,
+            pdf_name_ok,
+            status,
+            details or None,
+        )
+
+    for k, e in recon.extras():
+        details = [f"Запись в ИУЛ есть, соответствующий файл не найден; ожидается файл {e.basename}"]
+        hint = hints.for_entry(e.basename)
+        if hint:
+            details.append(f"Похожий файл: {hint[0]} (расстояние {hint[1]})")
+        yield row_cls(
+            None, e.source_pdf, e.basename, pack_crc(e.crc_hex), None, e.dt_str, None,
+            e.size_bytes, None, None, None, None, None, None,
+            Status.ERROR_IUL_EXTRA,
+            details,
+        )
+
+    for name in sorted(timed_out - reported_timeouts):
+        yield row_cls(
+            None, name, None, None, None, None, None, None, None, None, None, None, None, None,
+            Status.IUL_TIMEOUT,
+            [f"Разбор {name} прерван по лимиту времени; записи ИУЛ не проверены"],
+        )
+
+
+def build_report_iul(
+    iul_map: Dict[str, IulEntry],
+    ifc_files: List[Path],
+    pdf_paths: Optional[List[Path]] = None,
+    *,
+    strict_pdf_name: bool = False,
+    include_pdf_name_col: bool | None = None,
+    ocr_crc_correction: bool = True,
+    timed_out_pdfs: Optional[Collection[str]] = None,
+    cancel: Optional[CancelToken] = None,
+    hasher: Optional[Callable[[Path], int]] = None,
+) -> List[IulRow]:
+    """Список строк ``iter_report_iul``."""
+    return list(iter_report_iul(
+        iul_map,
+        ifc_files,
+        pdf_paths,
+        strict_pdf_name=strict_pdf_name,
+        include_pdf_name_col=include_pdf_name_col,
+        ocr_crc_correction=ocr_crc_correction,
+        timed_out_pdfs=timed_out_pdfs,
+        cancel=cancel,
+        hasher=hasher,
+    ))
@@ -1,12 +1,51 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
 from pathlib import Path
-from typing import Dict, List
+from typing import Iterator, Callable, Dict, List, Optional
 
+from .cancel import CancelToken
 from .crc import compute_crc32
+from .fuzzy import NameHints
+from .reconcile import AMBIGUOUS, BY_CRC, Reconciler
+from .rows import ReportRow, Status, crc_text, details_text, pack_crc, status_text
 from .utils import tri
 
-def build_report_pdf_xml(xml_map: Dict[str, dict], pdf_files: List[Path], case_sensitive: bool = True) -> List[Dict]:
+
+class PdfXmlRow(ReportRow):
+    """Строка отчёта PDF↔XML."""
+
+    __slots__ = ("pdf_name", "xml_name", "xml_crc", "pdf_crc", "name_ok", "crc_ok")
+
+    def __init__(self, pdf_name, xml_name, xml_crc, pdf_crc, name_ok, crc_ok, status, details=None):
+        self.pdf_name = pdf_name
+        self.xml_name = xml_name
+        self.xml_crc = xml_crc
+        self.pdf_crc = pdf_crc
+        self.name_ok = name_ok
+        self.crc_ok = crc_ok
+        self.status = status
+        self.details = details
+
+    COLUMNS = {
+        "Имя файла IFC": lambda r: r.pdf_name,
+        "Имя файла IFC из XML": lambda r: r.xml_name,
+        "CRC-32 XML": lambda r: crc_text(r.xml_crc),
+        "CRC-32 PDF": lambda r: crc_text(r.pdf_crc),
+        "Имя совпадает": lambda r: tri(r.name_ok),
+        "CRC совпадает": lambda r: tri(r.crc_ok),
+        "Статус": lambda r: status_text(r.status),
+        "Подробности": details_text,
+    }
+
+
+def iter_report_pdf_xml(
+    xml_map: Dict[str, dict],
+    pdf_files: List[Path],
+    case_sensitive: bool = True,
+    *,
+    hasher: Optional[Callable[[Path], int]] = None,
+    cancel: Optional[CancelToken] = None,
+) -> Iterator[PdfXmlRow]:
     """Сравнение XML↔PDF:
       - Имя (строгое сравнение)
       - CRC-32
@@ -16,89 +55,103 @@ def build_report_pdf_xml(xml_map: Dict[str, dict], pdf_files: List[Path], case_s
       - CRC разные → CRC_MISMATCH
       - Есть совпадение по CRC, но имя отличается → NAME_MISMATCH (в одну строку)
       - Всё ок → OK
-    """
-    rows: List[Dict] = []
-    used_xml = set()
 
-    # Индекс: CRC из XML -> список имён
-    xml_crc_index: Dict[str, List[str]] = {}
-    for name, meta in xml_map.items():
-        crc = (meta.get("crc_hex") or "").upper()
-        if crc:
-            xml_crc_index.setdefault(crc, []).append(name)
+    ``hasher`` позволяет взять CRC-32 из общего ``PdfCache``, чтобы PDF,
+    которые затем разбираются как ИУЛ, не читались с диска повторно.
+    Строки выдаются по мере хэширования PDF; при отмене ``cancel``
+    генератор завершается, не дойдя до лишних записей XML.
+    Для несопоставленных PDF и записей в «Подробности» добавляется
+    ближайшее похожее имя с другой стороны.
+    """
+    crc_of = hasher if hasher is not None else compute_crc32
+    recon = Reconciler(
+        xml_map,
+        lambda name, meta: (meta.get("crc_hex") or "").upper() or None,
+        case_sensitive,
+    )
+    hints = NameHints(recon.unclaimed(f.name for f in pdf_files))
 
     for f in pdf_files:
+        if cancel is not None and cancel.cancelled:
+            return
         base = f.name
-        key = base if case_sensitive else base.lower()
-        meta = xml_map.get(key)
-        actual_crc_hex = f"{compute_crc32(f):08X}"
+        actual_crc = crc_of(f)
+        actual_crc_hex = f"{actual_crc:08X}"
+        m = recon.match(base, actual_crc_hex)
+        meta = meta_matched = m.entry
 
         name_match = None
         crc_match = None
-        status: List[str] = []
+        status = Status(0)
         details: List[str] = []
         xml_name_from_xml = base if meta else None
-        meta_matched = meta
-
-        if meta is None:
-            # пытаемся сопоставить по CRC
-            hits = xml_crc_index.get(actual_crc_hex, [])
-            if len(hits) == 1:
-                xml_name = hits[0]
-                xml_name_from_xml = xml_name
-                meta_matched = xml_map.get(xml_name)
-                used_xml.add(xml_name if case_sensitive else xml_name.lower())
-                name_match = (xml_name == base)
-                if not name_match:
-                    status.append("NAME_MISMATCH")
-                    details.append("Сопоставлено по CRC-32, имя различается")
-                crc_match = True
-            elif len(hits) > 1:
-                status.append("ERROR_PDF_EXTRA")
+
+        if m.by == BY_CRC:
+            xml_name_from_xml = m.key
+            name_match = (m.key == base)
+            if not name_match:
+                status |= Status.NAME_MISMATCH
+                details.append("Сопоставлено по CRC-32, имя различается")
+            crc_match = True
+        elif meta is None:
+            status |= Status.ERROR_PDF_EXTRA
+            if m.by == AMBIGUOUS:
                 details.append(f"Найдено несколько записей в XML с тем же CRC ({actual_crc_hex})")
             else:
-                status.append("ERROR_PDF_EXTRA")
                 details.append("Файл есть, но отсутствует запись в XML")
+            hint = hints.for_file(base)
+            if hint:
+                details.append(f"Похожая запись в XML: {hint[0]} (расстояние {hint[1]})")
         else:
-            used_xml.add(key)
             name_match = True
             xml_crc = (meta.get("crc_hex") or "").upper() or None
             if xml_crc:
                 crc_match = (xml_crc == actual_crc_hex)
                 if not crc_match:
-                    status.append("CRC_MISMATCH")
+                    status |= Status.CRC_MISMATCH
                     details.append(f"CRC-32 не совпадает: XML={xml_crc}, PDF={actual_crc_hex}")
             else:
                 details.append("В XML отсутствует CRC-32")
 
         if not status and name_match is True and (crc_match is True or crc_match is None):
-            status.append("OK")
-
-        rows.append({
-            "Имя файла IFC": base,
-            "Имя файла IFC из XML": xml_name_from_xml,
-            "CRC-32 XML": ((meta_matched.get('crc_hex') or '').upper() if meta_matched else None),
-            "CRC-32 PDF": actual_crc_hex,
-            "Имя совпадает": tri(name_match),
-            "CRC совпадает": tri(crc_match),
-            "Статус": ";".join(status) if status else "—",
-            "Подробности": "; ".join(details) if details else None,
-        })
+            status = Status.OK
+
+        yield PdfXmlRow(
+            base,
+            xml_name_from_xml,
+            (pack_crc(meta_matched.get("crc_hex")) if meta_matched else None),
+            actual_crc,
+            name_match,
+            crc_match,
+            status,
+            details or None,
+        )
 
     # Лишние записи в XML
-    for name, meta in xml_map.items():
-        k = name if case_sensitive else name.lower()
-        if k in used_xml:
-            continue
-        rows.append({
-            "Имя файла IFC": None,
-            "Имя файла IFC из XML": name,
-            "CRC-32 XML": (meta.get("crc_hex") or "").upper() or None,
-            "CRC-32 PDF": None,
-            "Имя совпадает": "—",
-            "CRC совпадает": "—",
-            "Статус": "ERROR_XML_EXTRA",
-            "Подробности": "Запись в XML есть, соответствующий файл не найден",
-        })
-
-    return rows
+    for name, meta in recon.extras():
+        details = ["Запись в XML есть, соответствующий файл не найден"]
+        hint = hints.for_entry(name)
+        if hint:
+            details.append(f"Похожий файл: {hint[0]} (расстояние {hint[1]})")
+        yield PdfXmlRow(
+            None,
+            name,
+            pack_crc(meta.get("crc_hex")),
+            None,
+            None,
+            None,
+            Status.ERROR_XML_EXTRA,
+            details,
+        )
+
+
+def build_report_pdf_xml(
+    xml_map: Dict[str, dict],
+    pdf_files: List[Path],
+    case_sensitive: bool = True,
+    *,
+    hasher: Optional[Callable[[Path], int]] = None,
+    cancel: Optional[CancelToken] = None,
+) -> List[PdfXmlRow]:
+    """Список строк ``iter_report_pdf_xml``."""
+    return list(iter_report_pdf_xml(xml_map, pdf_files, case_sensitive, hasher=hasher, cancel=cancel))
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""Запись отчётов в фоновом потоке, пока идут остальные проверки.
+
+``BackgroundWriter.submit`` ставит запись отчёта в очередь и сразу
+возвращает ``Future``; ошибки записи приходят вызывающему через
+``Future.result()``. Строки проверок, которые ещё идут, передаются через
+``RowSet``: писатель дожидается их, когда доходит до соответствующего листа.
+
+Отчёт сначала пишется во временный файл рядом с целевым и затем заменяет
+его (``os.replace``) — открытый в Excel отчёт не портится на полпути. Если
+целевой файл занят, ``Future.result()`` бросает ``ReportLocked``
+(подкласс ``PermissionError``): готовый отчёт остаётся во временном файле,
+и замену можно повторить (``retry``), когда файл закроют.
+"""
+from __future__ import annotations
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Iterator, List, Mapping, Optional, TypeVar
+import os
+import threading
+
+T = TypeVar("T")
+
+
+class RowSet:
+    """Строки отчёта, которые будут готовы позже.
+
+    Итерация блокируется до ``put`` (или до ``fail`` — тогда бросает
+    переданное исключение). ``None`` или пустой список — листа не будет.
+    """
+
+    def __init__(self) -> None:
+        self._ready = threading.Event()
+        self._rows: Optional[List[Mapping]] = None
+        self._error: Optional[BaseException] = None
+
+    def put(self, rows: Optional[List[Mapping]]) -> None:
+        if not self._ready.is_set():
+            self._rows = rows
+            self._ready.set()
+
+    def fail(self, exc: BaseException) -> None:
+        if not self._ready.is_set():
+            self._error = exc
+            self._ready.set()
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def __iter__(self) -> Iterator[Mapping]:
+        self._ready.wait()
+        if self._error is not None:
+            raise self._error
+        return iter(self._rows or ())
+
+
+class ReportLocked(PermissionError):
+    """Целевой файл отчёта занят; готовый отчёт лежит во временном файле."""
+
+    def __init__(self, out_path: Path, tmp_path: Path, result: Any):
+        super().__init__(f"Не удалось записать отчёт (возможно открыт): {out_path}")
+        self.out_path = out_path
+        self.tmp_path = tmp_path
+        self.result = result
+
+    def retry(self) -> Any:
+        """Повторяет замену; при успехе возвращает результат записи."""
+        os.replace(self.tmp_path, self.out_path)
+        return self.result
+
+    def discard(self) -> None:
+        try:
+            self.tmp_path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def temp_path(out_path: Path) -> Path:
+    """Временный файл отчёта — в той же папке, чтобы ``os.replace`` был атомарным."""
+    return out_path.with_name(f".{out_path.stem}.tmp{out_path.suffix}")
+
+
+class BackgroundWriter:
+    """Очередь записи отчётов в одном фоновом потоке."""
+
+    def __init__(self) -> None:
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="report-writer")
+
+    def submit(self, out_path: Path, save: Callable[[Path], T]) -> "Future[T]":
+        """Ставит в очередь ``save(path)`` — запись отчёта по пути ``path``.
+
+        Результат ``save`` возвращается через ``Future``; там же — ошибки
+        записи и ``ReportLocked``, если ``out_path`` занят.
+        """
+        return self._pool.submit(self._write, out_path, save)
+
+    @staticmethod
+    def _write(out_path: Path, save: Callable[[Path], T]) -> T:
+        tmp = temp_path(out_path)
+        try:
+            result = save(tmp)
+        except BaseException:
+            if tmp.exists():
+                tmp.unlink()
+            raise
+        try:
+            os.replace(tmp, out_path)
+        except PermissionError as e:
+            raise ReportLocked(out_path, tmp, result) from e
+        return result
+
+    def close(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
+
+    def __enter__(self) -> "BackgroundWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""Компактные строки отчётов.
+
+Строка хранит значения в слотах: CRC-32 — целым числом, совпадения — как
+``True/False/None``, статусы — битовыми флагами ``Status``. Подписи
+(«Да»/«Нет», шестнадцатеричный CRC, «CRC_MISMATCH;SIZE_MISMATCH»,
+рекомендации) формируются только при чтении по ключу — например, при
+записи XLSX. Для совместимости строка остаётся ``Mapping`` с прежними
+русскими ключами: ``row["Статус"]``, ``row.get("Подробности")``,
+``dict(row)``.
+"""
+from __future__ import annotations
+from collections.abc import Mapping
+from enum import IntFlag
+from typing import Any, Callable, ClassVar, Dict, Iterator, List, Optional, Union
+import re
+
+CrcValue = Union[int, str]
+
+_HEX8_RE = re.compile(r"[0-9A-Fa-f]{8}")
+
+
+class Status(IntFlag):
+    """Статусы строки. Порядок членов — порядок вывода в столбце «Статус»
+    (значения битов новых статусов идут после старых и с ним не связаны)."""
+
+    OK = 1
+    ERROR_IFC_EXTRA = 2
+    ERROR_PDF_EXTRA = 4
+    ERROR_XML_EXTRA = 8
+    ERROR_IUL_EXTRA = 16
+    IUL_TIMEOUT = 32
+    NO_XML_ENTRY = 4096
+    NO_IUL_ENTRY = 8192
+    NAME_MISMATCH = 64
+    CRC_OCR_CORRECTED = 128
+    CRC_MISMATCH = 256
+    XML_CRC_MISMATCH = 16384
+    IUL_CRC_MISMATCH = 32768
+    XML_IUL_MISMATCH = 65536
+    SIZE_MISMATCH = 512
+    DT_MISMATCH = 1024
+    PDF_NAME_MISMATCH = 2048
+
+
+_STATUS_ORDER = tuple(Status.__members__.values())
+
+
+def status_labels(flags: int) -> List[str]:
+    return [m.name for m in _STATUS_ORDER if flags & m]
+
+
+def status_text(flags: int) -> str:
+    return ";".join(status_labels(flags)) or "—"
+
+
+def pack_crc(value: Optional[str]) -> Optional[CrcValue]:
+    """CRC-32 из текста: 8 hex-цифр хранятся числом, прочее (ошибки OCR) — как есть."""
+    if not value:
+        return None
+    if _HEX8_RE.fullmatch(value):
+        return int(value, 16)
+    return value.upper()
+
+
+def crc_text(value: Optional[CrcValue]) -> Optional[str]:
+    if isinstance(value, int):
+        return f"{value:08X}"
+    return value
+
+
+class ReportRow(Mapping):
+    """База строк отчёта: значения в слотах, подписи — по запросу.
+
+    ``COLUMNS`` сопоставляет ключ прежней строки-словаря функции, которая
+    формирует значение из слотов.
+    """
+
+    __slots__ = ("status", "details")
+    COLUMNS: ClassVar[Dict[str, Callable[[Any], Any]]] = {}
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            render = self.COLUMNS[key]
+        except KeyError:
+            raise KeyError(key) from None
+        return render(self)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.COLUMNS)
+
+    def __len__(self) -> int:
+        return len(self.COLUMNS)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.as_dict()!r})"
+
+    @property
+    def ok(self) -> bool:
+        return self.status == Status.OK
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Строка в прежнем виде — словарь с русскими ключами."""
+        return {key: render(self) for key, render in self.COLUMNS.items()}
+
+
+def details_text(row: ReportRow) -> Optional[str]:
+    return "; ".join(row.details) if row.details else None
+
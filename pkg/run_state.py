@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+"""Состояние прошлого запуска для повторной проверки «с прошлого раза».
+
+Состояние хранится в JSON рядом с отчётами и содержит:
+
+* ``inputs`` — отпечаток входов: размер и mtime XML, всех IFC и PDF плюс
+  параметры проверки. Совпал отпечаток — ничего не изменилось, и запуск
+  можно не выполнять;
+* ``crcs`` — CRC-32 файлов IFC и PDF с их размером и mtime: неизменившиеся
+  файлы повторно не хэшируются (см. ``CrcCache``);
+* ``pdfs`` — записи, извлечённые из PDF с ИУЛ: неизменившиеся PDF повторно
+  не разбираются и не распознаются (см. ``IulEntryCache``);
+* ``reports`` — ключ, статус и подробности каждой строки каждого отчёта:
+  по ним строится лист «Изменения» (новые ошибки, исправленные, без
+  изменений).
+
+Повреждённый или устаревший файл состояния просто игнорируется.
+"""
+from __future__ import annotations
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+import json
+import logging
+import os
+
+from .crc import CrcCache
+from .iul_reader import IulEntry, IulEntryCache
+
+STATE_VERSION = 1
+DEFAULT_STATE_NAME = ".ifc_crc_state.json"
+
+# Столбцы, по которым строка узнаётся между запусками (первый непустой)
+KEY_COLUMNS = ("Имя файла IFC", "Имя файла IFC из XML", "Имя файла IFC из ИУЛ", "Имя PDF")
+
+# Виды изменений на листе «Изменения»
+NEW_ERROR = "Новая ошибка"
+CHANGED = "Ошибка изменилась"
+FIXED = "Исправлено"
+UNCHANGED = "Без изменений"
+
+
+def fingerprint(paths: Iterable[Path], options: Mapping[str, Any]) -> Dict[str, Any]:
+    """Размер и mtime каждого входного файла вместе с параметрами проверки."""
+    stats: Dict[str, List[int]] = {}
+    for p in paths:
+        try:
+            st = p.stat()
+        except OSError:
+            continue
+        stats[str(p)] = [st.st_size, st.st_mtime_ns]
+    return {"options": dict(options), "stats": stats}
+
+
+class RunState:
+    """Файл состояния: загрузка, кэши для построителей и сохранение."""
+
+    def __init__(self, path: Path, data: Optional[Dict[str, Any]] = None):
+        self.path = path
+        data = data or {}
+        self.inputs: Optional[Dict[str, Any]] = data.get("inputs")
+        self.outputs: List[str] = list(data.get("outputs") or [])
+        self.crcs: Dict[str, Dict[str, Any]] = dict(data.get("crcs") or {})
+        self.pdfs: Dict[str, Any] = dict(data.get("pdfs") or {})
+        self.reports: Dict[str, List[list]] = dict(data.get("reports") or {})
+
+    @classmethod
+    def load(cls, path: Path) -> "RunState":
+        try:
+            with path.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return cls(path)
+        except (OSError, ValueError) as e:
+            logging.warning("Файл состояния %s не прочитан (%s); проверка выполняется заново", path, e)
+            return cls(path)
+        if not isinstance(data, dict) or data.get("version") != STATE_VERSION:
+            return cls(path)
+        return cls(path, data)
+
+    def unchanged(self, inputs: Dict[str, Any]) -> bool:
+        """Входы те же, что в прошлый раз, и все отчёты прошлого запуска на месте."""
+        return (
+            self.inputs is not None
+            and self.inputs == inputs
+            and bool(self.outputs)
+            and all(Path(p).exists() for p in self.outputs)
+        )
+
+    # --- кэши -----------------------------------------------------------
+
+    def known_crcs(self, kind: str) -> Dict[str, Tuple[Tuple[int, int], int]]:
+        """CRC-32 группы файлов ``kind`` (``"ifc"``, ``"pdf"``) в виде ``known`` для ``CrcCache``."""
+        return {k: ((v[0], v[1]), v[2]) for k, v in (self.crcs.get(kind) or {}).items()}
+
+    def known_entries(self) -> Dict[str, Tuple[Tuple[int, int], List[IulEntry]]]:
+        """Записи ИУЛ в виде ``known`` для ``IulEntryCache``."""
+        return {
+            k: ((v[0], v[1]), [IulEntry(**e) for e in v[2]])
+            for k, v in self.pdfs.items()
+        }
+
+    def crc_cache(self, kind: str, compute=None) -> CrcCache:
+        """Кэш CRC-32 группы файлов ``kind`` (``"ifc"``, ``"pdf"``)."""
+        return CrcCache(self.known_crcs(kind), compute)
+
+    def entries_cache(self) -> IulEntryCache:
+        return IulEntryCache(self.known_entries())
+
+    def keep_crcs(self, kind: str, cache: CrcCache, paths: Iterable[Path]) -> None:
+        """Запоминает CRC-32 файлов ``paths`` (удалённые файлы забываются)."""
+        current = {str(p) for p in paths}
+        self.crcs[kind] = {
+            k: [ident[0], ident[1], crc] for k, (ident, crc) in cache.items() if k in current
+        }
+
+    def keep_entries(self, cache: IulEntryCache, paths: Iterable[Path]) -> None:
+        current = {str(p) for p in paths}
+        self.pdfs = {
+            k: [ident[0], ident[1], [asdict(e) for e in entries]]
+            for k, (ident, entries) in cache.items() if k in current
+        }
+
+    # --- строки отчётов ---------------------------------------------------
+
+    def recorder(self, report: str) -> "RowRecorder":
+        return RowRecorder(self.reports.get(report) or [])
+
+    def save(self, inputs: Dict[str, Any], outputs: Iterable[Path], reports: Mapping[str, "RowRecorder"]) -> None:
+        """Записывает состояние атомарно (временный файл + ``os.replace``)."""
+        self.inputs = inputs
+        self.outputs = [str(p) for p in outputs]
+        for name, rec in reports.items():
+            self.reports[name] = rec.rows
+        data = {
+            "version": STATE_VERSION,
+            "inputs": self.inputs,
+            "outputs": self.outputs,
+            "crcs": self.crcs,
+            "pdfs": self.pdfs,
+            "reports": self.reports,
+        }
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+
+def row_key(row: Mapping[str, Any]) -> Optional[str]:
+    for col in KEY_COLUMNS:
+        value = row.get(col)
+        if value:
+            return value
+    return None
+
+
+class RowRecorder:
+    """Запоминает ключ, статус и подробности строк, проходящих в отчёт."""
+
+    def __init__(self, previous: List[list]):
+        self.previous = previous
+        self.rows: List[list] = []
+
+    def record(self, rows: Iterable[Mapping[str, Any]]) -> Iterator[Mapping[str, Any]]:
+        """Отдаёт ``rows`` без изменений, попутно запоминая их."""
+        for r in rows:
+            self.rows.append([row_key(r), r.get("Статус"), r.get("Подробности")])
+            yield r
+
+    def changes(self) -> List[Tuple[str, Optional[str], Optional[str], Optional[str], Optional[str]]]:
+        """Строки листа «Изменения»: вид, ключ, прежний и новый статус, подробности.
+
+        Сначала новые и изменившиеся ошибки, затем исправленные, затем
+        строки без изменений — каждая группа в порядке отчёта.
+        """
+        before = {key: status for key, status, _ in self.previous}
+        seen = set()
+        groups: Dict[str, list] = {NEW_ERROR: [], CHANGED: [], FIXED: [], UNCHANGED: []}
+        for key, status, details in self.rows:
+            seen.add(key)
+            old = before.get(key)
+            if status == old:
+                kind = UNCHANGED
+            elif status == "OK":
+                kind = FIXED if old is not None else UNCHANGED
+            elif old is None or old == "OK":
+                kind = NEW_ERROR
+            else:
+                kind = CHANGED
+            groups[kind].append((kind, key, old, status, details))
+        for key, status, details in self.previous:
+            if key not in seen and status != "OK":
+                # Ошибочной строки больше нет в отчёте
+                groups[FIXED].append((FIXED, key, status, None, details))
+        return [c for kind in (NEW_ERROR, CHANGED, FIXED, UNCHANGED) for c in groups[kind]]
@@ -0,0 +1,563 @@
+# -*- coding: utf-8 -*-
+"""Проверка одного проекта: параметры, этапы конвейера и завершение.
+
+Общая часть CLI (в том числе ``--batch``) и службы проверок (``serve``):
+``plan_project`` проверяет входные данные проекта и добавляет его этапы в
+конвейер (``Pipeline``), а возвращённая им функция ``finish`` после работы
+конвейера закрывает журнал, сохраняет состояние ``--since-last`` и историю.
+
+Кэши, общие для проектов одного процесса (``SharedCaches``), живут дольше
+одного запуска: в пакете — на все проекты, в службе — на все задания.
+"""
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import argparse
+import logging
+import time
+
+from .cancel import CancelToken, OperationCancelled
+from .crc import CrcCache, compute_crc32
+from .history import DEFAULT_HISTORY_NAME, HistoryStore, RunRecorder
+from . import iul_reader
+from .iul_reader import IulEntryCache, extract_iul_entries
+from .journal import DEFAULT_JOURNAL_NAME, Journal, Replay, load_journal
+from .pdf_loader import DEFAULT_MAX_BYTES, PdfCache
+from .pipeline import CPU, IO, Pipeline
+from .report_builder import iter_report
+from .report_builder_consolidated import iter_report_consolidated
+from .report_builder_iul import iter_report_iul
+from .report_builder_pdf_xml import iter_report_pdf_xml
+from .run_state import DEFAULT_STATE_NAME, RunState, fingerprint
+from .scanner import collect_ifc_files, collect_pdf_files
+from .scheduler import MB, Scheduler
+from .workers import TimedProcessPool
+from .writers import FORMATS, report_path, write_report
+from .xml_reader import extract_from_xml, read_rules
+
+# Код выхода при прерывании по Ctrl+C (как у shell: 128 + SIGINT)
+EXIT_CANCELLED = 130
+
+RULES_PATH = Path(__file__).resolve().parent.parent / "rules.yaml"
+
+
+class InputError(Exception):
+    """Входные данные проекта не позволяют начать проверку."""
+
+
+class SharedCaches:
+    """Кэши, общие для всех проектов запуска.
+
+    Кэши проекта (со своими журналом и состоянием ``--since-last``)
+    обращаются к ним, когда сами значения не знают. Разобранные XML
+    запоминаются вместе с размером и mtime файла и правил ``rules.yaml``.
+    ``pool`` — постоянный пул процессов разбора ИУЛ (служба проверок);
+    без него каждый разбор запускает свои процессы.
+    """
+
+    def __init__(self, scheduler: Optional[Scheduler] = None, pool: Optional[TimedProcessPool] = None):
+        max_held = DEFAULT_MAX_BYTES
+        if scheduler is not None and scheduler.max_inflight_bytes:
+            max_held = min(max_held, scheduler.max_inflight_bytes)
+        self.pdf_cache = PdfCache(max_held, scheduler=scheduler)
+        self.ifc_crc = CrcCache(compute=lambda p: compute_crc32(p, scheduler=scheduler))
+        self.entries = IulEntryCache()
+        self.pool = pool
+        self._manifests: Dict[Tuple[str, bool], Tuple[tuple, Any]] = {}
+
+    def parse_xml(self, xml_path: Path, pdf: bool = False) -> Any:
+        """Разбор XML: записи IFC с подписями (``pdf=False``) или записи PDF."""
+        ident = (_ident(xml_path), _ident(RULES_PATH) if RULES_PATH.exists() else None)
+        key = (str(xml_path), pdf)
+        cached = self._manifests.get(key)
+        if cached is not None and cached[0] == ident:
+            return cached[1]
+        rules = read_rules(RULES_PATH)
+        if pdf:
+            rules["filter_format"] = "PDF"
+            parsed = extract_from_xml(xml_path, rules, case_sensitive=True)
+        else:
+            parsed = extract_from_xml(xml_path, rules, case_sensitive=True, include_sign_files=True)
+        self._manifests[key] = (ident, parsed)
+        return parsed
+
+
+def _ident(path: Path) -> Tuple[int, int]:
+    st = path.stat()
+    return st.st_size, st.st_mtime_ns
+
+
+@dataclass
+class ProjectResult:
+    """Итог проекта: код выхода, причина, если проект не проверен, и отчёты."""
+
+    name: str
+    code: Optional[int] = None
+    note: Optional[str] = None
+    reports: Dict[str, Tuple[Path, Dict[str, int]]] = field(default_factory=dict)
+
+
+def _hash_files(paths, hasher, cancel: CancelToken, workers: int = 1) -> None:
+    """Заполняет кэш CRC-32 заранее, чтобы отчёты брали готовые значения.
+
+    Файлы хэшируются в ``workers`` потоках (``--io-jobs``), как и в режиме
+    ``--fail-fast``; чтение по-прежнему ограничивает ``Scheduler``.
+    """
+    def hash_one(p: Path) -> None:
+        if not cancel.cancelled:
+            hasher(p)
+
+    if workers <= 1:
+        for p in paths:
+            hash_one(p)
+        return
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ifc-crc") as pool:
+        futures = [pool.submit(hash_one, p) for p in paths]
+        try:
+            for fut in as_completed(futures):
+                fut.result()
+        except BaseException:
+            # Ещё не начатые файлы снимаются
+            pool.shutdown(wait=True, cancel_futures=True)
+            raise
+
+
+def _checked(ifc_files, crc_cache: CrcCache, iul_map: Dict[str, Any]):
+    """После отмены: IFC, для которых готовы и CRC-32, и запись ИУЛ, и записи ИУЛ этих файлов.
+
+    Частичный отчёт содержит только проверенное: непосчитанные файлы и
+    неразобранные PDF не выдаются за лишние записи или файлы без ИУЛ.
+    """
+    files = [f for f in ifc_files if f in crc_cache and f.name in iul_map]
+    names = {f.name for f in files}
+    return files, {k: e for k, e in iul_map.items() if k in names}
+
+
+def default_state_path(args) -> Path:
+    """Файл состояния рядом с отчётами."""
+    if args.out:
+        return args.out.with_name(DEFAULT_STATE_NAME)
+    if args.xml:
+        return args.xml.with_name(DEFAULT_STATE_NAME)
+    return Path.cwd() / DEFAULT_STATE_NAME
+
+
+def _state_options(args) -> dict:
+    """Параметры, от которых зависят отчёты: при их смене проверка выполняется заново."""
+    return {
+        "checks": [args.check_xml, args.check_pdf_xml, args.check_iul, args.check_consolidated],
+        "pdf_name_strict": bool(args.pdf_name_strict),
+        "out": str(args.out) if args.out else None,
+        "format": args.format,
+        # Снятые по лимиту времени PDF и нераспознанные сканы перепроверяются,
+        # если лимиты выросли или появился OCR
+        "pdf_timeout": args.pdf_timeout,
+        "page_timeout": args.page_timeout,
+        "ocr": iul_reader.ocr_available(),
+    }
+
+
+def history_db_path(args) -> Path:
+    """База истории для ``--history``: указанный файл, ``DEFAULT_HISTORY_NAME``
+    в указанной папке или, без значения, рядом с отчётом."""
+    if args.history is None:
+        return default_state_path(args).with_name(DEFAULT_HISTORY_NAME)
+    if args.history.is_dir():
+        return args.history / DEFAULT_HISTORY_NAME
+    return args.history
+
+
+def project_name(args) -> str:
+    """Имя проекта в истории: ``--project`` или имя XML / папки IFC."""
+    return args.project or (args.xml.stem if args.xml else args.ifc_dir.name if args.ifc_dir else "default")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(description="IFC CRC Checker (CLI) — сверка XML↔IFC, PDF↔XML и/или ИУЛ(PDF)↔IFC с отчётами XLSX")
+    ap.add_argument("--ifc-dir", type=Path, help="Папка с IFC-файлами")
+    ap.add_argument("--recursive-ifc", action="store_true", help="Рекурсивно сканировать подпапки (IFC)")
+    ap.add_argument("--out", type=Path, help="Куда сохранить .xlsx (XML), по умолчанию рядом с XML или в CWD")
+    ap.add_argument("--max-rows", type=int, help="Делить XLSX-отчёт длиннее N строк на книги <имя>_001.xlsx, … (параллельно) с книгой-оглавлением")
+    ap.add_argument("--format", choices=sorted(FORMATS), default="xlsx", help="Формат отчётов: xlsx (по умолчанию), csv, jsonl или sqlite (расширение файла подставляется по формату)")
+
+    # XML↔IFC
+    ap.add_argument("--check-xml", action="store_true", help="Выполнить проверку XML↔IFC")
+    ap.add_argument("--xml", type=Path, help="Путь к XML с перечнем IFC/PDF")
+
+    # PDF↔XML
+    ap.add_argument("--check-pdf-xml", action="store_true", help="Выполнить проверку PDF↔XML")
+
+    # IUL
+    ap.add_argument("--check-iul", action="store_true", help="Выполнить проверку ИУЛ(PDF)↔IFC")
+    ap.add_argument("--iul", type=Path, nargs="*", help="Пути к PDF. Можно несколько")
+    ap.add_argument("--iul-dir", type=Path, help="Папка с PDF")
+    ap.add_argument("--recursive-pdf", action="store_true", help="Рекурсивно сканировать подпапки (PDF)")
+    ap.add_argument("--pdf-name-strict", action="store_true", help="Строгое правило имени PDF (…_УЛ.pdf)")
+    ap.add_argument("--pdf-timeout", type=float, help="Лимит времени на разбор одного PDF, сек (PDF снимается со статусом IUL_TIMEOUT)")
+    ap.add_argument("--page-timeout", type=float, help="Лимит времени OCR одной страницы, сек")
+    ap.add_argument("--pdf-workers", type=int, help="То же, что --ocr-jobs (оставлено для совместимости)")
+
+    # Ресурсы
+    add_resource_options(ap)
+
+    # XML↔ИУЛ↔IFC
+    ap.add_argument("--check-consolidated", action="store_true", help="Сводная проверка XML↔ИУЛ↔IFC за один проход (одна строка на IFC)")
+
+    # Повторная проверка
+    ap.add_argument("--since-last", action="store_true", help="Перепроверить только изменившиеся файлы (по состоянию прошлого запуска) и добавить лист «Изменения»")
+    ap.add_argument("--state", type=Path, help=f"Файл состояния для --since-last (по умолчанию {DEFAULT_STATE_NAME} рядом с отчётом)")
+
+    # Продолжение прерванного запуска
+    ap.add_argument("--resume", action="store_true", help="Продолжить прерванный запуск: взять из журнала уже посчитанные CRC и разобранные ИУЛ (неизменившихся файлов)")
+    ap.add_argument("--journal", type=Path, help=f"Файл журнала для --resume (по умолчанию {DEFAULT_JOURNAL_NAME} рядом с отчётом)")
+
+    # История запусков
+    # Без значения — база по умолчанию (const=None); без флага — история не пишется (False)
+    ap.add_argument("--history", type=Path, nargs="?", const=None, default=False, help=f"Дописать строки и итоги отчётов в базу истории (файл или папка; по умолчанию {DEFAULT_HISTORY_NAME} рядом с отчётом); запросы — main_cli.py history …")
+    ap.add_argument("--project", help="Имя проекта в истории (по умолчанию имя XML или папки IFC)")
+
+    # Пакетный режим
+    ap.add_argument("--batch", type=Path, help="Файл заданий YAML: несколько проектов за один запуск с общими процессами и кэшами")
+    ap.add_argument("--batch-report", type=Path, help="Куда сохранить оглавление пакета (по умолчанию <имя заданий>_index.xlsx)")
+
+    # CI
+    ap.add_argument("--fail-fast", action="store_true", help="Без отчётов: остановиться на первом расхождении (дешёвые проверки первыми) и вывести причину одной строкой JSON; код 1 при расхождении")
+
+    ap.add_argument("--force", action="store_true", help="Перезаписать отчёты, если файлы уже существуют")
+    ap.add_argument("-v", "--verbose", action="store_true", help="Подробные логи")
+
+    return ap
+
+
+def add_resource_options(ap: argparse.ArgumentParser) -> None:
+    """Параметры бюджета ресурсов (``make_scheduler``): общие для CLI и службы."""
+    ap.add_argument("--jobs", type=int, help="Общий лимит потоков и процессов (делится между --io-jobs и --ocr-jobs)")
+    ap.add_argument("--io-jobs", type=int, help="Потоки ввода-вывода: хэширование и запись отчётов (по умолчанию 4)")
+    ap.add_argument("--ocr-jobs", type=int, help="Процессы разбора ИУЛ/OCR и записи частей --max-rows (по умолчанию 1 для ИУЛ)")
+    ap.add_argument("--max-inflight-mb", type=float, help="Сколько МБ файлов читать и держать в памяти одновременно")
+    ap.add_argument("--read-mbps", type=float, help="Лимит скорости чтения файлов, МБ/с (чтобы не перегружать сетевое хранилище)")
+
+
+def make_scheduler(args) -> Scheduler:
+    """Бюджет ресурсов по параметрам ``--jobs`` и т.п.; ``ValueError`` при неверных значениях."""
+    return Scheduler(
+        jobs=args.jobs,
+        io_jobs=args.io_jobs,
+        ocr_jobs=args.ocr_jobs or getattr(args, "pdf_workers", None),
+        max_inflight_bytes=int(args.max_inflight_mb * MB) if args.max_inflight_mb else None,
+        read_rate=args.read_mbps * MB if args.read_mbps else None,
+    )
+
+
+def collect_inputs(args) -> Tuple[List[Path], List[Path]]:
+    """Файлы IFC и PDF проекта; без флагов проверок включает XML, PDF↔XML и ИУЛ.
+
+    Ошибки входных данных — ``InputError``.
+    """
+    if not (args.check_xml or args.check_iul or args.check_pdf_xml or args.check_consolidated):
+        args.check_xml = True
+        args.check_iul = True
+        args.check_pdf_xml = True
+
+    if args.check_xml or args.check_iul or args.check_consolidated:
+        if not args.ifc_dir or not args.ifc_dir.exists() or not args.ifc_dir.is_dir():
+            raise InputError("Папка с IFC не найдена/не является папкой: %s" % args.ifc_dir)
+        ifc_files = collect_ifc_files(args.ifc_dir, recursive=args.recursive_ifc)
+        if not ifc_files:
+            raise InputError("В папке не найдено файлов *.ifc")
+    else:
+        ifc_files = []
+
+    pdfs: List[Path] = []
+    if args.check_iul or args.check_pdf_xml or args.check_consolidated:
+        if args.iul:
+            pdfs.extend(args.iul)
+        if args.iul_dir and args.iul_dir.exists():
+            pdfs.extend(collect_pdf_files(args.iul_dir, recursive=args.recursive_pdf))
+        pdfs = sorted({p.resolve() for p in pdfs})
+
+    if args.check_xml and (not args.xml or not args.xml.exists()):
+        raise InputError("Указана проверка XML, но путь к XML не задан или файл не найден.")
+    if args.check_pdf_xml:
+        if not args.xml or not args.xml.exists():
+            raise InputError("Указана проверка PDF↔XML, но путь к XML не задан или файл не найден.")
+        if not pdfs:
+            raise InputError("Указана проверка PDF↔XML, но PDF не заданы/не найдены.")
+    if args.check_iul:
+        if not pdfs:
+            raise InputError("Указана проверка ИУЛ, но PDF не заданы/не найдены.")
+        if iul_reader.PdfReader is None:
+            raise InputError("Для чтения ИУЛ (PDF) требуется PyPDF2. Установите зависимости.")
+    if args.check_consolidated:
+        if not args.xml or not args.xml.exists():
+            raise InputError("Указана сводная проверка, но путь к XML не задан или файл не найден.")
+        if not pdfs:
+            raise InputError("Указана сводная проверка, но PDF с ИУЛ не заданы/не найдены.")
+    return ifc_files, pdfs
+
+
+def plan_project(args, pipe: Pipeline, sched: Scheduler, cancel: CancelToken, shared: SharedCaches,
+                 result: ProjectResult, prefix: str = "", isolate: bool = False):
+    """Проверяет входные данные проекта и добавляет его этапы в конвейер ``pipe``.
+
+    Возвращает функцию ``finish(completed) -> код выхода``, которую нужно
+    вызвать после ``pipe.run()``, или ``None``, если проверка не нужна
+    (отчёты актуальны; код — в ``result.code``). Ошибки входных данных —
+    ``InputError``. ``prefix`` — префикс имён этапов (проект пакета),
+    ``isolate`` — сбой этапа завершает только этот проект.
+    """
+    ifc_files, pdfs = collect_inputs(args)
+    state = None
+    if args.since_last:
+        state = RunState.load(args.state or default_state_path(args))
+        inputs = fingerprint(
+            [RULES_PATH, *([args.xml] if args.xml else []), *ifc_files, *pdfs],
+            _state_options(args),
+        )
+        if state.unchanged(inputs):
+            logging.info("С прошлого запуска ничего не изменилось, отчёты актуальны: %s", ", ".join(state.outputs))
+            result.code = 0
+            result.note = "Отчёты актуальны"
+            return None
+        args.force = True
+    journal_path = args.journal or default_state_path(args).with_name(DEFAULT_JOURNAL_NAME)
+    replay = Replay()
+    if args.resume:
+        replay = load_journal(journal_path)
+        if replay:
+            logging.info("Продолжение прерванного запуска: из журнала %s взято результатов: %s", journal_path, len(replay))
+        else:
+            logging.info("Журнал %s пуст или не найден; проверка выполняется полностью", journal_path)
+        # Отчёты прерванного запуска (возможно, неполные) перезаписываются
+        args.force = True
+    elif journal_path.exists():
+        logging.warning("Журнал прерванного запуска %s будет перезаписан (для продолжения используйте --resume)", journal_path)
+    recorders = {}
+    outputs: list[Path] = []
+    history = RunRecorder() if args.history is not False else None
+
+    def tracked(report, rows):
+        """Строки отчёта и источник листа «Изменения» (при --since-last)."""
+        if history is not None:
+            rows = history.record(report, rows)
+        if state is None:
+            return rows, None
+        rec = recorders[report] = state.recorder(report)
+        return rec.record(rows), (rec.changes if report in state.reports else None)
+
+    def write(report, rows, out, changes):
+        """Пишет отчёт и запоминает его итоги (для --history)."""
+        _, stats = write_report(
+            args.format, report, rows, out, changes=changes, max_rows=args.max_rows,
+            workers=sched.processes(None),
+        )
+        outputs.append(out)
+        result.reports[report] = (out, stats)
+        if history is not None:
+            history.add_stats(report, stats)
+        return stats
+
+    def out_path(path: Path) -> Path:
+        # XLSX-отчёты сохраняются по заданному пути как есть
+        return path if args.format == "xlsx" else report_path(path, args.format)
+
+    # Пути отчётов проверяются до запуска этапов
+    out_xml = out_pdf = out_iul = out_cons = None
+    if args.check_xml:
+        out_xml = out_path(args.out or args.xml.with_name("ifc_crc_report.xlsx"))
+        if out_xml.exists() and not args.force:
+            raise InputError("Файл отчёта (XML) уже существует: %s. Запустите с --force для перезаписи." % out_xml)
+    if args.check_pdf_xml:
+        out_pdf = out_path((args.out or args.xml.with_name("pdf_xml_report.xlsx")).with_name("pdf_xml_report.xlsx"))
+        if out_pdf.exists() and not args.force:
+            raise InputError("Файл отчёта (PDF↔XML) уже существует: %s. Запустите с --force для перезаписи." % out_pdf)
+    if args.check_iul:
+        if args.xml:
+            out_iul = (args.out or args.xml.with_name("ifc_crc_report.xlsx"))
+            out_iul = out_iul.with_name(out_iul.stem.replace('.xlsx','') + "_iul.xlsx")
+        else:
+            out_iul = Path.cwd() / "ifc_crc_report_iul.xlsx"
+        out_iul = out_path(out_iul)
+        if out_iul.exists() and not args.force:
+            raise InputError("Файл отчёта (IUL) уже существует: %s. Запустите с --force для перезаписи." % out_iul)
+    if args.check_consolidated:
+        out_cons = (args.out or args.xml.with_name("ifc_crc_report.xlsx"))
+        out_cons = out_path(out_cons.with_name(out_cons.stem + "_consolidated.xlsx"))
+        if out_cons.exists() and not args.force:
+            raise InputError("Файл отчёта (сводный) уже существует: %s. Запустите с --force для перезаписи." % out_cons)
+
+    # Неизменившиеся с прошлого запуска (--since-last) и уже обработанные в
+    # прерванном запуске (--resume) файлы не хэшируются и не разбираются заново
+    known_ifc = state.known_crcs("ifc") if state is not None else {}
+    known_pdf = state.known_crcs("pdf") if state is not None else {}
+    known_entries = state.known_entries() if state is not None else {}
+    known_ifc.update(replay.crcs.get("ifc", {}))
+    known_pdf.update(replay.crcs.get("pdf", {}))
+    known_entries.update(replay.pdfs)
+
+    started = time.time()
+    if not args.resume and journal_path.exists():
+        journal_path.unlink()
+    journal = Journal(journal_path)
+    # Общий кэш: PDF, прочитанные для PDF↔XML, не читаются заново при разборе ИУЛ
+    pdf_cache = shared.pdf_cache
+    # Общий кэш CRC-32: каждый IFC хэшируется один раз на все проверки (и проекты)
+    crc_cache = CrcCache(known_ifc, shared.ifc_crc, record=journal.recorder("ifc"))
+    pdf_crc = CrcCache(known_pdf, pdf_cache.crc32, record=journal.recorder("pdf"))
+    entries_cache = IulEntryCache(known_entries, record=journal.recorder("iul"), shared=shared.entries)
+    timed_out: set = set()
+
+    def report_xml(parsed, _):
+        xml_map, xml_pdf = parsed
+        rows_xml, changes = tracked("xml", iter_report(xml_map, ifc_files, case_sensitive=True, cancel=cancel, hasher=crc_cache))
+        stats_xml = write("xml", rows_xml, out_xml, changes)
+        logging.info("Готово (XML). Отчёт: %s | Итоги: %s | Подписей PDF: %s", out_xml, stats_xml, len(xml_pdf))
+        if cancel.cancelled:
+            logging.warning("Проверка прервана; отчёт (XML) неполный: %s", out_xml)
+
+    def rows_pdf_xml(xml_pdf_map):
+        # Строк по одной на PDF немного: они собираются целиком, чтобы разбор
+        # ИУЛ (те же PDF из PdfCache) не ждал записи отчёта
+        rows_pdf, changes = tracked("pdf_xml", iter_report_pdf_xml(
+            xml_pdf_map, pdfs, case_sensitive=True, hasher=pdf_crc, cancel=cancel
+        ))
+        return list(rows_pdf), changes
+
+    def report_pdf_xml(built):
+        rows_pdf, changes = built
+        stats_pdf = write("pdf_xml", rows_pdf, out_pdf, changes)
+        logging.info("Готово (PDF↔XML). Отчёт: %s | Итоги: %s", out_pdf, stats_pdf)
+        if cancel.cancelled:
+            logging.warning("Проверка прервана; отчёт (PDF↔XML) неполный: %s", out_pdf)
+
+    def parse_iul(*_):
+        return extract_iul_entries(
+            pdfs,
+            pdf_cache=pdf_cache,
+            cancel=cancel,
+            doc_timeout=args.pdf_timeout,
+            page_timeout=args.page_timeout,
+            workers=sched.processes(1),
+            timed_out=timed_out,
+            entries_cache=entries_cache,
+            pool=shared.pool,
+        )
+
+    def report_iul(iul_map, _):
+        files, entries, stop = ifc_files, iul_map, cancel
+        if cancel.cancelled:
+            # Прервано до сверки (например, во время разбора ИУЛ) — сверяется готовое
+            files, entries = _checked(ifc_files, crc_cache, iul_map)
+            stop = None
+        rows_iul, changes = tracked("iul", iter_report_iul(
+            entries,
+            files,
+            pdfs,
+            strict_pdf_name=bool(args.pdf_name_strict),
+            timed_out_pdfs=timed_out,
+            cancel=stop,
+            hasher=crc_cache,
+        ))
+        stats_iul = write("iul", rows_iul, out_iul, changes)
+        logging.info("Готово (IUL). Отчёт: %s | Итоги: %s", out_iul, stats_iul)
+        if cancel.cancelled:
+            logging.warning("Проверка прервана; отчёт (IUL) неполный: %s", out_iul)
+
+    def report_consolidated(parsed, iul_map, _):
+        xml_map, files, entries, stop = parsed[0], ifc_files, iul_map, cancel
+        if cancel.cancelled:
+            files, entries = _checked(ifc_files, crc_cache, iul_map)
+            xml_map = {k: m for k, m in xml_map.items() if k in entries}
+            stop = None
+        rows_cons, changes = tracked("consolidated", iter_report_consolidated(
+            xml_map, entries, files, case_sensitive=True, hasher=crc_cache, cancel=stop
+        ))
+        stats_cons = write("consolidated", rows_cons, out_cons, changes)
+        logging.info("Готово (сводная). Отчёт: %s | Итоги: %s", out_cons, stats_cons)
+        if cancel.cancelled:
+            logging.warning("Проверка прервана; сводный отчёт неполный: %s", out_cons)
+
+    failed: list = []
+
+    def add(name, fn, deps=(), kind=IO, salvage=False):
+        """Этап проекта в общем конвейере; в пакете сбой этапа останавливает только свой проект."""
+        if isolate:
+            inner = fn
+
+            def fn(*deps_results):
+                if failed:
+                    return None
+                try:
+                    return inner(*deps_results)
+                except OperationCancelled:
+                    raise
+                except Exception as e:  # noqa: BLE001 - остальные проекты продолжаются
+                    logging.exception("Проект %s: сбой этапа %s", result.name, name)
+                    failed.append(e)
+                    return None
+        pipe.add(prefix + name, fn, deps=[prefix + d for d in deps], kind=kind, salvage=salvage)
+
+    # Хэширование IFC (ввод-вывод) идёт одновременно с разбором ИУЛ (процессор);
+    # каждый отчёт пишется, как только готовы его входные данные. После
+    # Ctrl+C отчёты PDF↔XML, ИУЛ и сводный пишутся по готовому (частичные).
+    if ifc_files:
+        add("ifc_crc", lambda: _hash_files(ifc_files, crc_cache, cancel, sched.io_jobs))
+    if args.check_xml or args.check_consolidated:
+        add("xml", lambda: shared.parse_xml(args.xml))
+    if args.check_xml:
+        add("xml_report", report_xml, deps=("xml", "ifc_crc"))
+    if args.check_pdf_xml:
+        add("xml_pdf", lambda: shared.parse_xml(args.xml, pdf=True))
+        add("pdf_xml_rows", rows_pdf_xml, deps=("xml_pdf",))
+        add("pdf_xml_report", report_pdf_xml, deps=("pdf_xml_rows",), salvage=True)
+    if args.check_iul or args.check_consolidated:
+        # После сверки PDF↔XML: PDF уже в памяти (PdfCache) и не читаются повторно;
+        # отчёт PDF↔XML тем временем пишется в фоне
+        add("iul", parse_iul, deps=("pdf_xml_rows",) if args.check_pdf_xml else (), kind=CPU)
+    if args.check_iul:
+        add("iul_report", report_iul, deps=("iul", "ifc_crc"), salvage=True)
+    if args.check_consolidated:
+        add("consolidated_report", report_consolidated, deps=("xml", "iul", "ifc_crc"), salvage=True)
+
+    def finish(completed: bool) -> int:
+        """Завершает проект после работы конвейера; возвращает код выхода."""
+        if failed:
+            result.note = f"Сбой: {failed[0]}"
+            completed = False
+        if completed:
+            journal.discard()
+        else:
+            journal.close()
+            logging.info("Для продолжения запустите с --resume (журнал: %s)", journal_path)
+        if not completed:
+            result.code = 2 if failed else EXIT_CANCELLED
+            result.note = result.note or "Прервано"
+            return result.code
+
+        if state is not None:
+            state.keep_crcs("ifc", crc_cache, ifc_files)
+            state.keep_crcs("pdf", pdf_crc, pdfs)
+            state.keep_entries(entries_cache, pdfs)
+            state.save(inputs, outputs, recorders)
+            logging.info("Состояние сохранено: %s", state.path)
+        if history is not None:
+            history_path = history_db_path(args)
+            with HistoryStore(history_path) as store:
+                run_id = store.add_run(args.project or result.name, started, len(ifc_files) + len(pdfs), history)
+            logging.info("Запуск %s (проект %s) записан в историю: %s", run_id, args.project or result.name, history_path)
+        result.code = 0
+        return 0
+
+    return finish
+
+
+def run_pipeline(pipe: Pipeline, cancel: CancelToken) -> bool:
+    """Выполняет конвейер; ``True``, если он дошёл до конца без отмены."""
+    try:
+        pipe.run()
+        return not cancel.cancelled
+    except OperationCancelled:
+        logging.warning("Проверка прервана; отчёты незавершённых этапов не сохранены")
+        return False
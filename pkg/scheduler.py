@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""Общий бюджет ресурсов запуска: потоки, процессы, память и полоса чтения.
+
+Все параллельные части CLI берут исполнителей из одного ``Scheduler``:
+
+* ``io_jobs`` — потоки этапов ввода-вывода (хэширование, запись отчётов);
+* ``ocr_jobs`` — процессы разбора PDF и OCR (и записи частей ``--max-rows``);
+* ``jobs`` — общий лимит: если задан только он, делится между ними пополам.
+
+Чтение файлов (CRC-32, загрузка PDF) проходит через ``reserve`` и
+``throttle``: одновременно читается не больше ``max_inflight_bytes`` байт,
+а суммарная скорость чтения не превышает ``read_rate`` байт/с — так проверку
+можно запускать в рабочее время, не забивая общее сетевое хранилище.
+PDF, которые рабочие процессы читают сами (не из кэша), лимитом полосы не
+учитываются.
+"""
+from __future__ import annotations
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional
+import threading
+import time
+
+from .pipeline import CPU, DEFAULT_WORKERS, IO
+
+MB = 1024 * 1024
+
+
+class Scheduler:
+    """Бюджет исполнителей и чтения на весь запуск (общий для всех этапов)."""
+
+    def __init__(
+        self,
+        jobs: Optional[int] = None,
+        io_jobs: Optional[int] = None,
+        ocr_jobs: Optional[int] = None,
+        max_inflight_bytes: Optional[int] = None,
+        read_rate: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        for name, value in (("jobs", jobs), ("io_jobs", io_jobs), ("ocr_jobs", ocr_jobs),
+                            ("max_inflight_bytes", max_inflight_bytes), ("read_rate", read_rate)):
+            if value is not None and value <= 0:
+                raise ValueError(f"{name} должно быть больше нуля: {value}")
+        if jobs is not None:
+            if io_jobs is None and ocr_jobs is None:
+                ocr_jobs = max(1, jobs // 2)
+            if io_jobs is None:
+                io_jobs = max(1, jobs - ocr_jobs)
+            elif ocr_jobs is None:
+                ocr_jobs = max(1, jobs - io_jobs)
+            # По одному исполнителю каждого вида нужно всегда
+            if io_jobs + ocr_jobs > max(jobs, 2):
+                raise ValueError(f"io_jobs + ocr_jobs ({io_jobs} + {ocr_jobs}) больше jobs ({jobs})")
+        self.jobs = jobs
+        self.io_jobs = io_jobs or DEFAULT_WORKERS[IO]
+        self._ocr_jobs = ocr_jobs
+        self.max_inflight_bytes = max_inflight_bytes
+        self.read_rate = read_rate
+        self._clock = clock
+        self._sleep = sleep
+        self._cond = threading.Condition()
+        self._inflight = 0
+        self._bucket_lock = threading.Lock()
+        self._tokens = float(read_rate or 0)
+        self._last = clock()
+
+    def stage_workers(self) -> Dict[str, int]:
+        """Исполнители ``Pipeline``: этап CPU один — процессы он берёт сам (``processes``)."""
+        return {IO: self.io_jobs, CPU: 1}
+
+    def processes(self, default: Optional[int]) -> Optional[int]:
+        """Число рабочих процессов; ``default`` — если бюджет не задан."""
+        return self._ocr_jobs or default
+
+    @contextmanager
+    def reserve(self, nbytes: int) -> Iterator[None]:
+        """Занимает ``nbytes`` из бюджета одновременного чтения на время блока.
+
+        Запрос больше всего бюджета ждёт, пока не освободится весь бюджет.
+        """
+        if self.max_inflight_bytes is None:
+            yield
+            return
+        n = min(nbytes, self.max_inflight_bytes)
+        with self._cond:
+            while self._inflight + n > self.max_inflight_bytes:
+                self._cond.wait()
+            self._inflight += n
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._inflight -= n
+                self._cond.notify_all()
+
+    def throttle(self, nbytes: int) -> None:
+        """Учитывает ``nbytes`` прочитанных байт; ждёт, если превышена полоса.
+
+        Ведро токенов ёмкостью в одну секунду чтения: короткий всплеск
+        проходит сразу, долгое чтение выравнивается до ``read_rate``.
+        """
+        if self.read_rate is None:
+            return
+        with self._bucket_lock:
+            now = self._clock()
+            self._tokens = min(self.read_rate, self._tokens + (now - self._last) * self.read_rate)
+            self._last = now
+            self._tokens -= nbytes
+            delay = -self._tokens / self.read_rate if self._tokens < 0 else 0.0
+        if delay > 0:
+            self._sleep(delay)
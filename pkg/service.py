@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+"""Служба проверок: долгоживущий процесс с тёплыми кэшами (``main_cli.py serve``).
+
+Запуск CLI на каждую проверку платит за импорт openpyxl, PyMuPDF, PyPDF2 и
+pytesseract, настройку Tesseract и заново хэширует все файлы. Служба
+делает это один раз: между заданиями живут пул процессов разбора ИУЛ,
+кэши CRC-32, PDF и записей ИУЛ и разобранные XML (``runner.SharedCaches``;
+изменившиеся файлы проверяются заново — записи сверяются с размером и mtime).
+
+Служба слушает HTTP только на 127.0.0.1 (или Unix-сокет)::
+
+    POST /check   тело — JSON с параметрами проекта, как в файле заданий
+                  --batch: {"xml": "...", "ifc-dir": "...", "check-iul": true, ...}
+    GET  /status  {"jobs": …, "busy": …, "caches": {…}}
+
+Ответ на ``/check`` — поток событий NDJSON (по объекту на строку), пока
+задание выполняется::
+
+    {"event": "queued", "job": 1}
+    {"event": "started", "job": 1}
+    {"event": "stage", "stage": "xml_report", "state": "started"}
+    {"event": "log", "level": "INFO", "message": "Готово (XML). …"}
+    {"event": "report", "report": "xml", "path": "…", "stats": {…}}
+    {"event": "done", "job": 1, "code": 0, "note": null}
+
+Задания выполняются по очереди и делят бюджет ``--jobs``; параметры
+ресурсов задаются при запуске службы. Если клиент отключился, его задание
+отменяется.
+"""
+from __future__ import annotations
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, Mapping, Optional
+import itertools
+import json
+import logging
+import socketserver
+import threading
+
+from .batch import options_argv
+from .cancel import CancelToken
+from .pipeline import Pipeline
+from .runner import InputError, ProjectResult, SharedCaches, build_parser, plan_project, project_name, run_pipeline
+from .scheduler import Scheduler
+from .workers import TimedProcessPool
+
+DEFAULT_PORT = 8765
+
+Event = Dict[str, Any]
+
+
+class _EventLog(logging.Handler):
+    """Передаёт сообщения журнала клиенту как события ``log``."""
+
+    def __init__(self, emit: Callable[[Event], None]):
+        super().__init__(logging.INFO)
+        self._emit = emit
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self._emit({"event": "log", "level": record.levelname, "message": record.getMessage()})
+
+
+def _option_error(message: str) -> None:
+    raise InputError(message)
+
+
+class CheckService:
+    """Выполняет задания проверки с кэшами, общими для всех заданий.
+
+    Задание — параметры проекта, как в файле заданий ``--batch``, включая
+    ``name`` — имя проекта (по умолчанию имя XML или папки IFC).
+    """
+
+    def __init__(self, scheduler: Optional[Scheduler] = None):
+        self.scheduler = scheduler or Scheduler()
+        self.parser = build_parser()
+        # Ошибка в параметрах задания уходит клиенту, а не в stderr службы
+        self.parser.error = _option_error  # type: ignore[method-assign]
+        self.shared = SharedCaches(
+            self.scheduler, pool=TimedProcessPool(self.scheduler.processes(1), persistent=True)
+        )
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._done = threading.Lock()
+        self.jobs = 0
+
+    @property
+    def busy(self) -> bool:
+        """Занята ли очередь заданий (``run_job``)."""
+        return self._lock.locked()
+
+    def status(self) -> Event:
+        return {
+            "jobs": self.jobs,
+            "busy": self.busy,
+            "caches": {
+                "ifc_crc": len(self.shared.ifc_crc),
+                "iul_pdfs": len(self.shared.entries),
+            },
+        }
+
+    def run_job(
+        self,
+        options: Mapping[str, Any],
+        emit: Callable[[Event], None],
+        cancel: Optional[CancelToken] = None,
+    ) -> int:
+        """Ставит задание ``options`` в очередь службы, передавая события в ``emit``; возвращает код выхода."""
+        job = next(self._ids)
+        emit({"event": "queued", "job": job})
+        with self._lock:
+            log = _EventLog(emit)
+            logging.getLogger().addHandler(log)
+            try:
+                return self.execute(options, emit, cancel, job=job).code
+            finally:
+                logging.getLogger().removeHandler(log)
+
+    def execute(
+        self,
+        options: Mapping[str, Any],
+        emit: Callable[[Event], None],
+        cancel: Optional[CancelToken] = None,
+        base: Optional[Path] = None,
+        job: Optional[int] = None,
+    ) -> ProjectResult:
+        """Выполняет задание сразу, без очереди; можно из нескольких потоков одновременно.
+
+        ``base`` — от какой папки считать относительные пути (по умолчанию текущая).
+        """
+        cancel = cancel or CancelToken()
+        job = job if job is not None else next(self._ids)
+        emit({"event": "started", "job": job})
+        try:
+            result = self._run(options, emit, cancel, base or Path.cwd())
+        except Exception as e:  # noqa: BLE001 - служба продолжает работу
+            logging.exception("Задание %s: сбой", job)
+            result = ProjectResult(str(job), 2, f"Сбой: {e}")
+        finally:
+            with self._done:
+                self.jobs += 1
+        emit({"event": "done", "job": job, "code": result.code, "note": result.note})
+        return result
+
+    def _run(self, options: Mapping[str, Any], emit: Callable[[Event], None], cancel: CancelToken,
+             base: Path) -> ProjectResult:
+        options = dict(options)
+        name = options.pop("name", None)
+        try:
+            args = self.parser.parse_args(options_argv(options, base))
+        except InputError as e:
+            return ProjectResult(str(name or ""), 2, f"Неверные параметры задания: {e}")
+        except SystemExit:
+            return ProjectResult(str(name or ""), 2, "Неверные параметры задания")
+        pipe = Pipeline(
+            self.scheduler.stage_workers(),
+            cancel=cancel,
+            listener=lambda name, state: emit({"event": "stage", "stage": name, "state": state}),
+        )
+        result = ProjectResult(str(name) if name else project_name(args))
+        try:
+            finish = plan_project(args, pipe, self.scheduler, cancel, self.shared, result, isolate=True)
+        except InputError as e:
+            result.code, result.note = 2, str(e)
+            return result
+        if finish is not None:
+            finish(run_pipeline(pipe, cancel))
+        for report, (path, stats) in result.reports.items():
+            emit({"event": "report", "report": report, "path": str(path), "stats": stats})
+        return result
+
+    def close(self) -> None:
+        if self.shared.pool is not None:
+            self.shared.pool.close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # Ответ на /check — поток до закрытия соединения
+    protocol_version = "HTTP/1.0"
+
+    @property
+    def service(self) -> CheckService:
+        return self.server.service  # type: ignore[attr-defined]
+
+    def _json(self, code: int, data: Event) -> None:
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        if self.path.rstrip("/") == "/status":
+            self._json(200, self.service.status())
+        else:
+            self._json(404, {"error": "not found"})
+
+    def do_POST(self) -> None:
+        if self.path.rstrip("/") != "/check":
+            self._json(404, {"error": "not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            options = json.loads(self.rfile.read(length) or b"{}")
+        except (ValueError, UnicodeDecodeError) as e:
+            self._json(400, {"error": f"Неверный JSON: {e}"})
+            return
+        if not isinstance(options, dict):
+            self._json(400, {"error": "Задание — объект JSON с параметрами проекта"})
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+        self.end_headers()
+
+        cancel = CancelToken()
+        lock = threading.Lock()
+
+        def emit(event: Event) -> None:
+            data = (json.dumps(event, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+            with lock:
+                if cancel.cancelled:
+                    return
+                try:
+                    self.wfile.write(data)
+                    self.wfile.flush()
+                except OSError:
+                    # Клиент отключился — результат никто не ждёт
+                    cancel.cancel()
+
+        self.service.run_job(options, emit, cancel)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logging.debug("serve: " + format, *args)
+
+
+class _HttpServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+if hasattr(socketserver, "UnixStreamServer"):
+    class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+else:  # pragma: no cover - Windows
+    _UnixServer = None  # type: ignore
+
+
+def make_server(service: CheckService, host: str = "127.0.0.1", port: int = DEFAULT_PORT,
+                socket_path: Optional[Path] = None) -> socketserver.BaseServer:
+    """Сервер службы: HTTP на ``host:port`` или на Unix-сокете ``socket_path``."""
+    if socket_path is not None:
+        if _UnixServer is None:
+            raise OSError("Unix-сокеты не поддерживаются в этой системе")
+        if socket_path.exists():
+            socket_path.unlink()
+        server = _UnixServer(str(socket_path), _Handler)
+    else:
+        server = _HttpServer((host, port), _Handler)
+    server.service = service  # type: ignore[attr-defined]
+    return server
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
 from typing import List, Dict, Optional
+import time
 
 
 def tri(v: Optional[bool]) -> str:
@@ -26,3 +27,15 @@ def recommendation(status: List[str], mapping: Dict[str, str]) -> Optional[str]:
     """
     recs = [mapping.get(s) for s in status if mapping.get(s)]
     return "; ".join(recs) if recs else None
+
+
+def fmt_mtime(ts: float) -> str:
+    """Format a file mtime the way IUL lists it: ``ДД.ММ.ГГГГ ЧЧ:ММ`` (local time).
+
+    Parameters
+    ----------
+    ts: float
+        Timestamp, e.g. ``path.stat().st_mtime``.
+    """
+    t = time.localtime(ts)
+    return f"{t.tm_mday:02d}.{t.tm_mon:02d}.{t.tm_year:04d} {t.tm_hour:02d}:{t.tm_min:02d}"
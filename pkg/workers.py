@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""Пул рабочих процессов с лимитом времени на задачу.
+
+Зависший PdfReader или OCR нельзя прервать внутри процесса, поэтому каждый
+документ обрабатывается в отдельном рабочем процессе: если задача не уложилась
+в лимит, процесс завершается и заменяется новым, а остальные задачи
+продолжаются.
+"""
+from __future__ import annotations
+from multiprocessing.connection import wait
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+import multiprocessing
+import threading
+import time
+
+from .cancel import CancelToken, OperationCancelled, TimeBudgetExceeded
+
+# Как часто проверять флаг отмены, пока задачи выполняются
+POLL_INTERVAL = 0.2
+
+_NO_ITEM = object()
+
+
+def _worker_main(conn) -> None:
+    while True:
+        try:
+            task = conn.recv()
+        except (EOFError, OSError):
+            return
+        if task is None:
+            return
+        fn, arg = task
+        try:
+            conn.send((True, fn(arg)))
+        except Exception as exc:
+            # Ошибка задачи уходит родителю; Ctrl+C и SystemExit завершают процесс
+            try:
+                conn.send((False, exc))
+            except Exception:
+                conn.send((False, RuntimeError(repr(exc))))
+
+
+class _Slot:
+    def __init__(self, ctx):
+        self._ctx = ctx
+        self.process = None
+        self.conn = None
+        self.item: Any = None
+        self.started = 0.0
+        self.busy = False
+        self._spawn()
+
+    def _spawn(self) -> None:
+        parent, child = self._ctx.Pipe()
+        self.process = self._ctx.Process(target=_worker_main, args=(child,), daemon=True)
+        self.process.start()
+        child.close()
+        self.conn = parent
+
+    def submit(self, fn: Callable[[Any], Any], item: Any) -> None:
+        self.conn.send((fn, item))
+        self.item = item
+        self.started = time.monotonic()
+        self.busy = True
+
+    def kill(self, respawn: bool = True) -> None:
+        try:
+            self.process.terminate()
+            self.process.join(5)
+            if self.process.is_alive():
+                self.process.kill()
+                self.process.join()
+        finally:
+            self.conn.close()
+            self.busy = False
+        if respawn:
+            self._spawn()
+
+    def close(self) -> None:
+        if self.busy:
+            self.kill(respawn=False)
+            return
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(5)
+        if self.process.is_alive():
+            self.process.kill()
+        self.conn.close()
+
+
+class TimedProcessPool:
+    """Выполняет ``fn(item)`` в ``workers`` процессах с лимитом ``timeout`` на задачу.
+
+    Обычно процессы живут один вызов ``run``. С ``persistent=True`` они
+    переживают его (служба проверок не платит за запуск процессов и импорт
+    библиотек на каждое задание) и завершаются в ``close``; вызовы ``run``
+    тогда выполняются по очереди.
+    """
+
+    def __init__(self, workers: int = 1, persistent: bool = False):
+        self.workers = max(1, workers)
+        self.persistent = persistent
+        self._ctx = multiprocessing.get_context("spawn")
+        self._slots: List[_Slot] = []
+        self._lock = threading.Lock()
+
+    def run(
+        self,
+        fn: Callable[[Any], Any],
+        items: Iterable[Any],
+        timeout: Optional[float] = None,
+        cancel: Optional[CancelToken] = None,
+    ) -> Iterator[Tuple[Any, bool, Any]]:
+        """Возвращает ``(item, ok, result_or_exception)`` по мере готовности.
+
+        Задача, превысившая ``timeout``, даёт ``TimeBudgetExceeded``. При отмене
+        ``cancel`` все процессы завершаются и бросается ``OperationCancelled``.
+        """
+        # Задачи берутся из ``items`` по мере освобождения процессов: большие
+        # задачи (например, части отчёта) не копятся в памяти заранее
+        pending = iter(items)
+        exhausted = False
+        if self.persistent:
+            self._lock.acquire()
+        slots: List[_Slot] = self._slots if self.persistent else []
+        try:
+            while True:
+                if cancel is not None and cancel.cancelled:
+                    raise OperationCancelled()
+                while not exhausted:
+                    slot = next((s for s in slots if not s.busy), None)
+                    if slot is None and len(slots) >= self.workers:
+                        break
+                    item = next(pending, _NO_ITEM)
+                    if item is _NO_ITEM:
+                        exhausted = True
+                        break
+                    if slot is None:
+                        slot = _Slot(self._ctx)
+                        slots.append(slot)
+                    slot.submit(fn, item)
+                busy = [s for s in slots if s.busy]
+                if not busy:
+                    return
+                now = time.monotonic()
+                wait_for = POLL_INTERVAL
+                if timeout is not None:
+                    wait_for = min(wait_for, max(0.0, min(s.started + timeout for s in busy) - now))
+                ready = wait([s.conn for s in busy], wait_for)
+                for slot in busy:
+                    if slot.conn in ready:
+                        try:
+                            ok, result = slot.conn.recv()
+                        except (EOFError, OSError) as exc:
+                            # процесс упал (например, segfault в разборе PDF)
+                            item = slot.item
+                            slot.kill()
+                            yield item, False, exc
+                            continue
+                        slot.busy = False
+                        yield slot.item, ok, result
+                    elif timeout is not None and time.monotonic() - slot.started >= timeout:
+                        item = slot.item
+                        slot.kill()
+                        yield item, False, TimeBudgetExceeded()
+        finally:
+            if self.persistent:
+                # Занятые процессы (отмена, прерванный перебор) не дадут нужного результата
+                for slot in slots:
+                    if slot.busy:
+                        slot.kill()
+                self._lock.release()
+            else:
+                for slot in slots:
+                    slot.close()
+
+    def close(self) -> None:
+        """Завершает процессы постоянного пула."""
+        with self._lock:
+            for slot in self._slots:
+                slot.close()
+            self._slots.clear()
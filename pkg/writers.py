@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""Форматы отчётов: XLSX для людей, CSV / JSON Lines / SQLite для программ.
+
+Все форматы пишут одни и те же столбцы в одном порядке (как на листе XLSX)
+и читают строки отчёта один раз, по мере поступления. Писатель формата —
+функция ``(report, rows, out_path, changes=None, max_rows=None, workers=None) -> (exit_code, stats)``,
+где ``report`` — вид отчёта (``"xml"``, ``"pdf_xml"``, ``"iul"``,
+``"consolidated"``). Новый формат добавляется через ``register_format``.
+
+``max_rows`` учитывает только XLSX: более длинный отчёт делится на книги
+(см. ``xlsx_writer_sharded``), которые пишут ``workers`` процессов.
+Остальные форматы пишутся целиком.
+
+SQLite: строки — в таблице ``report``, итоги — в ``summary``, лист
+«Изменения» (``--since-last``) — в ``changes``; по столбцам статуса и
+имён построены индексы. CSV и JSON Lines пишут «Изменения» в соседний файл
+``<имя>_changes.<расширение>``.
+"""
+from __future__ import annotations
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+import csv
+import json
+import os
+import sqlite3
+
+from .xlsx_utils import CHANGES_HEADERS, ChangesSource, SummaryCounter, row_values
+from .xlsx_writer import HEADERS as XML_HEADERS, write_xlsx
+from .xlsx_writer_consolidated import HEADERS as CONSOLIDATED_HEADERS, SUMMARY_TITLE as CONSOLIDATED_SUMMARY_TITLE, write_xlsx_consolidated
+from .xlsx_writer_iul import get_headers as get_iul_headers, write_xlsx_iul
+from .xlsx_writer_pdf_xml import HEADERS as PDF_XML_HEADERS, write_xlsx_pdf_xml
+from .xlsx_writer_sharded import write_xlsx_sharded
+
+# Столбцы отчётов (как на листах XLSX, ИУЛ — со столбцом шаблона имени PDF)
+REPORT_HEADERS: Dict[str, List[str]] = {
+    "xml": XML_HEADERS,
+    "pdf_xml": PDF_XML_HEADERS,
+    "iul": get_iul_headers(True),
+    "consolidated": CONSOLIDATED_HEADERS,
+}
+
+# Столбцы, по которым ищут строки: статус и имена файлов
+INDEXED_COLUMNS = ("Статус", "Имя файла IFC", "Имя файла IFC из XML", "Имя файла IFC из ИУЛ", "Имя PDF")
+
+# Партия строк на одну вставку в SQLite
+SQLITE_BATCH = 1000
+
+Writer = Callable[..., Tuple[int, Dict[str, int]]]
+
+
+class Format(NamedTuple):
+    suffix: str
+    write: Writer
+
+
+FORMATS: Dict[str, Format] = {}
+
+
+def register_format(name: str, suffix: str, write: Writer) -> None:
+    """Регистрирует формат ``name`` с расширением файла ``suffix``."""
+    FORMATS[name] = Format(suffix, write)
+
+
+def report_path(path: Path, fmt: str) -> Path:
+    """Путь отчёта с расширением формата ``fmt``."""
+    return path.with_suffix(FORMATS[fmt].suffix)
+
+
+def write_report(
+    fmt: str,
+    report: str,
+    rows: Iterable[Mapping],
+    out_path: Path,
+    changes: Optional[ChangesSource] = None,
+    max_rows: Optional[int] = None,
+    workers: Optional[int] = None,
+) -> Tuple[int, Dict[str, int]]:
+    """Пишет отчёт ``report`` в формате ``fmt``; возвращает код выхода и итоги."""
+    try:
+        write = FORMATS[fmt].write
+    except KeyError:
+        raise ValueError(f"Неизвестный формат отчёта: {fmt}") from None
+    return write(report, rows, out_path, changes=changes, max_rows=max_rows, workers=workers)
+
+
+def _result(counter: SummaryCounter) -> Tuple[int, Dict[str, int]]:
+    stats = counter.stats()
+    return (0 if stats["errors"] == 0 else 1), stats
+
+
+def _changes_path(out_path: Path) -> Path:
+    return out_path.with_name(out_path.stem + "_changes" + out_path.suffix)
+
+
+# --- XLSX -----------------------------------------------------------------
+
+_XLSX_WRITERS: Dict[str, Writer] = {
+    "xml": write_xlsx,
+    "pdf_xml": write_xlsx_pdf_xml,
+    "iul": write_xlsx_iul,
+    "consolidated": write_xlsx_consolidated,
+}
+
+_XLSX_SUMMARY_TITLES = {
+    "xml": "Итого XML",
+    "pdf_xml": "Summary PDF-XML",
+    "iul": "Итого ИУЛ",
+    "consolidated": CONSOLIDATED_SUMMARY_TITLE,
+}
+
+
+def _write_xlsx(report: str, rows: Iterable[Mapping], out_path: Path, changes: Optional[ChangesSource] = None, max_rows: Optional[int] = None, workers: Optional[int] = None):
+    if max_rows:
+        return write_xlsx_sharded(
+            _XLSX_WRITERS[report], REPORT_HEADERS[report], rows, out_path, max_rows,
+            summary_title=_XLSX_SUMMARY_TITLES[report], changes=changes, workers=workers,
+        )
+    return _XLSX_WRITERS[report](rows, out_path, changes=changes)
+
+
+# --- CSV ------------------------------------------------------------------
+
+def _write_csv_rows(path: Path, headers: Sequence[str], values: Iterable[Sequence[Any]]) -> None:
+    # utf-8-sig: Excel открывает файл без «кракозябр», csv.reader — с encoding="utf-8-sig"
+    with path.open("w", encoding="utf-8-sig", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(headers)
+        w.writerows(values)
+
+
+def _write_csv(report: str, rows: Iterable[Mapping], out_path: Path, changes: Optional[ChangesSource] = None, max_rows: Optional[int] = None, workers: Optional[int] = None):
+    headers = REPORT_HEADERS[report]
+    counter = SummaryCounter()
+    _write_csv_rows(out_path, headers, (row_values(headers, r) for r in counter.counted(rows)))
+    if changes is not None:
+        _write_csv_rows(_changes_path(out_path), CHANGES_HEADERS, changes())
+    return _result(counter)
+
+
+# --- JSON Lines -------------------------------------------------------------
+
+def _write_jsonl_rows(path: Path, headers: Sequence[str], values: Iterable[Sequence[Any]]) -> None:
+    with path.open("w", encoding="utf-8") as f:
+        for v in values:
+            f.write(json.dumps(dict(zip(headers, v)), ensure_ascii=False))
+            f.write("\n")
+
+
+def _write_jsonl(report: str, rows: Iterable[Mapping], out_path: Path, changes: Optional[ChangesSource] = None, max_rows: Optional[int] = None, workers: Optional[int] = None):
+    headers = REPORT_HEADERS[report]
+    counter = SummaryCounter()
+    _write_jsonl_rows(out_path, headers, (row_values(headers, r) for r in counter.counted(rows)))
+    if changes is not None:
+        _write_jsonl_rows(_changes_path(out_path), CHANGES_HEADERS, changes())
+    return _result(counter)
+
+
+# --- SQLite -----------------------------------------------------------------
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _create_table(con: sqlite3.Connection, table: str, headers: Sequence[str]) -> str:
+    con.execute(f"CREATE TABLE {table} ({', '.join(_quote(h) for h in headers)})")
+    return f"INSERT INTO {table} VALUES ({', '.join('?' * len(headers))})"
+
+
+def _insert_batched(con: sqlite3.Connection, sql: str, values: Iterable[Sequence[Any]]) -> None:
+    batch: List[Sequence[Any]] = []
+    for v in values:
+        batch.append(v)
+        if len(batch) >= SQLITE_BATCH:
+            con.executemany(sql, batch)
+            batch.clear()
+    if batch:
+        con.executemany(sql, batch)
+
+
+def _write_sqlite(report: str, rows: Iterable[Mapping], out_path: Path, changes: Optional[ChangesSource] = None, max_rows: Optional[int] = None, workers: Optional[int] = None):
+    headers = REPORT_HEADERS[report]
+    counter = SummaryCounter()
+    # База собирается во временном файле и заменяет старую целиком
+    tmp = out_path.with_name(out_path.name + ".tmp")
+    if tmp.exists():
+        tmp.unlink()
+    con = sqlite3.connect(tmp)
+    try:
+        con.execute("PRAGMA journal_mode=OFF")
+        con.execute("PRAGMA synchronous=OFF")
+        with con:
+            sql = _create_table(con, "report", headers)
+            _insert_batched(con, sql, (row_values(headers, r) for r in counter.counted(rows)))
+            # Индексы строятся после вставки — так быстрее, чем поддерживать их по ходу
+            for col in INDEXED_COLUMNS:
+                if col in headers:
+                    con.execute(f"CREATE INDEX {_quote('ix_report_' + col)} ON report ({_quote(col)})")
+            stats = counter.stats()
+            sql = _create_table(con, "summary", ["Метрика", "Значение"])
+            con.executemany(sql, [
+                ("Всего строк", stats["total"]),
+                ("OK", stats["ok"]),
+                ("Ошибки (все не-OK)", stats["errors"]),
+            ])
+            if changes is not None:
+                sql = _create_table(con, "changes", CHANGES_HEADERS)
+                _insert_batched(con, sql, changes())
+    finally:
+        con.close()
+    os.replace(tmp, out_path)
+    return _result(counter)
+
+
+register_format("xlsx", ".xlsx", _write_xlsx)
+register_format("csv", ".csv", _write_csv)
+register_format("jsonl", ".jsonl", _write_jsonl)
+register_format("sqlite", ".sqlite", _write_sqlite)
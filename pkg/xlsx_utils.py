@@ -1,79 +1,308 @@
 # -*- coding: utf-8 -*-
 """Utility helpers shared by XLSX report writers."""
 from __future__ import annotations
-from typing import Iterable, List, Dict
-from openpyxl.styles import Alignment, Font, PatternFill, Border, Side
-from openpyxl.utils import get_column_letter
-from openpyxl.formatting.rule import CellIsRule
-
-GREEN = PatternFill(start_color="E7F7E7", end_color="E7F7E7", fill_type="solid")
-RED = PatternFill(start_color="FFE5E5", end_color="FFE5E5", fill_type="solid")
-GRAY = PatternFill(start_color="F2F2F2", end_color="F2F2F2", fill_type="solid")
-
-def autosize(ws) -> None:
-    """Auto fit column width based on cell contents."""
-    max_width: Dict[int, int] = {}
-    for row in ws.iter_rows(values_only=True):
-        for idx, val in enumerate(row, start=1):
-            s = "" if val is None else str(val)
-            width = max(3, min(120, int(len(s) * 1.1) + 2))
-            if idx not in max_width or width > max_width[idx]:
-                max_width[idx] = width
-    for idx, w in max_width.items():
-        ws.column_dimensions[get_column_letter(idx)].width = w
-
-def apply_borders(ws) -> None:
-    """Apply thin grey border to all cells."""
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator, List, Dict, Mapping, Optional, Sequence, Tuple, Union
+from copy import copy
+import pickle
+import tempfile
+
+if TYPE_CHECKING:
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import NamedStyle
+
+# openpyxl is imported when a workbook is actually written, not at import
+# time: planning a run (or writing CSV/JSONL/SQLite) does not pay for it.
+
+# Fill colours: OK rows, error rows, header cells. ``GREEN``, ``RED`` and
+# ``GRAY`` are the matching PatternFill objects, built on first access
+# (see ``__getattr__``) so that importing this module does not load openpyxl.
+GREEN_RGB = "E7F7E7"
+RED_RGB = "FFE5E5"
+GRAY_RGB = "F2F2F2"
+_FILL_COLORS = {"GREEN": GREEN_RGB, "RED": RED_RGB, "GRAY": GRAY_RGB}
+_fills: Dict[str, Any] = {}
+
+# Стили ячеек регистрируются в книге один раз (NamedStyle) и назначаются
+# ячейкам по имени — без отдельных объектов Alignment/Border на каждую ячейку.
+HEADER_STYLE = "report_header"
+LEFT_STYLE = "report_left"
+CENTER_STYLE = "report_center"
+SUMMARY_HEADER_STYLE = "report_summary_header"
+PLAIN_STYLE = "report_plain"
+LINK_STYLE = "report_link"
+
+# Строки листа копятся во временном файле, в памяти — не больше этого объёма
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+
+def new_workbook() -> Workbook:
+    """A ``write_only`` workbook for a report."""
+    from openpyxl import Workbook
+
+    return Workbook(write_only=True)
+
+
+def _fill(color: str):
+    from openpyxl.styles import PatternFill
+
+    return PatternFill(start_color=color, end_color=color, fill_type="solid")
+
+
+def __getattr__(name: str) -> Any:
+    if name in _FILL_COLORS:
+        if name not in _fills:
+            _fills[name] = _fill(_FILL_COLORS[name])
+        return _fills[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _named_styles() -> List[NamedStyle]:
+    from openpyxl.styles import Alignment, Border, Font, NamedStyle, Side
+    from openpyxl.styles.fonts import DEFAULT_FONT
+
     thin = Side(border_style="thin", color="D0D0D0")
     border = Border(left=thin, right=thin, top=thin, bottom=thin)
-    for row in ws.iter_rows(min_row=1, max_row=ws.max_row, min_col=1, max_col=ws.max_column):
-        for cell in row:
-            cell.border = border
+    # NamedStyle без шрифта получает пустой Font(); ячейки тела пишутся
+    # шрифтом книги по умолчанию (Calibri 11), как и до именованных стилей
+    body = copy(DEFAULT_FONT)
+    link = Font(name=body.name, sz=body.sz, family=body.family, scheme=body.scheme, color="0563C1", underline="single")
+    return [
+        NamedStyle(
+            HEADER_STYLE, font=Font(bold=True), fill=_fill(GRAY_RGB), border=border,
+            alignment=Alignment(horizontal="center", vertical="center", wrap_text=True),
+        ),
+        NamedStyle(LEFT_STYLE, font=body, border=border, alignment=Alignment(horizontal="left", vertical="top", wrap_text=True)),
+        NamedStyle(CENTER_STYLE, font=body, border=border, alignment=Alignment(horizontal="center", vertical="center", wrap_text=True)),
+        NamedStyle(
+            SUMMARY_HEADER_STYLE, font=Font(bold=True), fill=_fill(GRAY_RGB), border=border,
+            alignment=Alignment(horizontal="center", vertical="center"),
+        ),
+        NamedStyle(PLAIN_STYLE, font=body, border=border),
+        NamedStyle(
+            LINK_STYLE, font=link, border=border,
+            alignment=Alignment(horizontal="left", vertical="top", wrap_text=True),
+        ),
+    ]
+
+
+def register_styles(wb) -> None:
+    """Register the report named styles in ``wb`` (once per workbook)."""
+    for style in _named_styles():
+        if style.name not in wb.named_styles:
+            wb.add_named_style(style)
+
 
-def style_sheet(ws, left_cols: Iterable[int], yes_no_cols: Iterable[str], status_col: str) -> None:
-    """Apply common styling and conditional formatting.
+def column_width(value: Any) -> int:
+    """Column width that fits ``value`` (same rule for every report sheet)."""
+    s = "" if value is None else str(value)
+    return max(3, min(120, int(len(s) * 1.1) + 2))
+
+
+class ReportSheet:
+    """A report sheet in a ``write_only`` workbook.
+
+    Rows are spooled to a temporary file while column widths are computed;
+    ``close`` then streams them into the sheet with the named styles, so the
+    workbook never holds every cell in memory. Conditional formatting is added
+    once per column range.
 
     Parameters
     ----------
+    wb: Workbook
+        Target workbook, created with ``write_only=True``.
+    title: str
+        Sheet title.
+    headers: Sequence[str]
+        Header row.
     left_cols: Iterable[int]
-        Columns that should be left-aligned.
+        Columns that should be left-aligned (others are centred).
     yes_no_cols: Iterable[str]
         Columns containing "Да"/"Нет" values.
-    status_col: str
+    status_col: str, optional
         Column with overall status ("OK" or other).
+    header_style, body_style: str, optional
+        Named styles overriding the defaults (the Summary sheet uses them).
+    """
+
+    def __init__(
+        self,
+        wb,
+        title: str,
+        headers: Sequence[str],
+        left_cols: Iterable[int] = (),
+        yes_no_cols: Iterable[str] = (),
+        status_col: Optional[str] = None,
+        header_style: str = HEADER_STYLE,
+        body_style: Optional[str] = None,
+    ):
+        register_styles(wb)
+        self.ws = wb.create_sheet(title)
+        self.headers = list(headers)
+        self.left_cols = set(left_cols)
+        self.yes_no_cols = tuple(yes_no_cols)
+        self.status_col = status_col
+        self.header_style = header_style
+        self.body_style = body_style
+        self.rows = 0
+        self._widths: Dict[int, int] = {}
+        self._xf: Dict[str, Any] = {}
+        self._measure(self.headers)
+        from openpyxl.cell import WriteOnlyCell
+
+        self._new_cell = WriteOnlyCell
+        self._spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+        self._pickler = pickle.Pickler(self._spool, pickle.HIGHEST_PROTOCOL)
+
+    def _measure(self, row: Sequence[Any]) -> None:
+        widths = self._widths
+        for idx, val in enumerate(row, start=1):
+            w = column_width(val)
+            if w > widths.get(idx, 0):
+                widths[idx] = w
+
+    def append(self, row: Sequence[Any], links: Optional[Mapping[int, str]] = None) -> None:
+        """Add a row; ``links`` maps column numbers to hyperlink targets."""
+        self._measure(row)
+        self._pickler.dump((list(row), links))
+        self._pickler.clear_memo()
+        self.rows += 1
+
+    def _spooled(self) -> Iterator[Tuple[list, Optional[Mapping[int, str]]]]:
+        self._spool.seek(0)
+        # Memo is cleared per row on dump, so every row gets a fresh unpickler
+        for _ in range(self.rows):
+            yield pickle.load(self._spool)
+
+    def close(self) -> None:
+        from openpyxl.formatting.rule import CellIsRule
+        from openpyxl.utils import get_column_letter
+        from openpyxl.worksheet.hyperlink import Hyperlink
+
+        ws = self.ws
+        max_col = max(self._widths)
+        max_row = self.rows + 1
+        # Ширины и закрепление пишутся в начало листа — до первой строки
+        for idx, w in self._widths.items():
+            ws.column_dimensions[get_column_letter(idx)].width = w
+        ws.freeze_panes = "A2"
+        ws.auto_filter.ref = f"A1:{get_column_letter(max_col)}{max_row}"
+
+        if self.body_style is not None:
+            styles = [self.body_style] * max_col
+        else:
+            styles = [LEFT_STYLE if c in self.left_cols else CENTER_STYLE for c in range(1, max_col + 1)]
+        ws.append([self._cell(v, self.header_style) for v in self._padded(self.headers, max_col)])
+        for row, links in self._spooled():
+            cells = [self._cell(v, st) for v, st in zip(self._padded(row, max_col), styles)]
+            for col, target in (links or {}).items():
+                cell = cells[col - 1]
+                # "#Лист!A1" — ссылка внутри книги, иначе — на файл
+                cell.hyperlink = Hyperlink(ref="", location=target[1:]) if target.startswith("#") else target
+                cell.style = LINK_STYLE
+            ws.append(cells)
+        self._spool.close()
+
+        if not self.rows:
+            # У пустого листа нет диапазона для условного форматирования
+            return
+        green, red = _fill(GREEN_RGB), _fill(RED_RGB)
+        for col in self.yes_no_cols:
+            ws.conditional_formatting.add(f"{col}2:{col}{max_row}", CellIsRule(operator="equal", formula=['"Да"'], fill=green))
+            ws.conditional_formatting.add(f"{col}2:{col}{max_row}", CellIsRule(operator="equal", formula=['"Нет"'], fill=red))
+        if self.status_col:
+            col = self.status_col
+            ws.conditional_formatting.add(f"{col}2:{col}{max_row}", CellIsRule(operator="equal", formula=['"OK"'], fill=green))
+            ws.conditional_formatting.add(f"{col}2:{col}{max_row}", CellIsRule(operator="notEqual", formula=['"OK"'], fill=red))
+
+    @staticmethod
+    def _padded(row: Sequence[Any], width: int) -> Sequence[Any]:
+        # Рамка — на всех ячейках диапазона листа, в том числе пустых
+        return row if len(row) >= width else list(row) + [None] * (width - len(row))
+
+    def _cell(self, value: Any, style: str) -> WriteOnlyCell:
+        cell = self._new_cell(self.ws, value)
+        # Поиск стиля по имени — один раз на стиль, ячейкам копируется готовый
+        xf = self._xf.get(style)
+        if xf is None:
+            cell.style = style
+            xf = self._xf[style] = copy(cell._style)
+        else:
+            cell._style = copy(xf)
+        return cell
+
+
+def row_values(headers: Sequence[str], row: Mapping) -> List[Any]:
+    """Values of a report row in column order ("Рекомендации" comes from ``recommendation``)."""
+    return [row.get("recommendation") if h == "Рекомендации" else row.get(h) for h in headers]
+
+
+class SummaryCounter:
+    """Running totals for the Summary sheet, filled while rows are written.
+
+    Lets writers consume row generators once instead of keeping every row
+    for a second counting pass.
+    """
+
+    __slots__ = ("status_key", "total", "ok")
+
+    def __init__(self, status_key: str = "Статус"):
+        self.status_key = status_key
+        self.total = 0
+        self.ok = 0
+
+    def add(self, row: Mapping[str, Any]) -> None:
+        self.total += 1
+        # ReportRow знает статус без построения строки "OK"
+        ok = getattr(row, "ok", None)
+        if ok is None:
+            ok = row.get(self.status_key) == "OK"
+        if ok:
+            self.ok += 1
+
+    def counted(self, rows: Iterable[Mapping[str, Any]]) -> Iterator[Mapping[str, Any]]:
+        """Yield ``rows`` unchanged, counting each one."""
+        for r in rows:
+            self.add(r)
+            yield r
+
+    def stats(self) -> Dict[str, int]:
+        return {"total": self.total, "ok": self.ok, "errors": self.total - self.ok}
+
+
+def first_or_none(rows: Optional[Iterable[Mapping[str, Any]]]) -> Optional[Iterator[Mapping[str, Any]]]:
+    """Return an iterator over ``rows``, or ``None`` when there are no rows.
+
+    Generators are always truthy, so "is there anything to write" has to be
+    answered by peeking at the first row.
     """
-    for c in ws[1]:
-        c.font = Font(bold=True)
-        c.alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-        c.fill = GRAY
-
-    left_cols_set = set(left_cols)
-    for row in ws.iter_rows(min_row=2):
-        for cell in row:
-            if cell.column in left_cols_set:
-                cell.alignment = Alignment(horizontal="left", vertical="top", wrap_text=True)
-            else:
-                cell.alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-
-    ws.auto_filter.ref = ws.dimensions
-    ws.freeze_panes = "A2"
-
-    for col in yes_no_cols:
-        ws.conditional_formatting.add(f"{col}2:{col}{ws.max_row}", CellIsRule(operator="equal", formula=['"Да"'], fill=GREEN))
-        ws.conditional_formatting.add(f"{col}2:{col}{ws.max_row}", CellIsRule(operator="equal", formula=['"Нет"'], fill=RED))
-
-    ws.conditional_formatting.add(f"{status_col}2:{status_col}{ws.max_row}", CellIsRule(operator="equal", formula=['"OK"'], fill=GREEN))
-    ws.conditional_formatting.add(f"{status_col}2:{status_col}{ws.max_row}", CellIsRule(operator="notEqual", formula=['"OK"'], fill=RED))
-
-def add_summary_sheet(wb, rows: List[Dict], status_key: str = "Статус", title: str = "Summary") -> Dict[str, int]:
+    if rows is None:
+        return None
+    it = iter(rows)
+    for first in it:
+        return _chain_first(first, it)
+    return None
+
+
+def _chain_first(first, rest):
+    yield first
+    yield from rest
+
+
+def add_summary_sheet(
+    wb,
+    rows: Union[Iterable[Dict], SummaryCounter],
+    status_key: str = "Статус",
+    title: str = "Summary",
+) -> Dict[str, int]:
     """Create a Summary sheet with statistics.
 
     Parameters
     ----------
     wb: Workbook
-        Target workbook.
-    rows: List[Dict]
-        Report rows to summarise.
+        Target workbook (``write_only``).
+    rows: Iterable[Dict] | SummaryCounter
+        Report rows to summarise, or totals already counted while writing.
     status_key: str, optional
         Key name used to determine status; defaults to ``"Статус"``.
     title: str, optional
@@ -84,20 +313,76 @@ def add_summary_sheet(wb, rows: List[Dict], status_key: str = "Статус", ti
     Dict[str, int]
         Dict with keys ``total``, ``ok`` and ``errors``.
     """
-    sm = wb.create_sheet(title)
-    total = len(rows)
-    ok = sum(1 for r in rows if r.get(status_key) == "OK")
-    errors = total - ok
-    sm.append(["Метрика", "Значение"])
-    sm.append(["Всего строк", total])
-    sm.append(["OK", ok])
-    sm.append(["Ошибки (все не-OK)", errors])
-    sm.auto_filter.ref = sm.dimensions
-    sm.freeze_panes = "A2"
-    for c in sm[1]:
-        c.font = Font(bold=True)
-        c.alignment = Alignment(horizontal="center", vertical="center")
-        c.fill = GRAY
-    autosize(sm)
-    apply_borders(sm)
-    return {"total": total, "ok": ok, "errors": errors}
+    if isinstance(rows, SummaryCounter):
+        counter = rows
+    else:
+        counter = SummaryCounter(status_key)
+        for r in rows:
+            counter.add(r)
+    stats = counter.stats()
+    sheet = ReportSheet(
+        wb, title, ["Метрика", "Значение"], header_style=SUMMARY_HEADER_STYLE, body_style=PLAIN_STYLE,
+    )
+    sheet.append(["Всего строк", stats["total"]])
+    sheet.append(["OK", stats["ok"]])
+    sheet.append(["Ошибки (все не-OK)", stats["errors"]])
+    sheet.close()
+    return stats
+
+
+CHANGES_HEADERS = ["Изменение", "Файл / запись", "Статус ранее", "Статус сейчас", "Подробности"]
+
+ChangesSource = Callable[[], Iterable[Sequence[Any]]]
+
+
+def add_changes_sheet(wb, changes: Iterable[Sequence[Any]], title: str = "Изменения") -> Dict[str, int]:
+    """Create the "Изменения" sheet comparing the report with the previous run.
+
+    Parameters
+    ----------
+    wb: Workbook
+        Target workbook (``write_only``).
+    changes: Iterable[Sequence]
+        Rows ``(change, key, previous status, current status, details)``
+        as produced by ``run_state.RowRecorder.changes``.
+    title: str, optional
+        Sheet title.
+
+    Returns
+    -------
+    Dict[str, int]
+        Number of rows per change kind.
+    """
+    sheet = ReportSheet(wb, title, CHANGES_HEADERS, left_cols=(2, 5), status_col="D")
+    counts: Dict[str, int] = {}
+    for row in changes:
+        counts[row[0]] = counts.get(row[0], 0) + 1
+        sheet.append(list(row))
+    sheet.close()
+    return counts
+
+
+INDEX_HEADERS = ["Часть", "Лист / файл", "Строки с", "Строки по", "Всего строк", "OK", "Ошибки"]
+
+
+def add_index_sheet(wb, parts: Iterable[Tuple[str, str, int, Mapping[str, int]]], title: str = "Оглавление") -> None:
+    """Create the index of a report split into parts.
+
+    Parameters
+    ----------
+    wb: Workbook
+        Target workbook (``write_only``).
+    parts: Iterable[tuple]
+        ``(name, link, first_row, stats)`` per part in order: the sheet or
+        file name, the hyperlink target (``"#'Sheet'!A1"`` or a file name),
+        the number of the part's first report row and its statistics.
+    title: str, optional
+        Sheet title.
+    """
+    sheet = ReportSheet(wb, title, INDEX_HEADERS, left_cols=(2,))
+    for n, (name, link, first, stats) in enumerate(parts, start=1):
+        sheet.append(
+            [n, name, first, first + stats["total"] - 1, stats["total"], stats["ok"], stats["errors"]],
+            links={2: link},
+        )
+    sheet.close()
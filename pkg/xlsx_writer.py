@@ -1,10 +1,9 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
 from pathlib import Path
-from typing import List, Dict
+from typing import Iterable, Mapping, Optional
 
-from openpyxl import Workbook
-from .xlsx_utils import autosize, apply_borders, style_sheet, add_summary_sheet
+from .xlsx_utils import ChangesSource, ReportSheet, SummaryCounter, add_changes_sheet, add_summary_sheet, new_workbook
 
 HEADERS = [
     "Имя файла IFC",
@@ -18,13 +17,13 @@ HEADERS = [
     "Рекомендации",
 ]
 
-def write_xlsx(rows: List[Dict], out_path: Path) -> tuple[int, dict]:
-    wb = Workbook()
-    ws = wb.active; ws.title = "XML - IFC"
+def write_xlsx(rows: Iterable[Mapping], out_path: Path, changes: Optional[ChangesSource] = None) -> tuple[int, dict]:
+    wb = new_workbook()
+    sheet = ReportSheet(wb, "XML - IFC", HEADERS, left_cols=(1,2,7,8,9), yes_no_cols=("E","F"), status_col="G")
 
-    ws.append(HEADERS)
-    for r in rows:
-        ws.append([
+    counter = SummaryCounter()
+    for r in counter.counted(rows):
+        sheet.append([
             r.get("Имя файла IFC"),
             r.get("Имя файла IFC из XML"),
             r.get("CRC-32 XML"),
@@ -35,12 +34,11 @@ def write_xlsx(rows: List[Dict], out_path: Path) -> tuple[int, dict]:
             r.get("Подробности"),
             r.get("recommendation"),
         ])
+    sheet.close()
 
-    style_sheet(ws, left_cols=(1,2,7,8,9), yes_no_cols=("E","F"), status_col="G")
-    autosize(ws)
-    apply_borders(ws)
-
-    stats = add_summary_sheet(wb, rows, title="Итого XML")
+    stats = add_summary_sheet(wb, counter, title="Итого XML")
+    if changes is not None:
+        add_changes_sheet(wb, changes())
 
     wb.save(out_path)
     exit_code = 0 if stats["errors"] == 0 else 1
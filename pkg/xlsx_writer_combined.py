@@ -2,57 +2,78 @@
 """XLSX writer producing a single workbook with multiple report sheets."""
 from __future__ import annotations
 from pathlib import Path
-from typing import List, Dict, Optional
-
-from openpyxl import Workbook
+from typing import TYPE_CHECKING, Dict, Iterable, List, Mapping, Optional, Tuple
 
 from .xlsx_writer import HEADERS as XML_HEADERS
 from .xlsx_writer_iul import get_headers as get_iul_headers
 from .xlsx_writer_pdf_xml import HEADERS as PDF_XML_HEADERS
-from .xlsx_utils import autosize, apply_borders, style_sheet, add_summary_sheet
+from . import xlsx_writer_consolidated as consolidated
+from .xlsx_utils import ReportSheet, SummaryCounter, add_index_sheet, add_summary_sheet, first_or_none, row_values, new_workbook
+
+if TYPE_CHECKING:
+    from openpyxl import Workbook
 
 
 def _add_sheet(
     wb: Workbook,
     title: str,
     headers: List[str],
-    rows: List[Dict],
+    rows: Iterable[Mapping],
     left_cols: tuple[int, ...],
     yes_no_cols: tuple[str, ...],
     status_col: str,
     summary_title: str,
+    max_rows: Optional[int] = None,
+    parts: Optional[List[Tuple[str, str, int, SummaryCounter]]] = None,
 ) -> Dict[str, int]:
-    ws = wb.create_sheet(title)
-    ws.append(headers)
-    for r in rows:
-        row_data = []
-        for h in headers:
-            if h == "Рекомендации":
-                row_data.append(r.get("recommendation"))
-            else:
-                row_data.append(r.get(h))
-        ws.append(row_data)
-    style_sheet(ws, left_cols=left_cols, yes_no_cols=yes_no_cols, status_col=status_col)
-    autosize(ws)
-    apply_borders(ws)
-    return add_summary_sheet(wb, rows, title=summary_title)
+    counter = SummaryCounter()
+    sheet = None
+    n = 0
+    first = 1
+    for r in counter.counted(rows):
+        if sheet is None or (max_rows and sheet.rows >= max_rows):
+            if sheet is not None:
+                sheet.close()
+                first += sheet.rows
+            n += 1
+            # Первая часть — под прежним именем листа, следующие нумеруются
+            name = title if n == 1 else f"{title} ({n})"
+            sheet = ReportSheet(wb, name, headers, left_cols=left_cols, yes_no_cols=yes_no_cols, status_col=status_col)
+            part = SummaryCounter()
+            if parts is not None:
+                parts.append((name, f"#'{name}'!A1", first, part))
+        part.add(r)
+        sheet.append(row_values(headers, r))
+    sheet.close()
+    return add_summary_sheet(wb, counter, title=summary_title)
 
 
 def write_combined_xlsx(
-    xml_rows: Optional[List[Dict]],
-    iul_rows: Optional[List[Dict]],
-    pdf_xml_rows: Optional[List[Dict]],
+    xml_rows: Optional[Iterable[Mapping]],
+    iul_rows: Optional[Iterable[Mapping]],
+    pdf_xml_rows: Optional[Iterable[Mapping]],
     out_path: Path,
     include_pdf_name_col: bool = False,
+    consolidated_rows: Optional[Iterable[Mapping]] = None,
+    max_rows: Optional[int] = None,
 ) -> Dict[str, Dict[str, int]]:
     """Write selected reports to a single XLSX workbook.
 
+    Row sources may be lists or generators (``iter_report*``); each is read
+    once, in sheet order. Empty sources produce no sheet.
+
+    With ``max_rows`` a report longer than that is split across numbered
+    sheets ("XML - IFC", "XML - IFC (2)", ...); the workbook then starts with
+    an index sheet linking every part, and the summary sheet still covers the
+    whole report.
+
     Returns a mapping of report keys to statistics dictionaries.
     """
-    wb = Workbook()
-    wb.remove(wb.active)
+    wb = new_workbook()
     stats: Dict[str, Dict[str, int]] = {}
+    parts: List[Tuple[str, str, int, SummaryCounter]] = []
 
+    xml_rows = first_or_none(xml_rows)
     if xml_rows:
         stats["xml"] = _add_sheet(
             wb,
@@ -63,8 +84,11 @@ def write_combined_xlsx(
             yes_no_cols=("E","F"),
             status_col="G",
             summary_title="Итого XML",
+            max_rows=max_rows,
+            parts=parts,
         )
 
+    iul_rows = first_or_none(iul_rows)
     if iul_rows:
         headers = get_iul_headers(include_pdf_name_col)
         if include_pdf_name_col:
@@ -84,8 +108,11 @@ def write_combined_xlsx(
             yes_no_cols=yes_no_cols,
             status_col=status_col,
             summary_title="Итого ИУЛ",
+            max_rows=max_rows,
+            parts=parts,
         )
 
+    pdf_xml_rows = first_or_none(pdf_xml_rows)
     if pdf_xml_rows:
         stats["pdf_xml"] = _add_sheet(
             wb,
@@ -96,7 +123,29 @@ def write_combined_xlsx(
             yes_no_cols=("E","F"),
             status_col="G",
             summary_title="Summary PDF-XML",
+            max_rows=max_rows,
+            parts=parts,
         )
 
+    consolidated_rows = first_or_none(consolidated_rows)
+    if consolidated_rows:
+        stats["consolidated"] = _add_sheet(
+            wb,
+            consolidated.SHEET_TITLE,
+            consolidated.HEADERS,
+            consolidated_rows,
+            left_cols=consolidated.LEFT_COLS,
+            yes_no_cols=consolidated.YES_NO_COLS,
+            status_col=consolidated.STATUS_COL,
+            summary_title=consolidated.SUMMARY_TITLE,
+            max_rows=max_rows,
+            parts=parts,
+        )
+
+    if len(parts) > len(stats):
+        add_index_sheet(wb, [(name, link, first, part.stats()) for name, link, first, part in parts])
+        # Оглавление — первым листом (move_sheet не работает в write_only)
+        wb._sheets.insert(0, wb._sheets.pop())
+
     wb.save(out_path)
     return stats
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+from pathlib import Path
+from typing import Iterable, Mapping, Optional
+
+from .xlsx_utils import ChangesSource, ReportSheet, SummaryCounter, add_changes_sheet, add_summary_sheet, new_workbook
+
+HEADERS = [
+    "Имя файла IFC",
+    "Имя файла IFC из XML",
+    "Имя файла IFC из ИУЛ",
+    "Имя PDF",
+    "CRC-32 IFC",
+    "CRC-32 XML",
+    "CRC-32 ИУЛ",
+    "Размер IFC, байт",
+    "Размер ИУЛ, байт",
+    "Дата/время IFC",
+    "Дата/время ИУЛ",
+    "CRC XML совпадает",
+    "CRC ИУЛ совпадает",
+    "XML и ИУЛ согласованы",
+    "Размер совпадает",
+    "Дата/время совпадает",
+    "Статус",
+    "Подробности",
+    "Рекомендации",
+]
+
+SHEET_TITLE = "XML - ИУЛ - IFC"
+SUMMARY_TITLE = "Итого сводная"
+LEFT_COLS = (1, 2, 3, 4, 17, 18, 19)
+YES_NO_COLS = ("L", "M", "N", "O", "P")
+STATUS_COL = "Q"
+
+
+def write_xlsx_consolidated(rows: Iterable[Mapping], out_path: Path, changes: Optional[ChangesSource] = None) -> tuple[int, dict]:
+    wb = new_workbook()
+    sheet = ReportSheet(wb, SHEET_TITLE, HEADERS, left_cols=LEFT_COLS, yes_no_cols=YES_NO_COLS, status_col=STATUS_COL)
+
+    counter = SummaryCounter()
+    for r in counter.counted(rows):
+        sheet.append([r.get("recommendation") if h == "Рекомендации" else r.get(h) for h in HEADERS])
+    sheet.close()
+
+    stats = add_summary_sheet(wb, counter, title=SUMMARY_TITLE)
+    if changes is not None:
+        add_changes_sheet(wb, changes())
+
+    wb.save(out_path)
+    exit_code = 0 if stats["errors"] == 0 else 1
+    return exit_code, stats
@@ -1,10 +1,9 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
 from pathlib import Path
-from typing import List, Dict
+from typing import Iterable, List, Mapping, Optional
 
-from openpyxl import Workbook
-from .xlsx_utils import autosize, apply_borders, style_sheet, add_summary_sheet
+from .xlsx_utils import ChangesSource, ReportSheet, SummaryCounter, add_changes_sheet, add_summary_sheet, new_workbook
 
 BASE_HEADERS = [
     "Имя файла IFC",
@@ -36,17 +35,32 @@ def get_headers(include_pdf_name_col: bool) -> List[str]:
 
 
 def write_xlsx_iul(
-    rows: List[Dict],
+    rows: Iterable[Mapping],
     out_path: Path,
     include_pdf_name_col: bool = True,
+    changes: Optional[ChangesSource] = None,
 ) -> tuple[int, dict]:
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "ИУЛ - IFC"
+    if include_pdf_name_col:
+        yes_no_cols = ("J", "K", "L", "M", "N")
+        status_col = "O"
+        left_cols = (1, 2, 3, 6, 7, 16, 17)
+    else:
+        yes_no_cols = ("J", "K", "L", "M")
+        status_col = "N"
+        left_cols = (1, 2, 3, 6, 7, 15, 16)
 
-    headers = get_headers(include_pdf_name_col)
-    ws.append(headers)
-    for r in rows:
+    wb = new_workbook()
+    sheet = ReportSheet(
+        wb,
+        "ИУЛ - IFC",
+        get_headers(include_pdf_name_col),
+        left_cols=left_cols,
+        yes_no_cols=yes_no_cols,
+        status_col=status_col,
+    )
+
+    counter = SummaryCounter()
+    for r in counter.counted(rows):
         row_data = [
             r.get("Имя файла IFC"),
             r.get("Имя PDF"),
@@ -69,27 +83,12 @@ def write_xlsx_iul(
             r.get("Подробности"),
             r.get("recommendation"),
         ])
-        ws.append(row_data)
-
-    if include_pdf_name_col:
-        yes_no_cols = ("J", "K", "L", "M", "N")
-        status_col = "O"
-        left_cols = (1, 2, 3, 6, 7, 16, 17)
-    else:
-        yes_no_cols = ("J", "K", "L", "M")
-        status_col = "N"
-        left_cols = (1, 2, 3, 6, 7, 15, 16)
-
-    style_sheet(
-        ws,
-        left_cols=left_cols,
-        yes_no_cols=yes_no_cols,
-        status_col=status_col,
-    )
-    autosize(ws)
-    apply_borders(ws)
+        sheet.append(row_data)
+    sheet.close()
 
-    stats = add_summary_sheet(wb, rows, title="Итого ИУЛ")
+    stats = add_summary_sheet(wb, counter, title="Итого ИУЛ")
+    if changes is not None:
+        add_changes_sheet(wb, changes())
 
     wb.save(out_path)
     exit_code = 0 if stats["errors"] == 0 else 1
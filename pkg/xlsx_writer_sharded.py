@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""Запись очень большого отчёта частями.
+
+Excel с трудом открывает книги на сотни тысяч оформленных строк, а сборка
+одной огромной книги — пик памяти запуска. Отчёт длиннее ``max_rows`` строк
+делится на книги ``<имя>_001.xlsx``, ``<имя>_002.xlsx``, … (каждая — обычный
+отчёт со своим листом итогов). Части пишутся параллельно в рабочих
+процессах, а по пути ``out_path`` сохраняется книга-оглавление: ссылки на
+все части, итоги по всему отчёту и, при ``--since-last``, лист «Изменения».
+
+Отчёт не длиннее ``max_rows`` пишется как обычно — одной книгой.
+"""
+from __future__ import annotations
+from functools import partial
+from itertools import islice
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+import os
+
+from .workers import TimedProcessPool
+from .xlsx_utils import ChangesSource, SummaryCounter, add_changes_sheet, add_index_sheet, add_summary_sheet, row_values, new_workbook
+
+# Сколько частей пишется одновременно (по умолчанию)
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+
+Writer = Callable[..., Tuple[int, Dict[str, int]]]
+
+
+def shard_path(out_path: Path, n: int) -> Path:
+    """Путь ``n``-й части отчёта (с 1)."""
+    return out_path.with_name(f"{out_path.stem}_{n:03d}{out_path.suffix}")
+
+
+def _write_shard(write: Writer, keys: Sequence[str], task: Tuple[str, List[List[Any]]]) -> Dict[str, int]:
+    """Пишет одну часть в рабочем процессе; строки приходят списками значений."""
+    path, values = task
+    _, stats = write((dict(zip(keys, v)) for v in values), Path(path))
+    return stats
+
+
+def write_xlsx_sharded(
+    write: Writer,
+    headers: Sequence[str],
+    rows: Iterable[Mapping],
+    out_path: Path,
+    max_rows: int,
+    summary_title: str = "Summary",
+    changes: Optional[ChangesSource] = None,
+    workers: Optional[int] = None,
+) -> Tuple[int, Dict[str, int]]:
+    """Пишет отчёт писателем ``write`` (``write_xlsx`` и т.п.), деля его на
+    книги по ``max_rows`` строк. Возвращает код выхода и итоги по всему отчёту.
+
+    ``headers`` — столбцы отчёта: по ним строки передаются в процессы
+    списками значений, без лишних ключей.
+    """
+    it = iter(rows)
+    head = list(islice(it, max_rows + 1))
+    if len(head) <= max_rows:
+        return write(head, out_path, changes=changes)
+
+    counter = SummaryCounter()
+    values = (row_values(headers, r) for r in counter.counted(_chain(head, it)))
+    keys = ["recommendation" if h == "Рекомендации" else h for h in headers]
+
+    paths: List[str] = []
+
+    def tasks() -> Iterator[Tuple[str, List[List[Any]]]]:
+        # Следующая часть собирается, только когда освободился процесс
+        while True:
+            chunk = list(islice(values, max_rows))
+            if not chunk:
+                return
+            paths.append(str(shard_path(out_path, len(paths) + 1)))
+            yield paths[-1], chunk
+
+    parts: Dict[str, Dict[str, int]] = {}
+    pool = TimedProcessPool(workers or DEFAULT_WORKERS)
+    for (path, chunk), ok, result in pool.run(partial(_write_shard, write, keys), tasks()):
+        if not ok:
+            raise result
+        parts[path] = result
+
+    wb = new_workbook()
+    index = []
+    first = 1
+    for path in paths:
+        name = Path(path).name
+        index.append((name, name, first, parts[path]))
+        first += parts[path]["total"]
+    add_index_sheet(wb, index)
+    stats = add_summary_sheet(wb, counter, title=summary_title)
+    if changes is not None:
+        add_changes_sheet(wb, changes())
+    wb.save(out_path)
+    return (0 if stats["errors"] == 0 else 1), stats
+
+
+def _chain(head: List[Mapping], rest: Iterator[Mapping]) -> Iterator[Mapping]:
+    yield from head
+    yield from rest
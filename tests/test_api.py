@@ -0,0 +1,81 @@
+import asyncio
+import threading
+import zlib
+
+import pytest
+
+from xmlchecks.pkg.api import CheckService, iter_checks, run_checks
+from xmlchecks.pkg.scheduler import Scheduler
+
+
+def _project(root, name):
+    ifc = root / name / 'ifc'
+    ifc.mkdir(parents=True)
+    (ifc / 'model.ifc').write_bytes(name.encode())
+    crc = format(zlib.crc32(name.encode()), '08X')
+    (root / name / 'list.xml').write_text(
+        '<?xml version="1.0"?>\n<Root><ModelFile><FileName>model.ifc</FileName>'
+        f'<FileChecksum>{crc}</FileChecksum><FileFormat>IFC</FileFormat></ModelFile></Root>',
+        encoding='utf-8',
+    )
+    return {'xml': f'{name}/list.xml', 'ifc-dir': f'{name}/ifc', 'out': f'{name}/r.xlsx', 'check-xml': True}
+
+
+def test_run_checks_concurrent_jobs(tmp_path):
+    service = CheckService(Scheduler(io_jobs=2))
+
+    async def main():
+        events = []
+        jobs = [run_checks(_project(tmp_path, name), service, base=tmp_path, on_event=events.append)
+                for name in ('a', 'b')]
+        return events, await asyncio.gather(*jobs)
+
+    try:
+        events, results = asyncio.run(main())
+    finally:
+        service.close()
+    for name, result in zip('ab', results):
+        assert result.code == 0 and result.note is None
+        path, stats = result.reports['xml']
+        assert path == tmp_path / name / 'r.xlsx' and path.exists()
+        assert stats == {'total': 1, 'ok': 1, 'errors': 0}
+    assert sorted(e['job'] for e in events if e['event'] == 'done') == [1, 2]
+    assert len(service.shared.ifc_crc) == 2
+
+
+def test_iter_checks_reports_bad_input(tmp_path):
+    async def main():
+        return [e async for e in iter_checks({'xml': 'missing.xml', 'ifc-dir': '.'}, base=tmp_path)]
+
+    events = asyncio.run(main())
+    assert [e['event'] for e in events] == ['started', 'done']
+    assert events[-1]['code'] == 2
+
+
+def test_run_checks_cancel(tmp_path):
+    service = CheckService(Scheduler(io_jobs=2))
+    entered, release = threading.Event(), threading.Event()
+
+    def slow_crc(path):
+        entered.set()
+        release.wait(5)
+        return zlib.crc32(b'a')
+
+    service.shared.ifc_crc._compute = slow_crc
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        task = asyncio.create_task(run_checks(_project(tmp_path, 'a'), service, base=tmp_path))
+        await loop.run_in_executor(None, entered.wait, 5)
+        task.cancel()
+        loop.call_later(0.05, release.set)
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    try:
+        asyncio.run(main())
+    finally:
+        service.close()
+    # Хэширование завершилось, но отчёт после отмены уже не строился
+    assert service.jobs == 1
+    assert not (tmp_path / 'a' / 'r.xlsx').exists()
@@ -0,0 +1,76 @@
+from pathlib import Path
+
+import pytest
+from openpyxl import load_workbook
+
+from xmlchecks.pkg.batch import load_batch, project_file, write_batch_index
+from xmlchecks.pkg.runner import InputError, ProjectResult
+
+
+def test_load_batch_resolves_paths_and_names(tmp_path):
+    jobs = tmp_path / 'jobs.yaml'
+    jobs.write_text(
+        'defaults:\n'
+        '  check-iul: true\n'
+        '  pdf_workers: 2\n'
+        'projects:\n'
+        '  - name: Корпус 1\n'
+        '    xml: k1/list.xml\n'
+        '    ifc-dir: k1/ifc\n'
+        '    iul: [a.pdf, b.pdf]\n'
+        '    check-iul: false\n'
+        '  - xml: k2/list.xml\n'
+        '  - name: Корпус 1\n',
+        encoding='utf-8',
+    )
+    projects = load_batch(jobs)
+    assert [name for name, _ in projects] == ['Корпус 1', 'list', 'Корпус 1 (2)']
+    argv = projects[0][1]
+    assert argv == [
+        '--pdf-workers', '2',
+        '--xml', str(tmp_path / 'k1/list.xml'),
+        '--ifc-dir', str(tmp_path / 'k1/ifc'),
+        '--iul', str(tmp_path / 'a.pdf'), str(tmp_path / 'b.pdf'),
+    ]
+    assert projects[2][1] == ['--check-iul', '--pdf-workers', '2']
+
+
+def test_load_batch_rejects_bad_files(tmp_path):
+    jobs = tmp_path / 'jobs.yaml'
+    jobs.write_text('projects: []\n', encoding='utf-8')
+    with pytest.raises(InputError):
+        load_batch(jobs)
+    with pytest.raises(InputError):
+        load_batch(tmp_path / 'missing.yaml')
+
+
+def test_batch_index(tmp_path):
+    assert project_file(Path('r/.state.json'), 'Корпус 1/А').name == '.state_Корпус_1_А.json'
+    report = tmp_path / 'r' / 'k1.xlsx'
+    results = [
+        ProjectResult('k1', 0, reports={'xml': (report, {'total': 3, 'ok': 2, 'errors': 1})}),
+        ProjectResult('k2', 2, 'XML не найден'),
+    ]
+    out = tmp_path / 'index.xlsx'
+    write_batch_index(results, out)
+    ws = load_workbook(out).active
+    assert [c.value for c in ws[2]] == ['k1', 'XML↔IFC', 'k1.xlsx', 'Есть ошибки', 3, 2, 1, None]
+    assert ws['C2'].hyperlink.target == str(Path('r') / 'k1.xlsx')
+    assert [c.value for c in ws[3]] == ['k2', None, None, 'Не выполнен', None, None, None, 'XML не найден']
+
+
+def test_load_batch_dedupes_against_all_taken_names(tmp_path):
+    jobs = tmp_path / 'jobs.yaml'
+    jobs.write_text(
+        'projects:\n'
+        '  - name: X\n'
+        '  - name: X (2)\n'
+        '  - name: X\n'
+        '  - name: X_3\n'
+        '  - name: X\n',
+        encoding='utf-8',
+    )
+    names = [name for name, _ in load_batch(jobs)]
+    assert names == ['X', 'X (2)', 'X (3)', 'X_3 (2)', 'X (4)']
+    # Служебные файлы проектов (журнал, состояние) тоже не совпадают
+    assert len({project_file(tmp_path / 'j.jsonl', n) for n in names}) == len(names)
@@ -0,0 +1,51 @@
+import time
+
+import pytest
+
+from xmlchecks.pkg.cancel import CancelToken, OperationCancelled, TimeBudgetExceeded
+from xmlchecks.pkg.workers import TimedProcessPool
+
+
+def _sleep_then_return(seconds):
+    time.sleep(seconds)
+    return seconds
+
+
+def _interrupted(_):
+    raise KeyboardInterrupt
+
+
+def test_cancel_token_child_and_deadline():
+    parent = CancelToken()
+    child = parent.child(timeout=0.01)
+    time.sleep(0.02)
+    assert child.expired and not parent.expired
+    with pytest.raises(TimeBudgetExceeded):
+        child.check()
+    parent.cancel()
+    assert child.cancelled
+    with pytest.raises(OperationCancelled):
+        parent.check()
+
+
+def test_pool_kills_task_over_budget():
+    pool = TimedProcessPool(workers=2)
+    results = {item: (ok, res) for item, ok, res in pool.run(_sleep_then_return, [0, 30, 0.1], timeout=2)}
+    assert results[0] == (True, 0)
+    assert results[0.1] == (True, 0.1)
+    ok, exc = results[30]
+    assert not ok and isinstance(exc, TimeBudgetExceeded)
+
+
+def test_pool_cancel():
+    token = CancelToken()
+    token.cancel()
+    with pytest.raises(OperationCancelled):
+        list(TimedProcessPool().run(_sleep_then_return, [1], cancel=token))
+
+
+def test_pool_worker_interrupt_is_not_a_task_error():
+    results = list(TimedProcessPool().run(_interrupted, [1]))
+    # Процесс завершился, а не прислал KeyboardInterrupt как ошибку разбора
+    assert [(item, ok) for item, ok, _ in results] == [(1, False)]
+    assert isinstance(results[0][2], EOFError)
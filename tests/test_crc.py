@@ -8,3 +8,32 @@ def test_compute_crc32(tmp_path):
     p.write_bytes(data)
     expected = zlib.crc32(data) & 0xFFFFFFFF
     assert compute_crc32(p) == expected
+
+
+def test_crc_cache_reads_each_file_once(tmp_path, monkeypatch):
+    import os
+    from xmlchecks.pkg import crc as crc_mod
+
+    p = tmp_path / 'a.ifc'
+    p.write_bytes(b'abc')
+    calls = []
+    real = crc_mod.compute_crc32
+    monkeypatch.setattr(crc_mod, 'compute_crc32', lambda path: calls.append(path) or real(path))
+    cache = crc_mod.CrcCache()
+    assert cache(p) == cache(p) == zlib.crc32(b'abc')
+    assert calls == [p]
+    p.write_bytes(b'abcd')
+    os.utime(p, ns=(1, 1))
+    assert cache(p) == zlib.crc32(b'abcd')
+    assert len(calls) == 2
+
+
+def test_crc_cache_layered_over_empty_shared_cache(tmp_path):
+    from xmlchecks.pkg.crc import CrcCache
+
+    p = tmp_path / 'a.ifc'
+    p.write_bytes(b'abc')
+    shared = CrcCache()
+    # Пустой общий кэш — тоже кэш: значения должны попадать в него
+    assert CrcCache(compute=shared)(p) == zlib.crc32(b'abc')
+    assert len(shared) == 1
@@ -0,0 +1,22 @@
+from xmlchecks.pkg.crc_index import CrcIndex, canonical_crc
+
+
+def test_canonical_crc_groups_confusables():
+    assert canonical_crc('0OD8B1I') == canonical_crc('DQ0B81L')
+
+
+def test_correct_single_confusion():
+    index = CrcIndex(['ABCDEF12', '12345678'])
+    assert index.correct('ABC0EF12') == 'ABCDEF12'
+    assert index.correct('I2345678') == '12345678'
+    assert index.correct('abcdef12') == 'ABCDEF12'
+
+
+def test_correct_rejects_distant_or_ambiguous():
+    index = CrcIndex(['ABCDEF12'])
+    assert index.correct('A8C0EF12') is None  # две замены
+    assert index.correct('FFFFFFFF') is None
+    assert index.correct('ABC') is None
+
+    ambiguous = CrcIndex(['0000000D', '000000D0'])
+    assert ambiguous.correct('000000DD') is None
@@ -0,0 +1,37 @@
+import random
+
+from xmlchecks.pkg.fuzzy import NameIndex, NameHints, levenshtein, normalize_name
+
+
+def test_normalize_name_folds_case_homoglyphs_and_separators():
+    # «А», «С», «Р» — кириллица
+    assert normalize_name('АС-01_Раздел.IFC') == normalize_name('ac 01 pаздел.ifc')
+    assert normalize_name('Model_v2.ifc') == 'modelv2ifc'
+
+
+def test_levenshtein():
+    assert levenshtein('kitten', 'sitting') == 3
+    assert levenshtein('', 'abc') == 3
+    assert levenshtein('same', 'same') == 0
+
+
+def test_name_index_matches_brute_force():
+    rnd = random.Random(1)
+    names = [''.join(rnd.choice('abcde') for _ in range(rnd.randint(4, 9))) + '.ifc' for _ in range(300)]
+    index = NameIndex(names)
+    assert len(index) == 300
+    for q in names[:50] + ['abcdabcd.ifc', 'eeee.ifc']:
+        key = normalize_name(q)
+        limit = min(3, max(1, len(key) // 5))
+        dists = [levenshtein(key, normalize_name(n)) for n in names]
+        best = min(dists)
+        expected = (names[dists.index(best)], best) if best <= limit else None
+        assert index.closest(q) == expected
+
+
+def test_name_hints_pairs_leftovers():
+    hints = NameHints(['Corpus_AR_01.ifc', 'unrelated.ifc'])
+    assert hints.for_file('corpus-AR-01.ifc') == ('Corpus_AR_01.ifc', 0)
+    assert hints.for_file('Corpus_KR_02.ifc') == ('Corpus_AR_01.ifc', 2)
+    assert hints.for_file('zzz.ifc') is None
+    assert hints.for_entry('Corpus_AR_01.ifc') == ('corpus-AR-01.ifc', 0)
@@ -0,0 +1,93 @@
+import json
+import zlib
+
+from xmlchecks.pkg import gate
+from xmlchecks.pkg.cancel import CancelToken
+from xmlchecks.pkg.iul_reader import IulEntry
+from xmlchecks.pkg.runner import build_parser
+from xmlchecks.pkg.scheduler import Scheduler
+
+
+def _project(tmp_path, sizes, bad=None):
+    ifc = tmp_path / 'ifc'
+    ifc.mkdir()
+    entries = []
+    for name, size in sizes.items():
+        data = name.encode() * size
+        (ifc / name).write_bytes(data)
+        crc = 0 if name == bad else zlib.crc32(data)
+        entries.append(
+            f'<ModelFile><FileName>{name}</FileName><FileChecksum>{crc:08X}</FileChecksum>'
+            '<FileFormat>IFC</FileFormat></ModelFile>'
+        )
+    (tmp_path / 'list.xml').write_text('<?xml version="1.0"?>\n<Root>' + ''.join(entries) + '</Root>', encoding='utf-8')
+    return ['--xml', str(tmp_path / 'list.xml'), '--ifc-dir', str(ifc)]
+
+
+def _hashed(monkeypatch):
+    hashed = []
+    real = gate.compute_crc32
+
+    def counting(path, **kw):
+        hashed.append(path.name)
+        return real(path, **kw)
+
+    monkeypatch.setattr(gate, 'compute_crc32', counting)
+    return hashed
+
+
+def _gate(argv, io_jobs=1):
+    return gate.run_gate(build_parser().parse_args(argv), Scheduler(io_jobs=io_jobs), CancelToken())
+
+
+def test_gate_passes_clean_project(tmp_path):
+    verdict = _gate(_project(tmp_path, {'a.ifc': 10, 'b.ifc': 20}) + ['--check-xml'])
+    assert verdict.ok and verdict.code == 0
+    assert json.loads(verdict.to_json()).keys() == {'ok', 'seconds'}
+    assert not list(tmp_path.glob('*.xlsx'))
+
+
+def test_gate_fails_on_names_before_hashing(tmp_path, monkeypatch):
+    hashed = _hashed(monkeypatch)
+    argv = _project(tmp_path, {'a.ifc': 10})
+    (tmp_path / 'ifc' / 'extra.ifc').write_bytes(b'x')
+    verdict = _gate(argv + ['--check-xml'])
+    assert verdict.code == 1
+    assert (verdict.phase, verdict.check, verdict.status, verdict.file) == ('names', 'xml', 'ERROR_IFC_EXTRA', 'extra.ifc')
+    assert hashed == []
+
+
+def test_gate_hashes_smallest_first_and_stops(tmp_path, monkeypatch):
+    hashed = _hashed(monkeypatch)
+    argv = _project(tmp_path, {'big.ifc': 5000, 'mid.ifc': 500, 'small.ifc': 5}, bad='small.ifc')
+    verdict = _gate(argv + ['--check-xml'])
+    assert (verdict.phase, verdict.status, verdict.file) == ('crc', 'CRC_MISMATCH', 'small.ifc')
+    data = json.loads(verdict.to_json())
+    assert data['ok'] is False and data['details'].startswith('CRC-32 не совпадает: XML=00000000')
+    # Остальные файлы сняты (или прерваны) — до большого дело не дошло
+    assert hashed[0] == 'small.ifc' and 'big.ifc' not in hashed
+
+
+def test_gate_checks_iul_text_layer_before_crc(tmp_path, monkeypatch):
+    hashed = _hashed(monkeypatch)
+    argv = _project(tmp_path, {'a.ifc': 10})
+    pdfs = tmp_path / 'pdf'
+    pdfs.mkdir()
+    (pdfs / 'a_УЛ.pdf').write_bytes(b'%PDF')
+    calls = []
+
+    def fake_extract(paths, progress=None, *, entries_cache=None, ocr=True, **kw):
+        calls.append(ocr)
+        for p in paths:
+            entries_cache.put(p, [IulEntry('a.ifc', None, None, 999, None, p.name)])
+        return {}
+
+    monkeypatch.setattr(gate, 'extract_iul_entries', fake_extract)
+    verdict = _gate(argv + ['--check-iul', '--iul-dir', str(pdfs)])
+    assert (verdict.phase, verdict.check, verdict.status) == ('iul_text', 'iul', 'SIZE_MISMATCH')
+    assert calls == [False] and hashed == []
+
+
+def test_gate_reports_input_error(tmp_path):
+    verdict = _gate(['--check-xml', '--xml', str(tmp_path / 'missing.xml'), '--ifc-dir', str(tmp_path)])
+    assert verdict.code == 2 and verdict.status == 'INPUT_ERROR'
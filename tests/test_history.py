@@ -0,0 +1,53 @@
+from xmlchecks.pkg.history import HistoryStore, RunRecorder
+from xmlchecks.pkg.run_state import CHANGED, FIXED, NEW_ERROR
+
+DAY = 86400
+
+
+def _run(store, started, rows, project='p'):
+    rec = RunRecorder()
+    recorded = list(rec.record('xml', [{'Имя файла IFC': name, 'Статус': status} for name, status in rows]))
+    assert len(recorded) == len(rows)
+    errors = sum(status != 'OK' for _, status in rows)
+    rec.add_stats('xml', {'total': len(rows), 'ok': len(rows) - errors, 'errors': errors})
+    return store.add_run(project, started, len(rows), rec, finished=started + 10)
+
+
+def test_history_queries(tmp_path):
+    with HistoryStore(tmp_path / 'h.sqlite') as store:
+        t0 = 1_000_000.0
+        first = _run(store, t0, [('a.ifc', 'CRC_MISMATCH'), ('b.ifc', 'OK'), ('c.ifc', 'NAME_MISMATCH'), ('d.ifc', 'OK')])
+        _run(store, t0 + 4 * DAY, [('a.ifc', 'CRC_MISMATCH'), ('b.ifc', 'OK'), ('c.ifc', 'OK'), ('d.ifc', 'OK')])
+        last = _run(store, t0 + 8 * DAY, [('a.ifc', 'CRC_MISMATCH'), ('b.ifc', 'SIZE_MISMATCH'), ('c.ifc', 'CRC_MISMATCH')])
+        _run(store, t0, [('a.ifc', 'OK')], project='other')
+
+        assert store.projects() == ['other', 'p']
+        assert store.last_run('p') == last
+
+        changes = store.changes('p', first)
+        assert changes == [
+            (NEW_ERROR, 'xml', 'b.ifc', 'OK', 'SIZE_MISMATCH'),
+            (CHANGED, 'xml', 'c.ifc', 'NAME_MISMATCH', 'CRC_MISMATCH'),
+        ]
+        assert store.changes('p', first, first + 1) == [(FIXED, 'xml', 'c.ifc', 'NAME_MISMATCH', 'OK')]
+
+        # a.ifc не проходит с первого запуска, b и c — только с последнего
+        failing = store.failing('p', days=7, now=t0 + 8 * DAY)
+        assert failing == [('xml', 'a.ifc', 'CRC_MISMATCH', t0, 3)]
+        assert [f[1] for f in store.failing('p', days=0, now=t0 + 8 * DAY)] == ['a.ifc', 'b.ifc', 'c.ifc']
+
+        runs = store.throughput('p')
+        assert [r[0] for r in runs] == [last, last - 1, first]
+        assert runs[0][2:] == (10.0, 3, 3, 3)
+
+
+def test_history_option_tells_bare_flag_from_explicit_dir(tmp_path):
+    from xmlchecks.pkg.history import DEFAULT_HISTORY_NAME
+    from xmlchecks.pkg.runner import build_parser, history_db_path
+
+    ap = build_parser()
+    base = ['--xml', str(tmp_path / 'x' / 'list.xml')]
+    assert ap.parse_args(base).history is False
+    assert history_db_path(ap.parse_args(base + ['--history'])) == tmp_path / 'x' / DEFAULT_HISTORY_NAME
+    assert history_db_path(ap.parse_args(base + ['--history', str(tmp_path)])) == tmp_path / DEFAULT_HISTORY_NAME
+    assert history_db_path(ap.parse_args(base + ['--history', str(tmp_path / 'h.db')])) == tmp_path / 'h.db'
@@ -1,12 +1,12 @@
 from pathlib import Path
-from xmlchecks.pkg.iul_reader import extract_iul_entries_from_pdf
+from xmlchecks.pkg.iul_reader import extract_iul_entries_from_pdf, extract_pdf_text_debug
 
 def test_extract_iul_entries_from_pdf(monkeypatch, tmp_path):
     pdf_path = tmp_path / 'doc.pdf'
     pdf_path.write_bytes(b'%PDF-1.4')
     sample_text = 'CRC-32 ABCDEF12\nfile1.ifc 01.02.2024 12:34 1234'
-    monkeypatch.setattr('xmlchecks.pkg.iul_reader._extract_text_pypdf2', lambda p: sample_text)
-    monkeypatch.setattr('xmlchecks.pkg.iul_reader._extract_text_ocr', lambda p: '')
+    monkeypatch.setattr('xmlchecks.pkg.iul_reader._extract_text_pypdf2', lambda p, **kw: sample_text)
+    monkeypatch.setattr('xmlchecks.pkg.iul_reader._extract_text_ocr', lambda p, **kw: '')
     entries = extract_iul_entries_from_pdf(pdf_path)
     assert len(entries) == 1
     e = entries[0]
@@ -21,8 +21,8 @@ def test_extract_iul_with_spaces(monkeypatch, tmp_path):
     pdf_path = tmp_path / 'doc.pdf'
     pdf_path.write_bytes(b'%PDF-1.4')
     sample_text = 'CRC-32 ABCDEF12\n1-2024-60_П_ТКР_ОХ.П_Пролетное строение.ifc 01.02.2024 12:34 1234'
-    monkeypatch.setattr('xmlchecks.pkg.iul_reader._extract_text_pypdf2', lambda p: sample_text)
-    monkeypatch.setattr('xmlchecks.pkg.iul_reader._extract_text_ocr', lambda p: '')
+    monkeypatch.setattr('xmlchecks.pkg.iul_reader._extract_text_pypdf2', lambda p, **kw: sample_text)
+    monkeypatch.setattr('xmlchecks.pkg.iul_reader._extract_text_ocr', lambda p, **kw: '')
     entries = extract_iul_entries_from_pdf(pdf_path)
     assert entries[0].basename == '1-2024-60_П_ТКР_ОХ.П_Пролетное строение.ifc'
 
@@ -30,12 +30,12 @@ def test_extract_iul_with_spaces(monkeypatch, tmp_path):
 def test_extract_iul_uses_ocr_fallback(monkeypatch, tmp_path):
     pdf_path = tmp_path / 'doc.pdf'
     pdf_path.write_bytes(b'%PDF-1.4')
-    monkeypatch.setattr('xmlchecks.pkg.iul_reader._extract_text_pypdf2', lambda p: '')
+    monkeypatch.setattr('xmlchecks.pkg.iul_reader._extract_text_pypdf2', lambda p, **kw: '')
 
     sample_text = 'CRC-32 12345678\nscan.ifc 11.03.2024 10:10 98765'
     called = {}
 
-    def fake_ocr(path, dpi=300):
+    def fake_ocr(path, dpi=300, **kw):
         called['dpi'] = dpi
         return sample_text
 
@@ -44,4 +44,91 @@ def test_extract_iul_uses_ocr_fallback(monkeypatch, tmp_path):
     entries = extract_iul_entries_from_pdf(pdf_path)
     assert entries and entries[0].basename == 'scan.ifc'
     assert entries[0].crc_hex == '12345678'
+    assert entries[0].ocr is True
     assert called.get('dpi') == 300
+
+
+def test_parse_entries_edge_cases():
+    from xmlchecks.pkg.iul_reader import _parse_entries
+
+    text = '\n'.join([
+        'CRC-32 ABCDEF12',
+        'Имя: 01.02.2024 12:34 model a.ifc размер 10 20',
+        'Размер файла, байт: 555 b.IFC 777',
+        'c.Ifc 01.01.2024 00:00 1',  # не ".ifc"/".IFC" — строка пропускается
+        'CRC 32 00112233 d.ifc',
+    ])
+    got = [(e.basename, e.crc_hex, e.dt_str, e.size_bytes) for e in _parse_entries(text, 'x.pdf')]
+    # имя захватывает всю серию допустимых символов перед ".ifc" — как и раньше
+    assert got == [
+        ('34 model a.ifc', 'ABCDEF12', '01.02.2024 12:34', 20),
+        (' 555 b.IFC', 'ABCDEF12', None, 555),
+        ('CRC 32 00112233 d.ifc', '00112233', None, None),
+    ]
+
+
+def test_parse_entries_accepts_ocr_confusables_only_in_ocr_text():
+    from xmlchecks.pkg.iul_reader import _parse_entries
+
+    text = 'CRC-32 oq1i5s2g\na.ifc 01.02.2024 12:34 10'
+    # Распознанный скан: путаемые OCR буквы в любом регистре
+    assert _parse_entries(text, 'x.pdf', ocr=True)[0].crc_hex == 'OQ1I5S2G'
+    # Текстовый слой: 8 не-hex символов — не CRC
+    assert _parse_entries(text, 'x.pdf')[0].crc_hex is None
+
+
+def test_extract_iul_pool_keeps_pdfs_with_same_name_apart(monkeypatch, tmp_path):
+    from xmlchecks.pkg.iul_reader import IulEntryCache, extract_iul_entries
+
+    paths = []
+    for folder in ('a', 'b'):
+        (tmp_path / folder).mkdir()
+        path = tmp_path / folder / 'doc.pdf'
+        path.write_bytes(f'%PDF {folder}.ifc'.encode())
+        paths.append(path)
+    monkeypatch.setattr(
+        'xmlchecks.pkg.iul_reader._extract_text_pypdf2',
+        lambda doc, **kw: f'CRC-32 ABCDEF12\n{doc.data.decode()[5:]} 01.02.2024 12:34 1234',
+    )
+
+    class InlinePool:
+        workers = 2
+
+        def run(self, fn, items, timeout=None, cancel=None):
+            # Результаты приходят не в порядке отправки
+            for item in reversed(list(items)):
+                yield item, True, fn(item)
+
+    cache = IulEntryCache()
+    res = extract_iul_entries(paths, entries_cache=cache, pool=InlinePool())
+    assert sorted(res) == ['a.ifc', 'b.ifc']
+    assert [e.basename for e in cache.get(paths[0])] == ['a.ifc']
+    assert [e.basename for e in cache.get(paths[1])] == ['b.ifc']
+
+
+def test_extract_iul_returns_parsed_entries_on_cancel(monkeypatch, tmp_path):
+    from xmlchecks.pkg.cancel import CancelToken
+    from xmlchecks.pkg.iul_reader import IulEntryCache, extract_iul_entries
+
+    paths = []
+    for name in ('a', 'b', 'c'):
+        path = tmp_path / f'{name}.pdf'
+        path.write_bytes(f'%PDF {name}.ifc'.encode())
+        paths.append(path)
+    monkeypatch.setattr(
+        'xmlchecks.pkg.iul_reader._extract_text_pypdf2',
+        lambda doc, **kw: f'CRC-32 ABCDEF12\n{doc.data.decode()[5:]} 01.02.2024 12:34 1234',
+    )
+    cancel = CancelToken()
+    cache = IulEntryCache()
+    res = extract_iul_entries(paths, lambda e: cancel.cancel(), cancel=cancel, entries_cache=cache)
+    assert list(res) == ['a.ifc']
+    assert len(cache) == 1
+
+
+def test_extract_pdf_text_debug_missing_file(tmp_path):
+    result = extract_pdf_text_debug(tmp_path / 'missing.pdf')
+    assert result == {
+        'pypdf2': {'raw': '', 'normalized': ''},
+        'ocr': {'raw': '', 'normalized': ''},
+    }
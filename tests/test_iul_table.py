@@ -0,0 +1,94 @@
+import pytest
+
+from xmlchecks.pkg.iul_table import parse_word_table
+
+
+def w(x0, y, text, h=12.0, char=6.0):
+    return (x0, y, x0 + char * len(text), y + h, text, 0, 0, 0)
+
+
+def test_wrapped_name_and_label_crc():
+    page = [
+        w(50, 70, 'CRC-32'), w(92, 70, 'ABCDEF12'),
+        w(50, 100, 'Имя'), w(80, 100, 'файла'), w(300, 100, 'Размер'),
+        w(80, 124, '1-2024-60_П_ТКР_ОХ.П_Пролетное'),
+        w(50, 130, '1'), w(300, 130, '1'), w(308, 130, '234'), w(332, 130, '567'),
+        w(400, 124, '01.02.2024'), w(400, 137, '12:34'),
+        w(80, 137, 'строение.ifc'),
+    ]
+    entries = parse_word_table([page], 'doc.pdf')
+    assert len(entries) == 1
+    e = entries[0]
+    assert e.basename == '1-2024-60_П_ТКР_ОХ.П_Пролетное строение.ifc'
+    assert e.crc_hex == 'ABCDEF12'
+    assert e.dt_str == '01.02.2024 12:34'
+    assert e.size_bytes == 1234567
+    assert e.source_pdf == 'doc.pdf'
+
+
+def test_reordered_columns_with_crc_cell():
+    page = [
+        w(50, 100, '01.02.2024'), w(116, 100, '10:00'), w(160, 100, '42'),
+        w(200, 100, '0000ABCD'), w(280, 100, 'a.ifc'),
+        w(50, 130, '03.04.2024'), w(116, 130, '11:11'), w(160, 130, '7'),
+        w(200, 130, 'DEADBEEF'), w(280, 130, 'b.ifc'),
+    ]
+    entries = parse_word_table([page], 'doc.pdf')
+    got = {e.basename: (e.crc_hex, e.dt_str, e.size_bytes) for e in entries}
+    assert got == {
+        'a.ifc': ('0000ABCD', '01.02.2024 10:00', 42),
+        'b.ifc': ('DEADBEEF', '03.04.2024 11:11', 7),
+    }
+
+
+def test_digit_only_crc_cell_taken_by_column():
+    page = [
+        w(50, 100, '1'), w(80, 100, 'a.ifc'), w(160, 100, '42'), w(200, 100, '0000ABCD'),
+        w(50, 130, '2'), w(80, 130, 'b.ifc'), w(160, 130, '7'), w(200, 130, '12345678'),
+    ]
+    entries = parse_word_table([page], 'doc.pdf')
+    got = {e.basename: (e.crc_hex, e.size_bytes) for e in entries}
+    assert got == {'a.ifc': ('0000ABCD', 42), 'b.ifc': ('12345678', 7)}
+
+
+def test_digit_only_crc_cell_without_crc_column():
+    page = [
+        w(50, 100, '1'), w(80, 100, 'a.ifc'),
+        w(160, 100, '1'), w(168, 100, '234'), w(200, 100, '12345678'),
+    ]
+    e, = parse_word_table([page], 'doc.pdf')
+    assert (e.crc_hex, e.size_bytes) == ('12345678', 1234)
+
+
+def test_eight_digit_size_with_labelled_crc():
+    page = [
+        w(50, 70, 'CRC-32'), w(92, 70, 'ABCDEF12'),
+        w(50, 100, '1'), w(80, 100, 'a.ifc'), w(200, 100, '12345678'),
+    ]
+    e, = parse_word_table([page], 'doc.pdf')
+    assert (e.crc_hex, e.size_bytes) == ('ABCDEF12', 12345678)
+
+
+def test_extract_uses_word_table_before_ocr(monkeypatch, tmp_path):
+    fitz = pytest.importorskip('fitz')
+    from xmlchecks.pkg.iul_reader import extract_iul_entries_from_pdf
+
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((50, 80), 'CRC-32 ABCDEF12', fontsize=10)
+    page.insert_text((80, 134), 'Very_long_model_name_', fontsize=10)
+    page.insert_text((80, 146), 'part2.ifc', fontsize=10)
+    page.insert_text((300, 140), '1234', fontsize=10)
+    page.insert_text((400, 140), '01.02.2024', fontsize=10)
+    page.insert_text((460, 140), '12:34', fontsize=10)
+    pdf_path = tmp_path / 'doc.pdf'
+    doc.save(pdf_path)
+
+    def no_ocr(*a, **kw):
+        raise AssertionError('OCR не должен вызываться')
+
+    monkeypatch.setattr('xmlchecks.pkg.iul_reader._extract_text_ocr', no_ocr)
+    entries = extract_iul_entries_from_pdf(pdf_path)
+    assert [e.basename for e in entries] == ['Very_long_model_name_part2.ifc']
+    assert entries[0].size_bytes == 1234
+    assert entries[0].dt_str == '01.02.2024 12:34'
@@ -0,0 +1,72 @@
+import os
+
+from xmlchecks.pkg.crc import CrcCache, compute_crc32
+from xmlchecks.pkg.iul_reader import IulEntry, IulEntryCache
+from xmlchecks.pkg.journal import Journal, load_journal
+
+
+def test_journal_replay_revalidates_against_stat(tmp_path):
+    ifc = tmp_path / 'a.ifc'
+    ifc.write_bytes(b'data')
+    pdf = tmp_path / 'a_УЛ.pdf'
+    pdf.write_bytes(b'%PDF')
+    entry = IulEntry('a.ifc', '0000ABCD', None, 4, None, pdf.name)
+    path = tmp_path / 'journal.jsonl'
+
+    with Journal(path, batch=1) as journal:
+        crcs = CrcCache(record=journal.recorder('ifc'))
+        crcs(ifc)
+        IulEntryCache(record=journal.recorder('iul')).put(pdf, [entry])
+    # Оборванная при сбое последняя строка
+    with path.open('a', encoding='utf-8') as f:
+        f.write('{"t": "crc", "kind": "ifc", "pa')
+
+    replay = load_journal(path)
+    assert len(replay) == 2
+    assert IulEntryCache(replay.pdfs).get(pdf) == [entry]
+
+    calls = []
+
+    def compute(p):
+        calls.append(p)
+        return compute_crc32(p)
+
+    resumed = CrcCache(replay.crcs['ifc'], compute)
+    assert resumed(ifc) == compute_crc32(ifc)
+    assert calls == []
+
+    # Изменённый после сбоя файл хэшируется заново
+    ifc.write_bytes(b'changed')
+    st = ifc.stat()
+    os.utime(ifc, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert resumed(ifc) == compute_crc32(ifc)
+    assert calls == [ifc]
+
+
+def test_discard_removes_journal(tmp_path):
+    path = tmp_path / 'journal.jsonl'
+    journal = Journal(path)
+    journal.discard()
+    assert not path.exists()
+    assert len(load_journal(path)) == 0
+
+
+def test_resume_after_torn_line_keeps_new_records(tmp_path):
+    path = tmp_path / 'journal.jsonl'
+    files = []
+    for i in range(3):
+        f = tmp_path / f'{i}.ifc'
+        f.write_bytes(b'x' * (i + 1))
+        files.append(f)
+    # Два продолжения подряд, каждое оборвано посреди записи
+    for f in files[:2]:
+        with Journal(path, batch=1) as journal:
+            CrcCache(record=journal.recorder('ifc'))(f)
+        with path.open('a', encoding='utf-8') as out:
+            out.write('{"t": "crc", "kind": "ifc", "pa')
+    with Journal(path, batch=1) as journal:
+        CrcCache(record=journal.recorder('ifc'))(files[2])
+
+    replay = load_journal(path)
+    assert set(replay.crcs['ifc']) == {str(f) for f in files}
+    assert path.read_text(encoding='utf-8').endswith('}\n')
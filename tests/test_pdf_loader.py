@@ -0,0 +1,88 @@
+import os
+
+from xmlchecks.pkg import pdf_loader
+from xmlchecks.pkg.crc import compute_crc32
+from xmlchecks.pkg.iul_reader import extract_iul_entries
+from xmlchecks.pkg.pdf_loader import PdfCache, load_pdf
+from xmlchecks.pkg.report_builder_pdf_xml import build_report_pdf_xml
+
+
+def test_load_pdf_crc(tmp_path):
+    p = tmp_path / 'doc.pdf'
+    p.write_bytes(b'%PDF-1.4 data')
+    doc = load_pdf(p)
+    assert doc.data == b'%PDF-1.4 data'
+    assert doc.crc32 == compute_crc32(p)
+    assert doc.stream().read() == doc.data
+
+
+def test_cache_reads_file_once(monkeypatch, tmp_path):
+    p = tmp_path / 'a_УЛ.pdf'
+    p.write_bytes(b'%PDF-1.4')
+    reads = []
+    real_load = pdf_loader.load_pdf
+
+    def counting_load(path, *a, **kw):
+        reads.append(path)
+        return real_load(path, *a, **kw)
+
+    monkeypatch.setattr(pdf_loader, 'load_pdf', counting_load)
+    seen = []
+    monkeypatch.setattr(
+        'xmlchecks.pkg.iul_reader._extract_text_pypdf2',
+        lambda src, **kw: seen.append(src) or 'CRC-32 ABCDEF12\na.ifc 01.02.2024 12:34 10',
+    )
+
+    cache = PdfCache()
+    rows = build_report_pdf_xml({}, [p], hasher=cache.crc32)
+    iul_map = extract_iul_entries([p], pdf_cache=cache)
+
+    assert reads == [p]
+    assert rows[0]['CRC-32 PDF'] == f"{compute_crc32(p):08X}"
+    assert seen[0].data == b'%PDF-1.4'
+    assert iul_map['a.ifc'].source_pdf == p.name
+
+
+def test_cache_rereads_changed_file(tmp_path):
+    p = tmp_path / 'doc.pdf'
+    p.write_bytes(b'one')
+    cache = PdfCache()
+    first = cache.crc32(p)
+    p.write_bytes(b'two!')
+    st = p.stat()
+    os.utime(p, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert cache.crc32(p) != first
+    assert cache.crc32(p) == compute_crc32(p)
+
+
+def test_cache_respects_byte_budget(tmp_path):
+    a = tmp_path / 'a.pdf'
+    b = tmp_path / 'b.pdf'
+    a.write_bytes(b'x' * 10)
+    b.write_bytes(b'y' * 10)
+    cache = PdfCache(max_bytes=15)
+    cache.load(a)
+    cache.load(b)
+    assert cache._held == 10
+    assert cache.crc32(a) == compute_crc32(a)
+
+
+def test_cache_survives_pass_over_set_larger_than_budget(monkeypatch, tmp_path):
+    paths = []
+    for i in range(10):
+        p = tmp_path / f'{i}.pdf'
+        p.write_bytes(bytes([i]) * 10)
+        paths.append(p)
+    reads = []
+    real_load = pdf_loader.load_pdf
+    monkeypatch.setattr(pdf_loader, 'load_pdf', lambda path, *a, **kw: reads.append(path) or real_load(path, *a, **kw))
+
+    cache = PdfCache(max_bytes=45)
+    # Проход PDF↔XML, затем разбор ИУЛ в том же порядке
+    for p in paths:
+        cache.crc32(p)
+    for p in paths:
+        assert cache.load(p).crc32 == compute_crc32(p)
+    # Четыре документа, поместившиеся в бюджет, во втором проходе не читаются
+    assert reads == paths + paths[4:]
+    assert cache._held <= 45
@@ -0,0 +1,70 @@
+import threading
+
+import pytest
+
+from xmlchecks.pkg.cancel import CancelToken
+from xmlchecks.pkg.pipeline import CPU, Pipeline
+
+
+def test_stage_gets_dependency_results_in_order():
+    pipe = Pipeline()
+    pipe.add("a", lambda: 1)
+    pipe.add("b", lambda: 2, kind=CPU)
+    pipe.add("sum", lambda b, a: (b, a), deps=("b", "a"))
+    assert pipe.run() == {"a": 1, "b": 2, "sum": (2, 1)}
+
+
+def test_independent_stages_run_concurrently():
+    started = threading.Event()
+
+    def first():
+        # Дождётся второго этапа только если они идут одновременно
+        assert started.wait(5)
+        return "first"
+
+    def second():
+        started.set()
+        return "second"
+
+    pipe = Pipeline()
+    pipe.add("first", first)
+    pipe.add("second", second, kind=CPU)
+    assert pipe.run() == {"first": "first", "second": "second"}
+
+
+def test_error_stops_dependent_stages():
+    ran = []
+
+    def boom():
+        raise RuntimeError("boom")
+
+    pipe = Pipeline()
+    pipe.add("boom", boom)
+    pipe.add("after", lambda _: ran.append(1), deps=("boom",))
+    with pytest.raises(RuntimeError):
+        pipe.run()
+    assert ran == []
+
+
+def test_cancel_skips_unstarted_stages():
+    cancel = CancelToken()
+    pipe = Pipeline(cancel=cancel)
+    pipe.add("a", cancel.cancel)
+    pipe.add("b", lambda _: "b", deps=("a",))
+    assert "b" not in pipe.run()
+
+
+def test_salvage_stage_runs_after_cancel():
+    cancel = CancelToken()
+    pipe = Pipeline(cancel=cancel)
+    pipe.add("a", cancel.cancel)
+    pipe.add("b", lambda _: "b", deps=("a",))
+    pipe.add("save", lambda _: "saved", deps=("a",), salvage=True)
+    results = pipe.run()
+    assert "b" not in results and results["save"] == "saved"
+
+
+def test_unknown_dependency_rejected():
+    pipe = Pipeline()
+    with pytest.raises(ValueError):
+        pipe.add("b", lambda _: None, deps=("a",))
@@ -0,0 +1,31 @@
+from xmlchecks.pkg.reconcile import AMBIGUOUS, BY_CRC, BY_NAME, MISSING, Reconciler
+
+
+def _crc(name, meta):
+    return meta.get('crc_hex')
+
+
+def test_match_by_name_crc_and_extras():
+    manifest = {
+        'a.ifc': {'crc_hex': 'AAAAAAAA'},
+        'b.ifc': {'crc_hex': 'BBBBBBBB'},
+        'dup1.ifc': {'crc_hex': 'DDDDDDDD'},
+        'dup2.ifc': {'crc_hex': 'DDDDDDDD'},
+        'left.ifc': {'crc_hex': None},
+    }
+    rec = Reconciler(manifest, _crc)
+    assert rec.match('a.ifc', '00000000').by == BY_NAME
+    m = rec.match('renamed.ifc', 'BBBBBBBB')
+    assert (m.by, m.key) == (BY_CRC, 'b.ifc')
+    m = rec.match('x.ifc', 'DDDDDDDD')
+    assert (m.by, m.hits, bool(m)) == (AMBIGUOUS, 2, False)
+    assert rec.match('y.ifc', 'EEEEEEEE').by == MISSING
+    assert [k for k, _ in rec.extras()] == ['dup1.ifc', 'dup2.ifc', 'left.ifc']
+
+
+def test_case_insensitive_lookup_keeps_manifest_key():
+    rec = Reconciler({'Model.IFC': {'crc_hex': None}}, _crc, case_sensitive=False)
+    m = rec.match('model.ifc')
+    assert (m.by, m.key) == (BY_NAME, 'Model.IFC')
+    assert list(rec.extras()) == []
+    assert Reconciler({'Model.IFC': {}}, _crc).match('model.ifc').by == MISSING
@@ -0,0 +1,55 @@
+import random
+import zlib
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from xmlchecks.pkg.report_builder import build_report
+from xmlchecks.pkg.reconcile_np import AMBIGUOUS, BY_CRC, BY_NAME, MISSING, join
+
+
+def test_join_by_name_crc_and_ambiguous():
+    index, by, hits, used = join(
+        ['a.ifc', 'b.ifc', 'd1.ifc', 'd2.ifc', 'A.IFC'],
+        [1, 2, 7, 7, None],
+        ['a.ifc', 'renamed.ifc', 'x.ifc', 'y.ifc', 'B.ifc'],
+        [0, 2, 7, 9, 5],
+    )
+    assert index.tolist() == [0, 1, -1, -1, -1]
+    assert by.tolist() == [BY_NAME, BY_CRC, AMBIGUOUS, MISSING, MISSING]
+    assert hits.tolist()[2] == 2
+    assert used.tolist() == [True, True, False, False, False]
+
+    index, by, _, _ = join(['a.ifc', 'A.IFC'], [None, None], ['A.ifc'], [0], case_sensitive=False)
+    assert (index.tolist(), by.tolist()) == ([0], [BY_NAME])
+
+
+@pytest.mark.parametrize('case_sensitive', [True, False])
+def test_vectorized_report_matches_reference(tmp_path, case_sensitive):
+    rnd = random.Random(7)
+    files = []
+    xml_map = {}
+    for i in range(80):
+        p = tmp_path / f'f{i}.ifc'
+        p.write_text(str(rnd.random()))
+        files.append(p)
+        crc = f"{zlib.crc32(p.read_bytes()):08X}"
+        r = rnd.random()
+        name = p.name if r < 0.5 else p.name.upper() if r < 0.6 else f'x{i}.ifc' if r < 0.85 else None
+        if name:
+            xml_map[name] = {'crc_hex': crc if rnd.random() < 0.8 else rnd.choice(['DEADBEEF', 'zz', crc.lower(), ''])}
+    xml_map['dup.ifc'] = {'crc_hex': xml_map.get('x3.ifc', {}).get('crc_hex')}
+    xml_map['empty.ifc'] = {}
+
+    expected = [dict(r) for r in build_report(xml_map, files, case_sensitive, vectorized=False)]
+    actual = [dict(r) for r in build_report(xml_map, files, case_sensitive, vectorized=True)]
+    assert actual == expected
+
+
+def test_existing_scenarios_vectorized(tmp_path, monkeypatch):
+    from xmlchecks.pkg import report_builder
+    from test_report_builder import test_build_report_scenarios
+
+    monkeypatch.setattr(report_builder, 'VECTORIZE_MIN_ROWS', 0)
+    test_build_report_scenarios(tmp_path)
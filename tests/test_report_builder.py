@@ -37,3 +37,13 @@ def test_build_report_scenarios(tmp_path):
     row_nm = next(r for r in rows if r['Имя файла IFC'] == 'name_mismatch.ifc')
     assert row_nm['CRC-32 XML'] == crc_name
     assert row_nm['Имя файла IFC из XML'] == 'other.ifc'
+
+
+def test_build_report_suggests_similar_names(tmp_path):
+    f = tmp_path / 'Section_AR_01.ifc'
+    f.write_text('model')
+    xml_map = {'Section-AR-01.ifc': {'crc_hex': '00000000'}}
+    rows = build_report(xml_map, [f], vectorized=False)
+    assert rows[0]['Подробности'].endswith('Похожая запись в XML: Section-AR-01.ifc (расстояние 0)')
+    assert rows[1]['Подробности'].endswith('Похожий файл: Section_AR_01.ifc (расстояние 0)')
+    assert [dict(r) for r in build_report(xml_map, [f], vectorized=True)] == [dict(r) for r in rows]
@@ -0,0 +1,81 @@
+import os
+from xmlchecks.pkg.report_builder_consolidated import build_report_consolidated
+from xmlchecks.pkg.utils import fmt_mtime
+from xmlchecks.pkg.crc import compute_crc32
+from xmlchecks.pkg.iul_reader import IulEntry
+
+
+def create_file(dir, name, content, mtime):
+    p = dir / name
+    p.write_text(content)
+    os.utime(p, (mtime, mtime))
+    return p
+
+
+def info(p):
+    return f"{compute_crc32(p):08X}", fmt_mtime(p.stat().st_mtime), p.stat().st_size
+
+
+def test_build_report_consolidated_scenarios(tmp_path):
+    base = 1700000000
+    good = create_file(tmp_path, 'good.ifc', 'good', base)
+    xml_bad = create_file(tmp_path, 'xml_bad.ifc', 'xml', base + 1)
+    iul_bad = create_file(tmp_path, 'iul_bad.ifc', 'iul', base + 2)
+    no_iul = create_file(tmp_path, 'no_iul.ifc', 'noiul', base + 3)
+
+    crc_good, dt_good, size_good = info(good)
+    crc_xml_bad, dt_xml_bad, size_xml_bad = info(xml_bad)
+    crc_iul_bad, dt_iul_bad, size_iul_bad = info(iul_bad)
+    crc_no_iul, _, _ = info(no_iul)
+
+    xml_map = {
+        'good.ifc': {'crc_hex': crc_good},
+        'xml_bad.ifc': {'crc_hex': 'FFFFFFFF'},
+        'iul_bad.ifc': {'crc_hex': crc_iul_bad},
+        'no_iul.ifc': {'crc_hex': crc_no_iul},
+        'gone.ifc': {'crc_hex': '11111111'},
+        'xml_only.ifc': {'crc_hex': '22222222'},
+    }
+    iul_map = {
+        'good.ifc': IulEntry('good.ifc', crc_good, dt_good, size_good, None, 'good_УЛ.pdf'),
+        'xml_bad.ifc': IulEntry('xml_bad.ifc', crc_xml_bad, dt_xml_bad, size_xml_bad, None, 'xml_bad_УЛ.pdf'),
+        'iul_bad.ifc': IulEntry('iul_bad.ifc', 'EEEEEEEE', dt_iul_bad, size_iul_bad, None, 'iul_bad_УЛ.pdf'),
+        'gone.ifc': IulEntry('gone.ifc', '33333333', None, None, None, 'gone_УЛ.pdf'),
+        'iul_only.ifc': IulEntry('iul_only.ifc', '44444444', None, None, None, 'iul_only_УЛ.pdf'),
+    }
+
+    rows = build_report_consolidated(xml_map, iul_map, [good, xml_bad, iul_bad, no_iul])
+    by_name = {(r['Имя файла IFC'] or r['Имя файла IFC из XML'] or r['Имя файла IFC из ИУЛ']): r for r in rows}
+    assert len(rows) == 7
+
+    assert by_name['good.ifc']['Статус'] == 'OK'
+    assert by_name['good.ifc']['XML и ИУЛ согласованы'] == 'Да'
+    assert by_name['xml_bad.ifc']['Статус'] == 'XML_CRC_MISMATCH;XML_IUL_MISMATCH'
+    assert by_name['xml_bad.ifc']['CRC ИУЛ совпадает'] == 'Да'
+    assert by_name['iul_bad.ifc']['Статус'] == 'IUL_CRC_MISMATCH;XML_IUL_MISMATCH'
+    assert by_name['no_iul.ifc']['Статус'] == 'NO_IUL_ENTRY'
+    assert by_name['no_iul.ifc']['Имя PDF'] is None
+
+    # XML и ИУЛ расходятся и без самого файла
+    gone = by_name['gone.ifc']
+    assert gone['Имя файла IFC'] is None
+    assert gone['Статус'] == 'ERROR_XML_EXTRA;ERROR_IUL_EXTRA;XML_IUL_MISMATCH'
+    assert gone['CRC-32 XML'] == '11111111' and gone['CRC-32 ИУЛ'] == '33333333'
+    assert by_name['xml_only.ifc']['Статус'] == 'ERROR_XML_EXTRA'
+    assert by_name['iul_only.ifc']['Статус'] == 'ERROR_IUL_EXTRA'
+    assert by_name['iul_only.ifc']['Имя PDF'] == 'iul_only_УЛ.pdf'
+
+
+def test_consolidated_hashes_each_file_once(tmp_path):
+    files = [create_file(tmp_path, f'{i}.ifc', str(i), 1700000000) for i in range(3)]
+    calls = []
+
+    def hasher(p):
+        calls.append(p)
+        return compute_crc32(p)
+
+    xml_map = {p.name: {'crc_hex': info(p)[0]} for p in files}
+    iul_map = {p.name: IulEntry(p.name, info(p)[0], None, None, None, p.stem + '_УЛ.pdf') for p in files}
+    rows = build_report_consolidated(xml_map, iul_map, files, hasher=hasher)
+    assert [r['Статус'] for r in rows] == ['OK'] * 3
+    assert calls == files
@@ -73,3 +73,52 @@ def test_build_report_iul_scenarios(tmp_path):
 
     row_extra = next(r for r in rows if r.get('Имя файла IFC') == 'extra.ifc')
     assert row_extra['Имя PDF'] == 'extra_УЛ.pdf'
+
+
+def test_build_report_iul_ocr_crc_correction(tmp_path):
+    base = 1700000000
+    f = create_file(tmp_path, 'scan.ifc', 'scan', base)
+    moved = create_file(tmp_path, 'moved.ifc', 'moved', base)
+    crc = f"{compute_crc32(f):08X}"
+    crc_moved = f"{compute_crc32(moved):08X}"
+
+    def ocr_misread(value):
+        # подменяем первую подходящую цифру типичной ошибкой OCR
+        for digit, letter in (('0', 'O'), ('8', 'B'), ('1', 'I'), ('D', '0'), ('B', '8')):
+            if digit in value:
+                return value.replace(digit, letter, 1)
+        raise AssertionError(value)
+
+    dt = _fmt_mtime(f.stat().st_mtime)
+    iul_map = {
+        'scan.ifc': IulEntry('scan.ifc', ocr_misread(crc), dt, f.stat().st_size, 'ctx', 'scan_УЛ.pdf', ocr=True),
+        'other.ifc': IulEntry('other.ifc', ocr_misread(crc_moved), dt, moved.stat().st_size, 'ctx', 'x_УЛ.pdf', ocr=True),
+    }
+    rows = build_report_iul(iul_map, [f, moved])
+    by_name = {r['Имя файла IFC']: r for r in rows}
+    assert by_name['scan.ifc']['Статус'] == 'CRC_OCR_CORRECTED'
+    assert by_name['scan.ifc']['CRC совпадает'] == 'Да'
+    assert by_name['moved.ifc']['Статус'] == 'NAME_MISMATCH;CRC_OCR_CORRECTED'
+    assert len(rows) == 2
+
+    rows_off = build_report_iul(iul_map, [f, moved], ocr_crc_correction=False)
+    assert {r['Статус'] for r in rows_off} == {'CRC_MISMATCH', 'ERROR_IFC_EXTRA', 'ERROR_IUL_EXTRA'}
+
+
+def test_build_report_iul_timeout(tmp_path):
+    a = create_file(tmp_path, 'a.ifc', 'a', 1700000000)
+    pdfs = [tmp_path / 'a_УЛ.pdf', tmp_path / 'b_УЛ.pdf']
+    rows = build_report_iul({}, [a], pdfs, timed_out_pdfs={'a_УЛ.pdf', 'b_УЛ.pdf'})
+    assert [(r['Имя файла IFC'], r['Имя PDF'], r['Статус']) for r in rows] == [
+        ('a.ifc', 'a_УЛ.pdf', 'IUL_TIMEOUT'),
+        (None, 'b_УЛ.pdf', 'IUL_TIMEOUT'),
+    ]
+
+
+def test_build_report_iul_cancelled(tmp_path):
+    from xmlchecks.pkg.cancel import CancelToken
+
+    a = create_file(tmp_path, 'a.ifc', 'a', 1700000000)
+    token = CancelToken()
+    token.cancel()
+    assert build_report_iul({}, [a], cancel=token) == []
@@ -0,0 +1,65 @@
+import os
+
+import pytest
+
+from xmlchecks.pkg import report_writer
+from xmlchecks.pkg.report_writer import BackgroundWriter, ReportLocked, RowSet, temp_path
+
+
+def _save_rows(rows):
+    def save(path):
+        items = list(rows)
+        path.write_text(",".join(items), encoding="utf-8")
+        return len(items)
+    return save
+
+
+def test_writer_waits_for_rows_and_replaces_target(tmp_path):
+    out = tmp_path / "r.txt"
+    out.write_text("old", encoding="utf-8")
+    rows = RowSet()
+    with BackgroundWriter() as writer:
+        future = writer.submit(out, _save_rows(rows))
+        assert not future.done()
+        rows.put(["a", "b"])
+        assert future.result(timeout=5) == 2
+    assert out.read_text(encoding="utf-8") == "a,b"
+    assert not temp_path(out).exists()
+
+
+def test_locked_target_can_be_retried(tmp_path, monkeypatch):
+    out = tmp_path / "r.txt"
+    real_replace = os.replace
+    calls = []
+
+    def locked_once(src, dst):
+        calls.append(dst)
+        if len(calls) == 1:
+            raise PermissionError("locked")
+        real_replace(src, dst)
+
+    monkeypatch.setattr(report_writer.os, "replace", locked_once)
+    rows = RowSet()
+    rows.put(["a"])
+    with BackgroundWriter() as writer:
+        future = writer.submit(out, _save_rows(rows))
+        with pytest.raises(ReportLocked) as exc:
+            future.result(timeout=5)
+    assert isinstance(exc.value, PermissionError)
+    assert exc.value.retry() == 1
+    assert out.read_text(encoding="utf-8") == "a"
+
+
+def test_failed_rows_propagate_and_leave_no_temp_file(tmp_path):
+    out = tmp_path / "r.txt"
+    rows = RowSet()
+    with BackgroundWriter() as writer:
+        def save(path):
+            path.write_text("partial", encoding="utf-8")
+            return list(rows)
+        future = writer.submit(out, save)
+        rows.fail(RuntimeError("check failed"))
+        with pytest.raises(RuntimeError, match="check failed"):
+            future.result(timeout=5)
+    assert not out.exists()
+    assert not temp_path(out).exists()
@@ -0,0 +1,36 @@
+from xmlchecks.pkg.report_builder import XmlRow
+from xmlchecks.pkg.report_builder_iul import IulRow, IulRowPdfName, PDF_NAME_COL
+from xmlchecks.pkg.rows import Status, crc_text, pack_crc, status_text
+
+
+def test_pack_crc_keeps_ocr_garbage_as_text():
+    assert pack_crc('abcdef12') == 0xABCDEF12
+    assert crc_text(pack_crc('0000001F')) == '0000001F'
+    assert pack_crc('ABCDEFOO') == 'ABCDEFOO'
+    assert pack_crc('') is None
+
+
+def test_status_text_follows_check_order():
+    flags = Status.DT_MISMATCH | Status.NAME_MISMATCH | Status.CRC_OCR_CORRECTED
+    assert status_text(flags) == 'NAME_MISMATCH;CRC_OCR_CORRECTED;DT_MISMATCH'
+    assert status_text(Status(0)) == '—'
+
+
+def test_row_is_a_mapping_with_legacy_keys():
+    row = XmlRow('a.ifc', None, None, 0x1234, None, None, Status.ERROR_IFC_EXTRA, ['нет записи'])
+    assert not hasattr(row, '__dict__')
+    assert row['CRC-32 IFC'] == '00001234'
+    assert row['Имя совпадает'] == '—'
+    assert row.get('Статус') == 'ERROR_IFC_EXTRA'
+    assert row.get('нет такого', 'x') == 'x'
+    assert dict(row) == row.as_dict()
+    assert dict(row)['recommendation'] == 'Удалите лишний файл или добавьте запись в XML'
+
+
+def test_iul_pdf_name_column_only_when_requested():
+    args = ['a.ifc', 'b.pdf', 'a.ifc', 1, 1, None, None, None, None, True, True, None, None, False,
+            Status.PDF_NAME_MISMATCH]
+    assert PDF_NAME_COL not in IulRow(*args)
+    row = IulRowPdfName(*args)
+    assert row[PDF_NAME_COL] == 'Нет'
+    assert row['recommendation'].endswith('(ожидаемое имя: a_УЛ.pdf)')
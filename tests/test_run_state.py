@@ -0,0 +1,116 @@
+from xmlchecks.pkg import iul_reader
+from xmlchecks.pkg.iul_reader import IulEntry, IulEntryCache, extract_iul_entries
+from xmlchecks.pkg.run_state import (
+    CHANGED, FIXED, NEW_ERROR, UNCHANGED, RowRecorder, RunState, fingerprint,
+)
+
+
+def test_row_recorder_changes():
+    previous = [
+        ['a.ifc', 'OK', None],
+        ['b.ifc', 'CRC_MISMATCH', 'x'],
+        ['c.ifc', 'CRC_MISMATCH', 'x'],
+        ['d.ifc', 'ERROR_XML_EXTRA', 'gone'],
+        ['e.ifc', 'CRC_MISMATCH', 'x'],
+    ]
+    rec = RowRecorder(previous)
+    rows = [
+        {'Имя файла IFC': 'a.ifc', 'Статус': 'CRC_MISMATCH', 'Подробности': 'new'},
+        {'Имя файла IFC': 'b.ifc', 'Статус': 'OK'},
+        {'Имя файла IFC': 'c.ifc', 'Статус': 'CRC_MISMATCH', 'Подробности': 'x'},
+        {'Имя файла IFC': 'e.ifc', 'Статус': 'NAME_MISMATCH'},
+        {'Имя файла IFC из XML': 'f.ifc', 'Статус': 'ERROR_XML_EXTRA'},
+    ]
+    assert list(rec.record(rows)) == rows
+    assert [(kind, key) for kind, key, *_ in rec.changes()] == [
+        (NEW_ERROR, 'a.ifc'),
+        (NEW_ERROR, 'f.ifc'),
+        (CHANGED, 'e.ifc'),
+        (FIXED, 'b.ifc'),
+        (FIXED, 'd.ifc'),
+        (UNCHANGED, 'c.ifc'),
+    ]
+
+
+def test_run_state_roundtrip_and_unchanged(tmp_path):
+    ifc = tmp_path / 'a.ifc'
+    ifc.write_bytes(b'abc')
+    out = tmp_path / 'report.xlsx'
+    out.write_bytes(b'')
+    state_path = tmp_path / 'state.json'
+
+    state = RunState.load(state_path)
+    inputs = fingerprint([ifc], {'checks': [True]})
+    assert not state.unchanged(inputs)
+
+    crcs = state.crc_cache('ifc')
+    crc = crcs(ifc)
+    entries = IulEntryCache()
+    entries.put(ifc, [IulEntry('a.ifc', 'ABCDEF12', None, 3, None, 'a_УЛ.pdf')])
+    state.keep_crcs('ifc', crcs, [ifc])
+    state.keep_entries(entries, [ifc])
+    rec = state.recorder('xml')
+    list(rec.record([{'Имя файла IFC': 'a.ifc', 'Статус': 'OK'}]))
+    state.save(inputs, [out], {'xml': rec})
+
+    again = RunState.load(state_path)
+    assert again.unchanged(fingerprint([ifc], {'checks': [True]}))
+    assert not again.unchanged(fingerprint([ifc], {'checks': [False]}))
+    assert again.recorder('xml').previous == [['a.ifc', 'OK', None]]
+    calls = []
+    cache = again.crc_cache('ifc', compute=lambda p: calls.append(p) or 0)
+    assert cache(ifc) == crc and calls == []
+    assert again.entries_cache().get(ifc)[0].crc_hex == 'ABCDEF12'
+
+    ifc.write_bytes(b'abcd')
+    assert not again.unchanged(fingerprint([ifc], {'checks': [True]}))
+    assert again.entries_cache().get(ifc) is None
+
+
+def test_run_state_ignores_corrupt_file(tmp_path):
+    path = tmp_path / 'state.json'
+    path.write_text('{not json')
+    assert RunState.load(path).inputs is None
+
+
+def test_extract_iul_entries_skips_cached_pdfs(monkeypatch, tmp_path):
+    pdf = tmp_path / 'a_УЛ.pdf'
+    pdf.write_bytes(b'%PDF')
+    parsed = []
+
+    def fake(p, **kw):
+        parsed.append(p)
+        return [IulEntry('a.ifc', 'ABCDEF12', None, None, None, p.name)], True
+
+    monkeypatch.setattr(iul_reader, '_pdf_entries', fake)
+    cache = IulEntryCache()
+    first = extract_iul_entries([pdf], entries_cache=cache)
+    second = extract_iul_entries([pdf], entries_cache=cache)
+    assert first == second and list(first) == ['a.ifc']
+    assert parsed == [pdf]
+
+
+def test_extract_iul_entries_does_not_cache_incomplete_parses(monkeypatch, tmp_path):
+    scan = tmp_path / 'scan_УЛ.pdf'
+    scan.write_bytes(b'%PDF')
+    monkeypatch.setattr(iul_reader, '_extract_text_pypdf2', lambda doc, **kw: '')
+    monkeypatch.setattr(iul_reader, '_extract_words', lambda doc: [])
+    monkeypatch.setattr(iul_reader, 'ocr_available', lambda: True)
+
+    # Без OCR скан не распознаётся
+    cache = IulEntryCache()
+    assert extract_iul_entries([scan], entries_cache=cache, ocr=False) == {}
+    assert cache.get(scan) is None
+
+    # Страница пропущена по --page-timeout: при следующем запуске PDF разбирается снова
+    def slow_page(doc, skipped=None, **kw):
+        skipped.append(0)
+        return ''
+
+    monkeypatch.setattr(iul_reader, '_extract_text_ocr', slow_page)
+    assert extract_iul_entries([scan], entries_cache=cache, page_timeout=1) == {}
+    assert cache.get(scan) is None
+
+    monkeypatch.setattr(iul_reader, '_extract_text_ocr', lambda doc, **kw: 'CRC-32 ABCDEF12\na.ifc 01.02.2024 12:34 1234')
+    assert list(extract_iul_entries([scan], entries_cache=cache)) == ['a.ifc']
+    assert [e.basename for e in cache.get(scan)] == ['a.ifc']
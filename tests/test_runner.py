@@ -0,0 +1,80 @@
+import csv
+import time
+import zlib
+
+from xmlchecks.pkg.cancel import CancelToken, OperationCancelled
+from xmlchecks.pkg.pipeline import Pipeline
+from xmlchecks.pkg.runner import EXIT_CANCELLED, ProjectResult, SharedCaches, build_parser, plan_project, run_pipeline
+from xmlchecks.pkg.scheduler import Scheduler
+
+
+def test_cancel_during_iul_parsing_writes_partial_report(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    ifc = tmp_path / 'ifc'
+    ifc.mkdir()
+    pdf = tmp_path / 'pdf'
+    pdf.mkdir()
+    for name in ('a', 'b'):
+        (ifc / f'{name}.ifc').write_bytes(name.encode())
+        (pdf / f'{name}_УЛ.pdf').write_bytes(f'%PDF {name}.ifc'.encode())
+    shared = SharedCaches(Scheduler(io_jobs=2))
+    cancel = CancelToken()
+
+    def text(doc, **kw):
+        name = doc.data.decode()[5:]
+        if name == 'b.ifc':
+            # Ctrl+C во время разбора второго ИУЛ, когда IFC уже посчитаны
+            deadline = time.monotonic() + 5
+            while len(shared.ifc_crc) < 2 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            cancel.cancel()
+            raise OperationCancelled()
+        crc = zlib.crc32(name[0].encode())
+        return f'CRC-32 {crc:08X}\n{name} 01.02.2024 12:34 1'
+
+    monkeypatch.setattr('xmlchecks.pkg.iul_reader._extract_text_pypdf2', text)
+    args = build_parser().parse_args([
+        '--check-iul', '--ifc-dir', str(ifc), '--iul-dir', str(pdf),
+        '--out', str(tmp_path / 'r.xlsx'), '--format', 'csv',
+    ])
+    sched = Scheduler(io_jobs=2)
+    pipe = Pipeline(sched.stage_workers(), cancel=cancel)
+    result = ProjectResult('p')
+    finish = plan_project(args, pipe, sched, cancel, shared, result)
+    assert finish(run_pipeline(pipe, cancel)) == EXIT_CANCELLED
+
+    out, stats = result.reports['iul']
+    with out.open(encoding='utf-8-sig', newline='') as f:
+        rows = list(csv.DictReader(f))
+    # В отчёт попал только проверенный файл; неразобранный ИУЛ не выдан за ошибку
+    assert [r['Имя файла IFC'] for r in rows] == ['a.ifc']
+    assert stats['total'] == 1
+
+
+def test_ifc_crc_stage_hashes_on_io_jobs_threads(tmp_path, monkeypatch):
+    import threading
+
+    from xmlchecks.pkg import runner
+
+    ifc = tmp_path / 'ifc'
+    ifc.mkdir()
+    for name in ('a', 'b'):
+        (ifc / f'{name}.ifc').write_bytes(name.encode())
+    # Оба файла должны хэшироваться одновременно: по очереди барьер не пройти
+    barrier = threading.Barrier(2, timeout=5)
+    real = runner.compute_crc32
+
+    def hashing(path, **kw):
+        barrier.wait()
+        return real(path, **kw)
+
+    monkeypatch.setattr(runner, 'compute_crc32', hashing)
+    args = build_parser().parse_args(['--check-xml', '--ifc-dir', str(ifc), '--xml', str(tmp_path / 'list.xml'), '--format', 'csv'])
+    (tmp_path / 'list.xml').write_text('<?xml version="1.0"?>\n<Root></Root>', encoding='utf-8')
+    sched = Scheduler(io_jobs=2)
+    cancel = CancelToken()
+    pipe = Pipeline(sched.stage_workers(), cancel=cancel)
+    result = ProjectResult('p')
+    finish = plan_project(args, pipe, sched, cancel, SharedCaches(sched), result)
+    assert finish(run_pipeline(pipe, cancel)) == 0
+    assert not barrier.broken
@@ -0,0 +1,67 @@
+import threading
+
+import pytest
+
+from xmlchecks.pkg.crc import compute_crc32
+from xmlchecks.pkg.pdf_loader import load_pdf
+from xmlchecks.pkg.pipeline import CPU, IO
+from xmlchecks.pkg.scheduler import Scheduler
+
+
+def test_jobs_budget_split():
+    s = Scheduler(jobs=6)
+    assert s.stage_workers() == {IO: 3, CPU: 1}
+    assert s.processes(1) == 3
+    assert Scheduler(jobs=6, ocr_jobs=4).stage_workers()[IO] == 2
+    assert Scheduler(jobs=1).processes(None) == 1
+    # Без бюджета — прежние значения по умолчанию
+    assert Scheduler().processes(None) is None
+    assert Scheduler().stage_workers() == {IO: 4, CPU: 1}
+    with pytest.raises(ValueError):
+        Scheduler(jobs=4, io_jobs=3, ocr_jobs=3)
+    with pytest.raises(ValueError):
+        Scheduler(io_jobs=0)
+
+
+def test_reserve_limits_inflight_bytes():
+    s = Scheduler(max_inflight_bytes=10)
+    entered = threading.Event()
+    with s.reserve(8):
+        t = threading.Thread(target=lambda: s.reserve(5).__enter__() or entered.set())
+        t.start()
+        assert not entered.wait(0.1)
+    assert entered.wait(2)
+    t.join()
+    # Запрос больше бюджета проходит, когда бюджет свободен
+    with s.reserve(100):
+        pass
+
+
+def test_throttle_token_bucket():
+    now = [0.0]
+    slept = []
+
+    def sleep(d):
+        slept.append(d)
+        now[0] += d
+
+    s = Scheduler(read_rate=100, clock=lambda: now[0], sleep=sleep)
+    s.throttle(100)  # всплеск в пределах ёмкости ведра
+    assert slept == []
+    s.throttle(50)
+    assert slept == [pytest.approx(0.5)]
+    now[0] += 10
+    s.throttle(100)
+    assert len(slept) == 1
+
+
+def test_readers_use_scheduler(tmp_path):
+    p = tmp_path / 'a.pdf'
+    p.write_bytes(b'%PDF' * 1000)
+    calls = []
+    s = Scheduler(max_inflight_bytes=1024, read_rate=1e9, sleep=lambda d: None)
+    s.throttle = lambda n: calls.append(n)
+    assert compute_crc32(p, chunk_size=1000, scheduler=s) == compute_crc32(p)
+    assert calls == [1000] * 4
+    assert load_pdf(p, scheduler=s).crc32 == compute_crc32(p)
+    assert calls[-1] == 4000
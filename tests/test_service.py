@@ -0,0 +1,88 @@
+import json
+import logging
+import threading
+import urllib.request
+import zlib
+
+from xmlchecks.pkg.scheduler import Scheduler
+from xmlchecks.pkg.service import CheckService, make_server
+
+
+def _project(tmp_path):
+    ifc = tmp_path / 'ifc'
+    ifc.mkdir()
+    (ifc / 'model.ifc').write_bytes(b'IFC data')
+    crc = format(zlib.crc32(b'IFC data'), '08X')
+    xml = tmp_path / 'list.xml'
+    xml.write_text(
+        '<?xml version="1.0"?>\n<Root><ModelFile><FileName>model.ifc</FileName>'
+        f'<FileChecksum>{crc}</FileChecksum><FileFormat>IFC</FileFormat></ModelFile></Root>',
+        encoding='utf-8',
+    )
+    return {'xml': str(xml), 'ifc-dir': str(ifc), 'out': str(tmp_path / 'r.xlsx'), 'check-xml': True, 'force': True}
+
+
+def test_service_runs_jobs_with_warm_caches(tmp_path, caplog):
+    caplog.set_level(logging.INFO)
+    service = CheckService(Scheduler(io_jobs=2))
+    try:
+        job = _project(tmp_path)
+        events = []
+        assert service.run_job(job, events.append) == 0
+        kinds = [e['event'] for e in events]
+        assert kinds[:2] == ['queued', 'started']
+        assert kinds[-1] == 'done' and events[-1]['code'] == 0
+        assert 'log' in kinds
+        assert {'event': 'stage', 'stage': 'xml_report', 'state': 'done'} in events
+        report = next(e for e in events if e['event'] == 'report')
+        assert report['path'] == job['out'] and report['stats']['errors'] == 0
+        assert service.status()['caches']['ifc_crc'] == 1
+
+        # Второе задание: CRC-32 берётся из кэша службы
+        service.shared.ifc_crc._compute = None
+        events = []
+        assert service.run_job(job, events.append) == 0
+        assert service.status()['jobs'] == 2
+
+        events = []
+        assert service.run_job({'xml': str(tmp_path / 'missing.xml'), 'ifc-dir': job['ifc-dir']}, events.append) == 2
+        assert events[-1]['event'] == 'done' and 'не найден' in events[-1]['note']
+    finally:
+        service.close()
+
+
+def test_service_http(tmp_path):
+    service = CheckService(Scheduler(io_jobs=2))
+    server = make_server(service, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base = f'http://127.0.0.1:{server.server_address[1]}'
+    try:
+        with urllib.request.urlopen(base + '/status') as resp:
+            assert json.load(resp) == {'jobs': 0, 'busy': False, 'caches': {'ifc_crc': 0, 'iul_pdfs': 0}}
+        req = urllib.request.Request(
+            base + '/check', data=json.dumps(_project(tmp_path)).encode('utf-8'), method='POST'
+        )
+        with urllib.request.urlopen(req) as resp:
+            assert resp.headers['Content-Type'].startswith('application/x-ndjson')
+            events = [json.loads(line) for line in resp]
+        assert events[0] == {'event': 'queued', 'job': 1}
+        assert events[-1]['event'] == 'done' and events[-1]['code'] == 0
+    finally:
+        server.shutdown()
+        server.server_close()
+        service.close()
+
+
+def test_service_accepts_batch_style_job(tmp_path, capsys):
+    service = CheckService(Scheduler(io_jobs=2))
+    try:
+        job = {**_project(tmp_path), 'name': 'Корпус 1'}
+        result = service.execute(job, lambda e: None)
+        assert (result.code, result.name) == (0, 'Корпус 1')
+
+        result = service.execute({**job, 'bogus': 1}, lambda e: None)
+        assert result.code == 2 and '--bogus' in result.note
+        assert capsys.readouterr().err == ''
+    finally:
+        service.close()
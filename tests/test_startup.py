@@ -0,0 +1,26 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from xmlchecks.pkg import iul_reader
+
+ROOT = Path(__file__).resolve().parent.parent
+HEAVY = ('openpyxl', 'PyPDF2', 'fitz', 'pymupdf', 'pytesseract', 'PIL', 'numpy')
+
+
+def test_cli_import_skips_heavy_dependencies():
+    code = (
+        'import sys, main_cli, pkg.iul_reader, pkg.writers, pkg.service; '
+        f'print(sorted(m for m in sys.modules if m.split(".")[0] in {HEAVY!r}))'
+    )
+    out = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == '[]'
+
+
+def test_iul_reader_lazy_attributes():
+    pypdf2 = pytest.importorskip('PyPDF2')
+    assert iul_reader.PdfReader is pypdf2.PdfReader
+    with pytest.raises(AttributeError):
+        iul_reader.no_such_attribute
@@ -0,0 +1,63 @@
+import csv
+import json
+import sqlite3
+
+import pytest
+
+from xmlchecks.pkg.writers import REPORT_HEADERS, report_path, write_report
+
+ROWS = [
+    {
+        "Имя файла IFC": "a.ifc",
+        "Имя файла IFC из XML": "a.ifc",
+        "CRC-32 XML": "AAAA",
+        "CRC-32 IFC": "AAAA",
+        "Имя совпадает": "Да",
+        "CRC совпадает": "Да",
+        "Статус": "OK",
+        "recommendation": None,
+    },
+    {
+        "Имя файла IFC": "b.ifc",
+        "Статус": "ERROR_IFC_EXTRA",
+        "Подробности": "нет записи",
+        "recommendation": "rec",
+    },
+]
+
+
+@pytest.mark.parametrize("fmt", ["csv", "jsonl", "sqlite"])
+def test_machine_formats_write_same_columns(tmp_path, fmt):
+    out = report_path(tmp_path / "report.xlsx", fmt)
+    changes = lambda: [("Новая ошибка", "b.ifc", None, "ERROR_IFC_EXTRA", "нет записи")]
+    code, stats = write_report(fmt, "xml", iter(ROWS), out, changes=changes)
+    assert (code, stats) == (1, {"total": 2, "ok": 1, "errors": 1})
+
+    headers = REPORT_HEADERS["xml"]
+    if fmt == "csv":
+        with out.open(encoding="utf-8-sig", newline="") as f:
+            table = list(csv.reader(f))
+        assert table[0] == headers
+        got = [dict(zip(headers, r)) for r in table[1:]]
+        assert (tmp_path / "report_changes.csv").exists()
+    elif fmt == "jsonl":
+        got = [json.loads(line) for line in out.read_text(encoding="utf-8").splitlines()]
+        assert list(got[0]) == headers
+        assert (tmp_path / "report_changes.jsonl").exists()
+    else:
+        con = sqlite3.connect(out)
+        cur = con.execute('SELECT * FROM report WHERE "Статус" != ?', ("OK",))
+        assert [d[0] for d in cur.description] == headers
+        got = [dict(zip(headers, r)) for r in cur]
+        plan = con.execute('EXPLAIN QUERY PLAN SELECT * FROM report WHERE "Статус" = ?', ("OK",)).fetchall()
+        assert "ix_report_Статус" in str(plan)
+        assert con.execute("SELECT COUNT(*) FROM changes").fetchone() == (1,)
+        con.close()
+    errors = [r for r in got if r["Статус"] != "OK"]
+    assert errors[0]["Имя файла IFC"] == "b.ifc"
+    assert errors[0]["Рекомендации"] == "rec"
+
+
+def test_unknown_format_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        write_report("pdf", "xml", [], tmp_path / "r.pdf")
@@ -0,0 +1,108 @@
+from copy import copy
+
+from openpyxl import Workbook, load_workbook
+
+from xmlchecks.pkg.xlsx_utils import (
+    CENTER_STYLE, HEADER_STYLE, LEFT_STYLE, ReportSheet, add_summary_sheet,
+)
+
+
+def test_report_sheet_styles_widths_and_formatting(tmp_path):
+    wb = Workbook(write_only=True)
+    sheet = ReportSheet(wb, 'Лист', ['Имя', 'Совпадает', 'Статус'], left_cols=(1,), yes_no_cols=('B',), status_col='C')
+    sheet.append(['a.ifc', 'Да', 'OK'])
+    sheet.append(['длинное имя файла.ifc', None, 'CRC_MISMATCH'])
+    sheet.close()
+    add_summary_sheet(wb, [{'Статус': 'OK'}], title='Итого')
+    out = tmp_path / 'out.xlsx'
+    wb.save(out)
+
+    ws = load_workbook(out)['Лист']
+    assert ws.freeze_panes == 'A2'
+    assert ws.auto_filter.ref == 'A1:C3'
+    assert [c.style for c in ws[1]] == [HEADER_STYLE] * 3
+    assert [c.style for c in ws[3]] == [LEFT_STYLE, CENTER_STYLE, CENTER_STYLE]
+    assert ws['A1'].font.b and ws['B3'].border.left.style == 'thin'
+    assert ws.column_dimensions['A'].width == int(len('длинное имя файла.ifc') * 1.1) + 2
+    assert sorted(str(cf.sqref) for cf in ws.conditional_formatting) == ['B2:B3', 'C2:C3']
+
+
+def test_empty_report_sheet_has_no_conditional_formatting(tmp_path):
+    wb = Workbook(write_only=True)
+    sheet = ReportSheet(wb, 'Лист', ['Имя', 'Статус'], status_col='B')
+    sheet.close()
+    out = tmp_path / 'out.xlsx'
+    wb.save(out)
+    ws = load_workbook(out)['Лист']
+    assert ws.max_row == 1
+    assert not list(ws.conditional_formatting)
+
+
+def test_report_sheet_keeps_repeated_values(tmp_path):
+    # Одно и то же значение дважды в строке — ссылки pickle не должны съезжать
+    note = 'нет ' + 'XML'
+    wb = Workbook(write_only=True)
+    sheet = ReportSheet(wb, 'Лист', ['A', 'B', 'C'])
+    sheet.append(['x', 'y', 'z'])
+    sheet.append([note, 'y', note])
+    sheet.close()
+    out = tmp_path / 'out.xlsx'
+    wb.save(out)
+    ws = load_workbook(out)['Лист']
+    assert [c.value for c in ws[3]] == [note, 'y', note]
+
+
+def _old_writer_sheet(wb, headers, rows, left_cols):
+    # Оформление, которое до именованных стилей ставил style_sheet/apply_borders
+    from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+
+    ws = wb.create_sheet('Лист')
+    ws.append(headers)
+    for r in rows:
+        ws.append(r)
+    for c in ws[1]:
+        c.font = Font(bold=True)
+        c.alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
+        c.fill = PatternFill(start_color='F2F2F2', end_color='F2F2F2', fill_type='solid')
+    for row in ws.iter_rows(min_row=2):
+        for cell in row:
+            if cell.column in left_cols:
+                cell.alignment = Alignment(horizontal='left', vertical='top', wrap_text=True)
+            else:
+                cell.alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
+    thin = Side(border_style='thin', color='D0D0D0')
+    for row in ws.iter_rows():
+        for cell in row:
+            cell.border = Border(left=thin, right=thin, top=thin, bottom=thin)
+
+
+def test_report_sheet_cells_look_like_old_writer(tmp_path):
+    headers, rows = ['Имя', 'Статус'], [['a.ifc', 'OK'], ['b.ifc', 'CRC_MISMATCH']]
+    old = Workbook()
+    _old_writer_sheet(old, headers, rows, left_cols={1})
+    new = Workbook(write_only=True)
+    sheet = ReportSheet(new, 'Лист', headers, left_cols=(1,))
+    for r in rows:
+        sheet.append(r)
+    sheet.close()
+    old.save(tmp_path / 'old.xlsx')
+    new.save(tmp_path / 'new.xlsx')
+
+    ws_old = load_workbook(tmp_path / 'old.xlsx')['Лист']
+    ws_new = load_workbook(tmp_path / 'new.xlsx')['Лист']
+    for row_old, row_new in zip(ws_old.iter_rows(), ws_new.iter_rows()):
+        for a, b in zip(row_old, row_new):
+            for attr in ('font', 'fill', 'border', 'alignment'):
+                assert copy(getattr(a, attr)) == copy(getattr(b, attr)), (b.coordinate, attr)
+    assert ws_new['A2'].font.name == 'Calibri' and ws_new['A2'].font.sz == 11
+
+
+def test_fill_constants_are_pattern_fills():
+    from openpyxl.styles import PatternFill
+
+    from xmlchecks.pkg import xlsx_utils
+
+    assert isinstance(xlsx_utils.GREEN, PatternFill)
+    assert xlsx_utils.GREEN.fill_type == 'solid'
+    assert xlsx_utils.RED.start_color.rgb.endswith(xlsx_utils.RED_RGB)
+    assert xlsx_utils.GRAY is xlsx_utils.GRAY
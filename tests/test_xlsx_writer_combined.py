@@ -22,3 +22,37 @@ def test_combined_writer_recommendation(tmp_path):
     assert ws['I2'].value == 'rec'
     sm = wb['Итого XML']
     assert sm.cell(row=2, column=2).value == 1
+
+
+def test_combined_writer_consumes_generators_once(tmp_path):
+    from xmlchecks.pkg.report_builder import iter_report
+
+    ifc = tmp_path / 'a.ifc'
+    ifc.write_text('a')
+    consumed = []
+
+    def rows():
+        for r in iter_report({'b.ifc': {'crc_hex': '00000000'}}, [ifc]):
+            consumed.append(r)
+            yield r
+
+    out = tmp_path / 'out.xlsx'
+    stats = write_combined_xlsx(rows(), iter(()), None, out)
+    assert len(consumed) == 2
+    assert stats == {'xml': {'total': 2, 'ok': 0, 'errors': 2}}
+    wb = load_workbook(out)
+    assert wb.sheetnames == ['XML - IFC', 'Итого XML']
+    assert wb['XML - IFC']['G2'].value == 'ERROR_IFC_EXTRA'
+
+
+def test_combined_writer_splits_long_report_into_numbered_sheets(tmp_path):
+    rows = [{"Имя файла IFC": f"f{i}.ifc", "Статус": "OK" if i % 2 else "CRC_MISMATCH"} for i in range(5)]
+    out = tmp_path / 'out.xlsx'
+    stats = write_combined_xlsx(rows, None, None, out, max_rows=2)
+    assert stats == {'xml': {'total': 5, 'ok': 2, 'errors': 3}}
+    wb = load_workbook(out)
+    assert wb.sheetnames == ['Оглавление', 'XML - IFC', 'XML - IFC (2)', 'XML - IFC (3)', 'Итого XML']
+    assert wb['XML - IFC (3)']['A2'].value == 'f4.ifc'
+    index = wb['Оглавление']
+    assert [c.value for c in index['C']][1:] == [1, 3, 5]
+    assert index['B3'].hyperlink.location == "'XML - IFC (2)'!A1"
@@ -0,0 +1,34 @@
+from openpyxl import load_workbook
+
+from xmlchecks.pkg.xlsx_writer import HEADERS, write_xlsx
+from xmlchecks.pkg.xlsx_writer_sharded import shard_path, write_xlsx_sharded
+
+
+def _rows(n):
+    return [{"Имя файла IFC": f"f{i}.ifc", "Статус": "OK" if i % 2 else "CRC_MISMATCH", "recommendation": "rec"} for i in range(n)]
+
+
+def test_short_report_is_written_as_one_workbook(tmp_path):
+    out = tmp_path / 'r.xlsx'
+    assert write_xlsx_sharded(write_xlsx, HEADERS, _rows(2), out, max_rows=2) == (1, {'total': 2, 'ok': 1, 'errors': 1})
+    assert load_workbook(out).sheetnames == ['XML - IFC', 'Итого XML']
+    assert not shard_path(out, 1).exists()
+
+
+def test_long_report_is_split_into_linked_workbooks(tmp_path):
+    out = tmp_path / 'r.xlsx'
+    code, stats = write_xlsx_sharded(write_xlsx, HEADERS, iter(_rows(5)), out, max_rows=2, summary_title='Итого XML', workers=2)
+    assert (code, stats) == (1, {'total': 5, 'ok': 2, 'errors': 3})
+
+    parts = [load_workbook(shard_path(out, n))['XML - IFC'] for n in (1, 2, 3)]
+    assert [p.max_row - 1 for p in parts] == [2, 2, 1]
+    assert parts[2]['A2'].value == 'f4.ifc'
+    assert parts[2]['I2'].value == 'rec'
+    assert not shard_path(out, 4).exists()
+
+    wb = load_workbook(out)
+    assert wb.sheetnames == ['Оглавление', 'Итого XML']
+    index = wb['Оглавление']
+    assert index['B2'].hyperlink.target == 'r_001.xlsx'
+    assert [c.value for c in index['C']][1:] == [1, 3, 5]
+    assert wb['Итого XML']['B2'].value == 5